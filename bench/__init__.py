@@ -0,0 +1,9 @@
+"""
+Benchmarks for every agent entry point.
+
+    python -m bench.run                     # all scenarios, print a table
+    python -m bench.run --save bench/baselines/local.json
+    python -m bench.run --compare bench/baselines/local.json
+
+See bench/README.md.
+"""
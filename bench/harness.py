@@ -0,0 +1,151 @@
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+# -----------------------------
+# 📏 Measurements
+# -----------------------------
+def percentile(sorted_values, p: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def peak_rss_mb():
+    """
+    Largest resident set size this process has had, in MB (None if unknown).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(latencies, wall_s: float, errors: int = 0, items: int = None) -> dict:
+    """
+    Latency percentiles (ms) and throughput for one run.
+
+    items is what throughput counts (default: one per call), e.g. the
+    files organized per call.
+    """
+    ordered = sorted(latencies)
+    count = len(ordered)
+    items = count if items is None else items
+    return {
+        "count": count,
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        "max_ms": round(ordered[-1] * 1000, 3) if count else 0.0,
+        "wall_s": round(wall_s, 3),
+        "throughput_per_s": round(items / wall_s, 1) if wall_s else 0.0,
+    }
+
+
+def run_workload(fn, inputs, concurrency: int = 1, warmup: int = 0) -> dict:
+    """
+    Call fn(item) for every input, timing each call.
+
+    With concurrency > 1 the calls run on that many threads, like
+    concurrent users. The first warmup inputs are run but not measured.
+    A call that raises counts as an error, not as a latency sample.
+    """
+    inputs = list(inputs)
+    for item in inputs[:warmup]:
+        fn(item)
+    inputs = inputs[warmup:]
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            fn(item)
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed, inputs))
+    else:
+        samples = [timed(item) for item in inputs]
+    wall = time.perf_counter() - start
+
+    latencies = [s for s in samples if s is not None]
+    return summarize(latencies, wall, errors=len(samples) - len(latencies))
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Hide the agents' progress output while measuring.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+# -----------------------------
+# 🧪 Ollama stub in its own process
+# -----------------------------
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_process(latency: float, token_rate: float, timeout: float = 10.0) -> tuple:
+    """
+    Run common.ollama_stub in a child process, so it neither competes for
+    the benchmark's GIL nor counts towards its memory.
+    Returns (process, base_url) once the stub answers.
+    """
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "common.ollama_stub", "--port", str(port),
+         "--latency", str(latency), "--token-rate", str(token_rate)],
+        cwd=str(ROOT), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/api/tags", timeout=1) as response:
+                json.load(response)
+            return process, url
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"Ollama stub did not start on {url}")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"], cwd=str(ROOT),
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Run from anywhere: python bench/run.py or python -m bench.run
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bench.harness import ROOT, git_commit, peak_rss_mb, start_stub_process  # noqa: E402
+from bench.scenarios import SCENARIOS, run_scenario  # noqa: E402
+
+DEFAULTS = {
+    "goals": 200, "concurrency": 8, "expressions": 20000, "probes": 20000,
+    "files": [10000], "per_dir": 0, "repeat": 3, "watch_files": 1000, "latency": 0.05,
+    "token_rate": 400.0, "seed": 7,
+}
+QUICK = {"goals": 40, "expressions": 2000, "probes": 2000, "files": [2000], "repeat": 2,
+         "watch_files": 500}
+
+# metric -> which direction is better
+METRICS = {"p50_ms": "lower", "p95_ms": "lower", "p99_ms": "lower",
+           "throughput_per_s": "higher", "peak_rss_mb": "lower"}
+
+
+# -----------------------------
+# 👶 One scenario per process
+# -----------------------------
+def child_main(name: str, options: dict, result_path: str):
+    """
+    Runs inside the scenario's own process: fresh imports, and a peak RSS
+    that belongs to this scenario alone.
+    """
+    start = time.perf_counter()
+    report = run_scenario(name.split("/")[0], options)
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["process_s"] = round(time.perf_counter() - start, 3)
+    with open(result_path, "w") as f:
+        json.dump(report, f)
+
+
+def run_child(name: str, options: dict, env: dict) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-m", "bench.run", "--child", name,
+             "--options", json.dumps(options), "--result", result_path],
+            cwd=str(ROOT), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if completed.returncode != 0:
+            lines = completed.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else f"exit code {completed.returncode}"}
+        with open(result_path) as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_path)
+
+
+def scenario_env(workdir: str, stub_url: str = None) -> dict:
+    env = dict(os.environ)
+    # Every generation reaches the model: a warm cache would measure the cache
+    env["OLLAMA_CACHE_SIZE"] = "0"
+    env.pop("OLLAMA_CACHE_PATH", None)
+    # Journals, snapshots and hash caches go to a scratch HOME, not yours
+    env["HOME"] = os.path.join(workdir, "home")
+    if stub_url:
+        env["OLLAMA_HOST"] = stub_url
+        env.pop("OLLAMA_HOSTS", None)
+        env.pop("OLLAMA_BACKENDS", None)
+    return env
+
+
+def run_all(names, options: dict, use_stub: bool = True, on_result=None) -> dict:
+    """
+    Run the scenarios and return {"meta": ..., "scenarios": {name: report}}.
+    """
+    stub, stub_url = None, None
+    if use_stub and any(SCENARIOS[name][1] for name in names):
+        stub, stub_url = start_stub_process(options["latency"], options["token_rate"])
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="agent-bench-") as workdir:
+            env = scenario_env(workdir, stub_url)
+            for name in names:
+                # One entry per tree size for the file organizer
+                sizes = options["files"] if name == "file_organizer_tool" else [None]
+                for size in sizes:
+                    key = f"{name}/{size}" if size else name
+                    child_options = dict(options, workdir=workdir, files=size)
+                    results[key] = run_child(key, child_options, env)
+                    if on_result:
+                        on_result(key, results[key])
+    finally:
+        if stub:
+            stub.kill()
+            stub.wait()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "llm": "stub" if stub_url else os.environ.get("OLLAMA_HOST", "default"),
+            "options": options,
+        },
+        "scenarios": results,
+    }
+
+
+# -----------------------------
+# 📊 Report and compare
+# -----------------------------
+def print_row(name: str, report: dict):
+    if "error" in report:
+        print(f"{name:<28} ❌ {report['error']}")
+        return
+    rss = report.get("peak_rss_mb")
+    print(f"{name:<28} {report['count']:>7} {report['p50_ms']:>10.3f} {report['p95_ms']:>10.3f} "
+          f"{report['p99_ms']:>10.3f} {report['throughput_per_s']:>11,.1f} "
+          f"{rss if rss is not None else '-':>8}")
+
+
+def print_header():
+    print(f"{'scenario':<28} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+          f"{'items/s':>11} {'peak MB':>8}")
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print each metric against the baseline; return the regressions, i.e.
+    metrics more than threshold (a fraction) worse than before.
+    """
+    regressions = []
+    if current["meta"]["options"] != baseline["meta"]["options"]:
+        print("⚠ Workload options differ from the baseline; numbers may not be comparable.")
+
+    for name, report in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None or "error" in report or "error" in before:
+            continue
+        changes = []
+        for metric, better in METRICS.items():
+            old, new = before.get(metric), report.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > threshold if better == "lower" else change < -threshold
+            if worse:
+                regressions.append((name, metric, old, new))
+            changes.append(f"{metric} {old:g}→{new:g} ({change:+.0%}){' ⚠' if worse else ''}")
+        print(f"{name:<28} " + ", ".join(changes))
+    return regressions
+
+
+# -----------------------------
+# 🚀 MAIN
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the agents' entry points")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--quick", action="store_true", help="small workloads, for a smoke test")
+    parser.add_argument("--goals", type=int, help=f"goals per agent scenario ({DEFAULTS['goals']})")
+    parser.add_argument("--concurrency", type=int,
+                        help=f"concurrent goals for agent scenarios ({DEFAULTS['concurrency']})")
+    parser.add_argument("--expressions", type=int, help=f"calculator_tool calls ({DEFAULTS['expressions']})")
+    parser.add_argument("--probes", type=int, help=f"system_tool calls ({DEFAULTS['probes']})")
+    parser.add_argument("--files", type=int, nargs="+",
+                        help="tree sizes for file_organizer_tool, e.g. 10000 100000 1000000")
+    parser.add_argument("--per-dir", type=int,
+                        help="spread the tree over folders of N files (organized recursively)")
+    parser.add_argument("--repeat", type=int, help=f"file_organizer_tool runs per size ({DEFAULTS['repeat']})")
+    parser.add_argument("--watch-files", type=int,
+                        help=f"files dropped into the watched folder ({DEFAULTS['watch_files']})")
+    parser.add_argument("--latency", type=float, help=f"stub seconds per generation ({DEFAULTS['latency']})")
+    parser.add_argument("--token-rate", type=float, help=f"stub tokens per second ({DEFAULTS['token_rate']:g})")
+    parser.add_argument("--seed", type=int, help="workload seed")
+    parser.add_argument("--no-stub", action="store_true",
+                        help="use the Ollama from the environment instead of the stub")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fractional slowdown counted as a regression (default 0.25)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--options", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child_main(args.child, json.loads(args.options), args.result)
+        return 0
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    names = args.scenarios or list(SCENARIOS)
+
+    options = dict(DEFAULTS)
+    if args.quick:
+        options.update(QUICK)
+    for key in DEFAULTS:
+        value = getattr(args, key)
+        if value is not None:
+            options[key] = value
+
+    print(f"📊 Benchmarking {', '.join(names)}\n")
+    print_header()
+    results = run_all(names, options, use_stub=not args.no_stub, on_result=print_row)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline saved to {args.save}")
+
+    failed = any("error" in report for report in results["scenarios"].values())
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n🔍 Against {args.compare} (commit {baseline['meta'].get('commit')}):\n")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import importlib.util
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from bench.harness import ROOT, quiet, run_workload, summarize
+from bench.workloads import expression_corpus, make_tree, planning_goals, system_goals, tool_goals
+
+# The parts are standalone scripts that each call their module "agent",
+# so every scenario runs in its own process and loads one of them by path.
+_agents = {}
+
+
+def load_agent(part: str):
+    if part not in _agents:
+        folder = ROOT / part
+        sys.path.insert(0, str(folder))  # the part's own modules (intent_router, organizer, ...)
+        spec = importlib.util.spec_from_file_location(
+            part.replace("-", "_") + "_agent", str(folder / "agent.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _agents[part] = module
+    return _agents[part]
+
+
+def _llm_report(label: str) -> dict:
+    # What the stub reported for this scenario's generations
+    from common.llm_client import get_client
+
+    tokens = get_client().usage.snapshot().get(label, {})
+    return {
+        "llm_calls": tokens.get("calls", 0),
+        "completion_tokens_per_s": tokens.get("completion_tokens_per_s", 0.0),
+        "avg_completion_tokens": tokens.get("avg_completion_tokens", 0.0),
+    }
+
+
+# -----------------------------
+# 🧠 Agents (LLM on the stub)
+# -----------------------------
+def bench_planning_agent(options: dict) -> dict:
+    agent = load_agent("part-4-system-agent")
+    goals = planning_goals(options["goals"], options["seed"])
+    with quiet():
+        report = run_workload(agent.planning_agent, goals, options["concurrency"])
+    report.update(_llm_report(agent.USAGE_LABEL))
+    return report
+
+
+def bench_tool_agent(options: dict) -> dict:
+    agent = load_agent("part-3-tool-agent")
+    goals = tool_goals(options["goals"], options["seed"])
+    with quiet():
+        report = run_workload(agent.tool_agent, goals, options["concurrency"])
+    report.update(_llm_report(agent.USAGE_LABEL))
+    return report
+
+
+def bench_system_agent(options: dict) -> dict:
+    agent = load_agent("part-4-system-agent")
+    goals = system_goals(options["goals"], options["seed"])
+    with quiet():
+        report = run_workload(agent.system_agent, goals, options["concurrency"])
+    report.update(_llm_report(agent.USAGE_LABEL))
+    return report
+
+
+# -----------------------------
+# 🔧 Tools (no LLM)
+# -----------------------------
+def bench_calculator_tool(options: dict) -> dict:
+    agent = load_agent("part-4-system-agent")
+    expressions = expression_corpus(options["expressions"], seed=options["seed"])
+    return run_workload(agent.calculator_tool, expressions)
+
+
+def bench_system_tool(options: dict) -> dict:
+    agent = load_agent("part-4-system-agent")
+    commands = ("disk_usage", "memory_info", "cpu_load", "os_info")
+    calls = list(itertools.islice(itertools.cycle(commands), options["probes"]))
+    return run_workload(agent.system_tool, calls)
+
+
+def bench_file_organizer_tool(options: dict) -> dict:
+    """
+    Organize a freshly generated tree options["files"] files big, repeat
+    times. Building the tree is timed separately (setup_s).
+    """
+    agent = load_agent("part-5-file-organizer-agent")
+    files, per_dir = options["files"], options["per_dir"]
+    latencies, setup = [], 0.0
+    for run in range(options["repeat"]):
+        root = tempfile.mkdtemp(prefix="tree-", dir=options["workdir"])
+        start = time.perf_counter()
+        make_tree(root, files, per_dir=per_dir, seed=options["seed"] + run)
+        setup += time.perf_counter() - start
+
+        start = time.perf_counter()
+        with quiet():
+            result = agent.file_organizer_tool(root, collect_names=False, recursive=bool(per_dir))
+        latencies.append(time.perf_counter() - start)
+        shutil.rmtree(root, ignore_errors=True)
+        if result.get("status") != "success":
+            raise RuntimeError(f"file_organizer_tool failed: {result.get('message')}")
+
+    report = summarize(latencies, sum(latencies), items=files * len(latencies))
+    report.update({"files": files, "setup_s": round(setup, 3)})
+    return report
+
+
+def bench_watch_daemon(options: dict) -> dict:
+    """
+    Drop options["watch_files"] files into a watched folder and time each
+    one from arrival to placed. Uses the journal, as watch.py does by default.
+    """
+    load_agent("part-5-file-organizer-agent")
+    from organizer.categories import get_category_index
+    from organizer.journal import MoveJournal
+    from organizer.watcher import OrganizerDaemon
+
+    files = options["watch_files"]
+    folder = tempfile.mkdtemp(prefix="watch-", dir=options["workdir"])
+    daemon = OrganizerDaemon([folder], get_category_index().classify, settle=0.5,
+                             batch_window=0.05, journal_factory=MoveJournal.create)
+    thread = threading.Thread(target=daemon.run, daemon=True)
+    with quiet():
+        thread.start()
+        start = time.perf_counter()
+        make_tree(folder, files, seed=options["seed"])
+        deadline = time.monotonic() + 60
+        while (daemon.metrics.placed + daemon.metrics.failed < files
+               and thread.is_alive() and time.monotonic() < deadline):
+            time.sleep(0.01)
+        wall = time.perf_counter() - start
+        daemon.stop()
+        thread.join(timeout=5)
+    shutil.rmtree(folder, ignore_errors=True)
+
+    stats = daemon.stats()
+    if stats["placed"] < files:
+        raise RuntimeError(f"watcher placed {stats['placed']} of {files} files "
+                           f"({stats['failed']} failed)")
+    report = summarize(daemon.metrics.latencies(), wall, items=files)
+    report.update({"files": files, "batches": stats["batches"], "backend": stats["backend"]})
+    return report
+
+
+# name -> (function, needs the Ollama stub)
+SCENARIOS = {
+    "planning_agent": (bench_planning_agent, True),
+    "tool_agent": (bench_tool_agent, True),
+    "system_agent": (bench_system_agent, True),
+    "calculator_tool": (bench_calculator_tool, False),
+    "system_tool": (bench_system_tool, False),
+    "file_organizer_tool": (bench_file_organizer_tool, False),
+    "watch_daemon": (bench_watch_daemon, False),
+}
+
+
+def run_scenario(name: str, options: dict) -> dict:
+    func, _ = SCENARIOS[name]
+    os.makedirs(options["workdir"], exist_ok=True)
+    return func(options)
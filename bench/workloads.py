@@ -0,0 +1,149 @@
+import os
+import random
+
+# Every corpus is built from a seeded Random, so the same options always
+# produce the same workload and runs on different commits are comparable.
+DEFAULT_SEED = 7
+
+
+# -----------------------------
+# 📚 Goal corpora
+# -----------------------------
+PLANNING_TEMPLATES = [
+    "Plan a server setup",
+    "Plan a {a}-day trip to Rome",
+    "How do I prepare for a job interview at company {a}",
+    "Write a roadmap for learning Python in {b} weeks",
+    "Give me steps to host a dinner party for {b} people",
+    "Draft a strategy for cost savings across {b} teams",
+    "Organize a study schedule for {b} exams",
+    "Migrate {a} users to the new billing system",
+]
+
+MATH_TEMPLATES = [
+    "What is {a} * {b}?",
+    "Calculate ({a} + {b}) / 2",
+    "{a} - {b}",
+    "compute {a} + {b} * {c}",
+]
+
+SYSTEM_TEMPLATES = [
+    "Check disk usage",
+    "How much memory is free?",
+    "Show CPU load",
+    "What OS am I running?",
+    "Show RAM usage",
+    "Is my disk almost full",
+]
+
+COMPOUND_TEMPLATES = [
+    "Check disk usage and memory",
+    "Show CPU load and compute {a} * {b}",
+    "Check memory, then plan a cleanup of {b} servers",
+]
+
+
+def _fill(rng: random.Random, template: str) -> str:
+    return template.format(a=rng.randint(1, 999), b=rng.randint(2, 99), c=rng.randint(1, 99))
+
+
+def goal_corpus(size: int, mix: dict, seed: int = DEFAULT_SEED) -> list:
+    """
+    size goals drawn from template groups with the given weights, e.g.
+    {"planning": 3, "math": 1}.
+    """
+    groups = {"planning": PLANNING_TEMPLATES, "math": MATH_TEMPLATES,
+              "system": SYSTEM_TEMPLATES, "compound": COMPOUND_TEMPLATES}
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    return [
+        _fill(rng, rng.choice(groups[name]))
+        for name in rng.choices(names, weights=weights, k=size)
+    ]
+
+
+def planning_goals(size: int, seed: int = DEFAULT_SEED) -> list:
+    return goal_corpus(size, {"planning": 1}, seed)
+
+
+def tool_goals(size: int, seed: int = DEFAULT_SEED) -> list:
+    # What tool_agent sees: mostly plans, some arithmetic
+    return goal_corpus(size, {"planning": 3, "math": 1}, seed)
+
+
+def system_goals(size: int, seed: int = DEFAULT_SEED) -> list:
+    # What system_agent sees: every route, including compound goals
+    return goal_corpus(size, {"planning": 2, "math": 1, "system": 2, "compound": 1}, seed)
+
+
+# -----------------------------
+# 🧮 Expression corpus
+# -----------------------------
+def _expression(rng: random.Random, depth: int) -> str:
+    if depth <= 0 or rng.random() < 0.3:
+        return str(rng.randint(1, 9999))
+    op = rng.choice(["+", "-", "*", "/", "//", "%", "**"])
+    left = _expression(rng, depth - 1)
+    if op == "**":
+        right = str(rng.randint(0, 8))  # keep powers in range
+    else:
+        right = _expression(rng, depth - 1)
+    text = f"{left} {op} {right}"
+    return f"({text})" if rng.random() < 0.5 else text
+
+
+def expression_corpus(size: int, depth: int = 4, repeat_rate: float = 0.2,
+                      seed: int = DEFAULT_SEED) -> list:
+    """
+    size arithmetic expressions up to depth operators deep. About
+    repeat_rate of them repeat an earlier one, like users asking the same
+    thing twice; some divide by zero, like users do.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        if corpus and rng.random() < repeat_rate:
+            corpus.append(rng.choice(corpus))
+        else:
+            corpus.append(_expression(rng, depth))
+    return corpus
+
+
+# -----------------------------
+# 📁 Directory trees
+# -----------------------------
+# Roughly a Downloads folder: many documents and images, a long tail of the rest
+TREE_EXTENSIONS = [
+    (".pdf", 12), (".docx", 6), (".txt", 8), (".jpg", 14), (".png", 10), (".csv", 6),
+    (".json", 4), (".mp4", 3), (".mp3", 3), (".zip", 4), (".tar.gz", 2), (".py", 6),
+    (".js", 3), (".exe", 1), (".deb", 1), (".bin", 3), ("", 2),
+]
+
+
+def make_tree(root: str, files: int, per_dir: int = None, file_bytes: int = 0,
+              seed: int = DEFAULT_SEED) -> int:
+    """
+    Create files (empty, or file_bytes long) with a realistic mix of
+    extensions under root. With per_dir, they are spread over numbered
+    subfolders of that many files each; otherwise all sit in root.
+    Returns the number of files created.
+    """
+    rng = random.Random(seed)
+    extensions = [ext for ext, _ in TREE_EXTENSIONS]
+    weights = [weight for _, weight in TREE_EXTENSIONS]
+    payload = b"x" * file_bytes
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+
+    os.makedirs(root, exist_ok=True)
+    folder = root
+    for i, ext in enumerate(rng.choices(extensions, weights=weights, k=files)):
+        if per_dir and i % per_dir == 0:
+            folder = os.path.join(root, f"dir{i // per_dir:05d}")
+            os.makedirs(folder, exist_ok=True)
+        # Plain os.open/close: a million files in seconds, not minutes
+        fd = os.open(os.path.join(folder, f"file{i:07d}{ext}"), flags, 0o644)
+        if payload:
+            os.write(fd, payload)
+        os.close(fd)
+    return files
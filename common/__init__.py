@@ -0,0 +1,6 @@
+"""
+Shared building blocks used by the course agents (parts 1–4).
+
+Each part stays a standalone script; this package only holds the
+plumbing they all need, so it lives in one place instead of four.
+"""
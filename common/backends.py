@@ -0,0 +1,338 @@
+"""
+Spread generations over several Ollama processes.
+
+    OLLAMA_HOSTS=127.0.0.1:11434,127.0.0.1:11435 python agent.py
+
+BackendRouter is a drop-in LLMClient: get_client() returns one when
+OLLAMA_HOSTS or OLLAMA_BACKENDS is set, so the agents, the cache, request
+coalescing and token accounting work unchanged on top of it.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common.llm_client import LLMClient, LLMError, _base_model, _normalize_base_url
+
+
+# -----------------------------
+# 🖥️ One Ollama endpoint
+# -----------------------------
+class Backend:
+    """
+    An Ollama endpoint and what it serves.
+
+    models: None (any model), a list of names, or {name: weight}. A
+    backend with weight 2 for a model is given about twice the
+    outstanding requests of a weight-1 backend for that model.
+    max_inflight: requests it handles at once (its OLLAMA_NUM_PARALLEL);
+    when every backend for a model is at that limit, the router may fall
+    back to a smaller model.
+    """
+
+    def __init__(self, url: str, models=None, max_inflight: int = 1):
+        self.url = _normalize_base_url(url)
+        if models is None:
+            self.weights = None
+        elif isinstance(models, dict):
+            self.weights = {_base_model(k): float(v) for k, v in models.items()}
+        else:
+            self.weights = {_base_model(m): 1.0 for m in models}
+        self.max_inflight = max_inflight
+        self.available = None  # model names from /api/tags, once known
+        self.healthy = True
+        self.ejected_at = None  # time.monotonic() of the last ejection or retry
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.last_error = None
+        self.client = None  # set by the router
+
+    def weight(self, model: str) -> float:
+        """
+        Routing weight for a model; 0 if this backend doesn't serve it.
+        """
+        model = _base_model(model)
+        if self.available is not None and model not in self.available:
+            return 0.0
+        if self.weights is None:
+            return 1.0
+        return self.weights.get(model, 0.0)
+
+    def snapshot(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "failures": self.failures,
+            "models": sorted(self.weights or self.available or []),
+            "last_error": self.last_error,
+            "latency": self.client.stats.snapshot() if self.client else None,
+        }
+
+
+# -----------------------------
+# ⚖️ Router
+# -----------------------------
+class BackendRouter(LLMClient):
+    """
+    LLMClient that sends each request to one of several backends.
+
+    * Least outstanding requests: the backend with the lowest
+      outstanding / weight for the requested model wins.
+    * Ejection: a backend that can't be reached or answers 5xx is taken
+      out of rotation at once and the request moves to the next one. A
+      read timeout only fails that request: the backend is busy, not
+      down. A background health check (GET /api/tags) puts it back when
+      it answers again, and learns which models it has. With
+      health_interval=0 there is no checker: an ejected backend gets one
+      request every retry_after seconds, and is back once one succeeds.
+    * Fallback: if every backend for a model is at max_inflight and a
+      fallback is configured (e.g. {"mistral": "phi3"}), the request
+      goes to a backend with room for the smaller model instead. Such
+      answers are not cached (see LLMClient.generate).
+    """
+
+    def __init__(self, backends, fallbacks: dict = None, health_interval: float = 5.0,
+                 pool_size: int = 10, connect_timeout: float = 3.05, read_timeout: float = 300.0,
+                 max_retries: int = 2, retry_after: float = 30.0, **options):
+        if not backends:
+            raise ValueError("BackendRouter needs at least one backend")
+        super().__init__(backends[0].url, pool_size=pool_size, connect_timeout=connect_timeout,
+                         read_timeout=read_timeout, max_retries=max_retries, **options)
+        self.backends = list(backends)
+        self.fallbacks = dict(fallbacks or {})
+        self.health_interval = health_interval
+        self.retry_after = retry_after
+        self.route_stats = {"fallbacks": 0, "failovers": 0, "ejections": 0, "readmissions": 0}
+        self._lock = threading.Lock()
+
+        for backend in self.backends:
+            # Retries happen here, on another backend, not inside the backend client
+            backend.client = LLMClient(backend.url, pool_size=pool_size,
+                                       connect_timeout=connect_timeout, read_timeout=read_timeout,
+                                       max_retries=0, coalesce=False)
+            # One place for token counts and options, whichever backend answers
+            backend.client.usage = self.usage
+            backend.client.first_token_stats = self.first_token_stats
+            backend.client.default_options = self.default_options
+
+        self._stop = threading.Event()
+        self._health_thread = None
+        if health_interval > 0:
+            self.check_health()
+            self._health_thread = threading.Thread(target=self._health_loop,
+                                                   name="ollama-health", daemon=True)
+            self._health_thread.start()
+
+    # ---- choosing a backend ----
+    def _pick(self, model: str, exclude=()):
+        best, best_score = None, None
+        # Without a health checker, ejected backends are retried after a cooldown
+        retry_before = None if self._health_thread else time.monotonic() - self.retry_after
+        for backend in self.backends:
+            if backend in exclude:
+                continue
+            if not backend.healthy and (retry_before is None or backend.ejected_at > retry_before):
+                continue
+            weight = backend.weight(model)
+            if weight <= 0:
+                continue
+            score = backend.outstanding / weight
+            if best is None or score < best_score:
+                best, best_score = backend, score
+        return best
+
+    def acquire(self, model: str, exclude=()) -> tuple:
+        """
+        (backend, model) for the next request, counted as outstanding.
+        The model differs from the one asked for when falling back.
+        """
+        with self._lock:
+            backend = self._pick(model, exclude)
+            fallback = self.fallbacks.get(_base_model(model))
+            if fallback and (backend is None or backend.outstanding >= backend.max_inflight):
+                spare = self._pick(fallback, exclude)
+                if spare is not None and (backend is None or spare.outstanding < spare.max_inflight):
+                    backend, model = spare, fallback
+                    self.route_stats["fallbacks"] += 1
+            if backend is None:
+                raise LLMError(f"No healthy backend serves model {model!r}")
+            if not backend.healthy:
+                # A retry: one request per cooldown until it succeeds
+                backend.ejected_at = time.monotonic()
+            backend.outstanding += 1
+            return backend, model
+
+    def release(self, backend: Backend, error: Exception = None, eject: bool = False):
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None:
+                backend.served += 1
+                if not backend.healthy and self._health_thread is None:
+                    backend.healthy = True
+                    self.route_stats["readmissions"] += 1
+                return
+            backend.failures += 1
+            backend.last_error = str(error)[:200]
+            if eject and backend.healthy:
+                self._eject(backend)
+
+    # ---- requests ----
+    def post(self, path: str, payload: dict, timeout=None) -> dict:
+        """
+        POST to the best backend, failing over to the next on errors.
+        """
+        payload = dict(payload)
+        asked_for = payload.get("model", "")
+        tried = set()
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                backend, model = self.acquire(asked_for, exclude=tried)
+            except LLMError as e:
+                last_error = e
+                break
+            if attempt:
+                with self._lock:
+                    self.route_stats["failovers"] += 1
+            payload["model"] = model
+            try:
+                result = backend.client.post(path, payload, timeout=timeout)
+            except LLMError as e:
+                tried.add(backend)
+                last_error = e
+                # Down or failing (connection error, 5xx): eject and move on
+                self.release(backend, error=e, eject=e.unavailable)
+                if e.unavailable or e.status == 404:  # 404: model missing there
+                    continue
+                # A bad request, or a read timeout on a busy but healthy
+                # backend: sending it elsewhere won't help
+                raise
+            self.release(backend)
+            self.stats.record(result["client_latency_ms"] / 1000)
+            result["backend"] = backend.url
+            return result
+        raise LLMError(f"All backends failed for model {asked_for!r}: {last_error}", unavailable=True)
+
+    def generate_stream(self, model: str, prompt: str, timeout=None, label: str = None, **options):
+        """
+        Stream from the best backend. A stream that breaks midway is not
+        moved to another backend (its first chunks are already out).
+        """
+        backend, model = self.acquire(model)
+        error = None
+        try:
+            yield from backend.client.generate_stream(model, prompt, timeout=timeout, label=label,
+                                                      **options)
+        except LLMError as e:
+            error = e
+            raise
+        finally:
+            # Only an unreachable backend is ejected, not a slow one or a
+            # caller that stopped reading
+            self.release(backend, error=error, eject=error is not None and error.unavailable)
+
+    def warm_up(self, model: str, prompt: str = "", keep_alive=None, timeout=None) -> dict:
+        """
+        Warm every healthy backend that serves the model, in parallel.
+        """
+        targets = [b for b in self.backends if b.healthy and b.weight(model) > 0]
+        if not targets:
+            raise LLMError(f"No healthy backend serves model {model!r}")
+        with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+            results = list(pool.map(
+                lambda b: b.client.warm_up(model, prompt, keep_alive=keep_alive, timeout=timeout),
+                targets))
+        return {
+            "latency_ms": max(r["latency_ms"] for r in results),
+            "load_ms": max(r["load_ms"] for r in results),
+            "prompt_eval_count": max(r["prompt_eval_count"] for r in results),
+            "backends": {b.url: r for b, r in zip(targets, results)},
+        }
+
+    # ---- health ----
+    def check_health(self):
+        """
+        GET /api/tags on every backend: re-admit the ones that answer,
+        eject the ones that don't, and learn their model lists.
+        """
+        for backend in self.backends:
+            try:
+                response = backend.client.session.get(backend.url + "/api/tags",
+                                                      timeout=self.timeout[0])
+                response.raise_for_status()
+                names = {_base_model(m["name"]) for m in response.json().get("models", [])}
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                with self._lock:
+                    backend.last_error = str(e)[:200]
+                    if backend.healthy:
+                        self._eject(backend)
+                continue
+            with self._lock:
+                backend.available = names or None
+                if not backend.healthy:
+                    backend.healthy = True
+                    self.route_stats["readmissions"] += 1
+
+    def _eject(self, backend: Backend):
+        # Called with the lock held
+        backend.healthy = False
+        backend.ejected_at = time.monotonic()
+        self.route_stats["ejections"] += 1
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "backends": [backend.snapshot() for backend in self.backends],
+                "routing": dict(self.route_stats),
+                "fallbacks": dict(self.fallbacks),
+            }
+
+    def close(self):
+        self._stop.set()
+        for backend in self.backends:
+            backend.client.close()
+        super().close()
+
+
+# -----------------------------
+# 🌐 From the environment
+# -----------------------------
+def backends_from_env() -> list:
+    """
+    Backends from OLLAMA_BACKENDS (JSON) or OLLAMA_HOSTS (comma list).
+
+        OLLAMA_HOSTS=127.0.0.1:11434,127.0.0.1:11435
+        OLLAMA_BACKENDS='[{"url": "127.0.0.1:11434", "models": {"mistral": 2, "phi3": 1},
+                           "max_inflight": 2}, {"url": "127.0.0.1:11435", "models": ["phi3"]}]'
+    """
+    max_inflight = int(os.environ.get("OLLAMA_MAX_INFLIGHT", 1))
+    if os.environ.get("OLLAMA_BACKENDS"):
+        return [
+            Backend(entry["url"], entry.get("models"), entry.get("max_inflight", max_inflight))
+            for entry in json.loads(os.environ["OLLAMA_BACKENDS"])
+        ]
+    hosts = [h for h in os.environ.get("OLLAMA_HOSTS", "").split(",") if h.strip()]
+    return [Backend(h, max_inflight=max_inflight) for h in hosts]
+
+
+def fallbacks_from_env() -> dict:
+    # OLLAMA_FALLBACK_MODELS="mistral=phi3,llama3=llama3.2:1b"
+    pairs = [p.split("=", 1) for p in os.environ.get("OLLAMA_FALLBACK_MODELS", "").split(",") if "=" in p]
+    return {big.strip(): small.strip() for big, small in pairs}
+
+
+def router_from_env(**settings) -> BackendRouter:
+    settings.pop("base_url", None)
+    settings.setdefault("health_interval", float(os.environ.get("OLLAMA_HEALTH_INTERVAL", 5)))
+    return BackendRouter(backends_from_env(), fallbacks=fallbacks_from_env(), **settings)
@@ -0,0 +1,235 @@
+"""
+Plan thousands of goals against a local Ollama with bounded concurrency.
+
+    python -m common.batch goals.txt -o plans.jsonl --concurrency 8
+
+Reads one goal per line (use "-" for stdin) and writes one JSON result
+per line, in input order or in completion order.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from common.json_repair import PlanFormatError, repair_or_retry, repair_stats
+from common.llm_client import LLMError, client_from_env, get_client
+from common.prompts import build_planning_prompt
+from common.singleflight import SingleFlight
+
+
+DEFAULT_MODEL = "mistral"
+USAGE_LABEL = "batch"
+
+
+def _plan_one(client, model: str, goal: str, timeout, bypass_cache: bool):
+    # Runs on a worker thread; the pooled client is thread-safe.
+    prompt = build_planning_prompt(goal)
+    result = client.generate(model, prompt, timeout=timeout, bypass_cache=bypass_cache,
+                             label=USAGE_LABEL)
+    plan = repair_or_retry(result["response"], goal, model, prompt, client=client, label=USAGE_LABEL)
+    if plan is None:
+        raise PlanFormatError("Model did not return a valid goal/steps plan")
+    return plan
+
+
+# -----------------------------
+# ⚡ Async batch planning
+# -----------------------------
+async def iter_plans(
+    goals,
+    concurrency: int = 4,
+    timeout: float = None,
+    model: str = DEFAULT_MODEL,
+    client=None,
+    ordered: bool = True,
+    max_pending: int = None,
+    bypass_cache: bool = False,
+    flight: SingleFlight = None,
+):
+    """
+    Plan every goal and yield one result dict per goal.
+
+    At most `concurrency` generations run at once and goals are pulled from
+    the iterable only when there is room, so a huge input file is never
+    loaded up front. In ordered mode, finished results wait for earlier
+    ones; `max_pending` (default 4 x concurrency) caps how many can pile
+    up behind a slow goal before new goals stop being started.
+
+    A goal that repeats one still being planned shares that plan (through
+    `flight`, default: one SingleFlight per call) instead of taking a
+    worker thread of its own; its result is marked "coalesced": true.
+
+    Each result looks like:
+        {"index": 0, "goal": "...", "status": "ok", "plan": {...}, "latency_ms": 812.4}
+    where status is one of: ok, invalid_json, timeout, error.
+    """
+    client = client or get_client()
+    flight = flight or SingleFlight()
+    max_pending = max_pending or concurrency * 4
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def run(index: int, goal: str) -> dict:
+        record = {"index": index, "goal": goal}
+        start = time.perf_counter()
+        try:
+            call = flight.do_async(
+                (model, goal), partial(_plan_one, client, model, goal, timeout, bypass_cache),
+                executor,
+            )
+            # The HTTP read timeout normally fires first; this is the backstop.
+            # A timed-out duplicate only stops waiting; the shared plan goes on.
+            plan, shared = await asyncio.wait_for(call, timeout + 1 if timeout else None)
+            record.update(status="ok", plan=plan)
+            if shared:
+                record["coalesced"] = True
+        except asyncio.TimeoutError:
+            record.update(status="timeout", error=f"No answer within {timeout}s")
+        except PlanFormatError as e:
+            record.update(status="invalid_json", error=str(e))
+        except LLMError as e:
+            status = "timeout" if "timed out" in str(e).lower() else "error"
+            record.update(status=status, error=str(e))
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return record
+
+    source = enumerate(goals)
+    exhausted = False
+    pending = set()
+    finished = {}
+    next_index = 0
+
+    try:
+        while True:
+            while (
+                not exhausted
+                and len(pending) < concurrency
+                and (not ordered or len(pending) + len(finished) < max_pending)
+            ):
+                try:
+                    index, goal = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(run(index, goal)))
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                record = task.result()
+                if ordered:
+                    finished[record["index"]] = record
+                else:
+                    yield record
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        executor.shutdown(wait=False)
+
+
+async def plan_many(goals, concurrency: int = 4, **kwargs) -> list:
+    """
+    Plan all goals and return the results in input order.
+
+    Accepts the same keyword arguments as iter_plans().
+    """
+    kwargs["ordered"] = True
+    return [record async for record in iter_plans(goals, concurrency=concurrency, **kwargs)]
+
+
+# -----------------------------
+# 🚀 CLI
+# -----------------------------
+def _read_goals(stream):
+    for line in stream:
+        goal = line.strip()
+        if goal:
+            yield goal
+
+
+async def _run_cli(args) -> dict:
+    client = client_from_env(pool_size=args.concurrency)
+    flight = SingleFlight()
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    summary = {"total": 0}
+
+    try:
+        async for record in iter_plans(
+            _read_goals(source),
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            model=args.model,
+            client=client,
+            ordered=args.order == "input",
+            bypass_cache=args.no_cache,
+            flight=flight,
+        ):
+            summary["total"] += 1
+            summary[record["status"]] = summary.get(record["status"], 0) + 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+        client.close()
+
+    summary["coalesced"] = flight.snapshot()["coalesced"]
+    return summary, client.usage.snapshot()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan many goals with a local Ollama")
+    parser.add_argument("input", help="file with one goal per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4,
+                        help="parallel generations; match OLLAMA_NUM_PARALLEL")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds per goal")
+    parser.add_argument("--order", choices=["input", "completion"], default="input")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call the model (fresh answers still refresh the cache)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary, usage = asyncio.run(_run_cli(args))
+    elapsed = time.perf_counter() - start
+
+    coalesced = summary.pop("coalesced")
+    failed = summary["total"] - summary.get("ok", 0)
+    rate = summary["total"] / elapsed if elapsed else 0.0
+    print(
+        f"✅ {summary.get('ok', 0)} ok, ❌ {failed} failed "
+        f"of {summary['total']} goals in {elapsed:.1f}s ({rate:.1f} goals/s)",
+        file=sys.stderr,
+    )
+    print(f"   JSON repair paths: {json.dumps(repair_stats.snapshot())}", file=sys.stderr)
+    if coalesced:
+        print(f"   Duplicate goals sharing a generation: {coalesced}", file=sys.stderr)
+    if USAGE_LABEL in usage:
+        tokens = usage[USAGE_LABEL]
+        print(f"   Tokens: {tokens['prompt_tokens']} prompt + {tokens['completion_tokens']} completion "
+              f"({tokens['completion_tokens_per_s']} tok/s generated, "
+              f"{tokens['over_budget']} prompts over budget)", file=sys.stderr)
+    if failed:
+        details = {k: v for k, v in summary.items() if k not in ("total", "ok")}
+        print(f"   Failures by status: {json.dumps(details)}", file=sys.stderr)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(model: str, prompt: str, options: dict = None) -> str:
+    """
+    Content address for a generation: same model + prompt + options, same key.
+    """
+    canonical = json.dumps(
+        {"model": model, "prompt": prompt, "options": options or {}},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """
+    Hit / miss / eviction counters shared by the cache tiers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        lookups = counts.get("hits", 0) + counts.get("misses", 0)
+        counts["hit_rate"] = round(counts.get("hits", 0) / lookups, 4) if lookups else 0.0
+        return counts
+
+
+# -----------------------------
+# 🧠 Tier 1: in-memory LRU
+# -----------------------------
+class LRUCache:
+    """
+    Thread-safe LRU with a size limit and a time-to-live per entry.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, stats: CacheStats = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = stats or CacheStats()
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.stats.add("memory_expired")
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats.add("memory_evictions")
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# -----------------------------
+# 💾 Tier 2: SQLite on disk
+# -----------------------------
+class SQLiteCache:
+    """
+    Persistent cache that survives restarts.
+
+    Uses WAL mode so several worker processes can share one file. Rows
+    older than ttl are dropped on read; the table is trimmed to
+    max_entries (oldest first) every `trim_every` writes.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl: float = 7 * 24 * 3600,
+                 stats: CacheStats = None, trim_every: int = 100):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = stats or CacheStats()
+        self.trim_every = trim_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created ON llm_cache(created)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if created + self.ttl < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats.add("disk_expired")
+                return None
+        return json.loads(value)
+
+    def set(self, key: str, value):
+        data = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created) VALUES (?, ?, ?)",
+                (key, data, time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.trim_every == 0:
+                self._trim()
+            self._conn.commit()
+
+    def _trim(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        extra = count - self.max_entries
+        if extra > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY created LIMIT ?)",
+                (extra,),
+            )
+            self.stats.add("disk_evictions", extra)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# -----------------------------
+# 🗄️ Two-tier response cache
+# -----------------------------
+class ResponseCache:
+    """
+    Memory LRU in front of an optional SQLite tier.
+
+    Disk hits are promoted into memory, so a repeated goal is served from
+    a dict lookup after the first time.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, path: str = None,
+                 disk_ttl: float = 7 * 24 * 3600):
+        self.stats = CacheStats()
+        self.memory = LRUCache(max_entries=max_entries, ttl=ttl, stats=self.stats)
+        self.disk = SQLiteCache(path, ttl=disk_ttl, stats=self.stats) if path else None
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats.add("hits")
+            self.stats.add("memory_hits")
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                self.stats.add("hits")
+                self.stats.add("disk_hits")
+                return value
+
+        self.stats.add("misses")
+        return None
+
+    def set(self, key: str, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        self.stats.add("stores")
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
@@ -0,0 +1,163 @@
+import ast
+import math
+import operator
+import time
+from functools import lru_cache
+
+
+class CalculatorError(ValueError):
+    """Raised for expressions that are invalid or exceed the safety limits."""
+
+
+MAX_LENGTH = 1000        # characters in one expression
+MAX_STEPS = 500          # operands + operators after compilation
+MAX_BITS = 4096          # size of any integer, literal or intermediate (~1233 digits)
+MAX_EXPONENT = 4096      # |exponent| in a ** b
+TIME_BUDGET = 0.05       # seconds per evaluation
+
+_BINARY = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: pow,
+    ast.BitXor: pow,  # people write 2^10 for a power
+}
+_UNARY = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+# -----------------------------
+# 🧩 Compile: text -> postfix program
+# -----------------------------
+@lru_cache(maxsize=16384)
+def compile_expression(expression: str) -> tuple:
+    """
+    Parse with ast, allow only numbers and arithmetic, and flatten the
+    tree into a postfix program of (kind, value) steps.
+
+    Memoized: the same text is parsed and checked only once.
+    """
+    if len(expression) > MAX_LENGTH:
+        raise CalculatorError(f"Expression longer than {MAX_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        raise CalculatorError("Not a valid arithmetic expression") from None
+
+    program = []
+    todo = [tree.body]
+    # Iterative post-order walk: children first, then the operator
+    while todo:
+        node = todo.pop()
+        if isinstance(node, tuple):
+            program.append(node)
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            todo.append(("bin", _BINARY[type(node.op)]))
+            todo.append(node.right)
+            todo.append(node.left)
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+            todo.append(("unary", _UNARY[type(node.op)]))
+            todo.append(node.operand)
+        elif (isinstance(node, ast.Constant) and type(node.value) in (int, float)):
+            _check_size(node.value)
+            program.append(("num", node.value))
+        else:
+            raise CalculatorError(f"Not allowed in an expression: {type(node).__name__}")
+        if len(program) + len(todo) > MAX_STEPS:
+            raise CalculatorError(f"Expression has more than {MAX_STEPS} steps")
+    return tuple(program)
+
+
+def _check_size(value):
+    if type(value) is int and value.bit_length() > MAX_BITS:
+        raise CalculatorError("Number too large")
+    if type(value) is float and not math.isfinite(value):
+        raise CalculatorError("Result is not a finite number")
+
+
+# -----------------------------
+# 🛡️ Guarded operators
+# -----------------------------
+def _guard(func, a, b):
+    # Predict the size of big integer results before computing them. These
+    # are lower bounds, so results that fit are never refused; the rest are
+    # at most twice MAX_BITS and _check_size catches them afterwards.
+    if type(a) is int and type(b) is int:
+        if func is pow:
+            if abs(b) > MAX_EXPONENT:
+                raise CalculatorError(f"Exponent larger than {MAX_EXPONENT}")
+            if b > 0 and (a.bit_length() - 1) * b + 1 > MAX_BITS:
+                raise CalculatorError("Number too large")
+        elif func is operator.mul and a.bit_length() + b.bit_length() - 1 > MAX_BITS:
+            raise CalculatorError("Number too large")
+    elif func is pow and abs(b) > MAX_EXPONENT:
+        raise CalculatorError(f"Exponent larger than {MAX_EXPONENT}")
+
+
+def run_program(program: tuple, deadline: float = None):
+    """
+    Evaluate a compiled program on a small stack, within the step and
+    time budget.
+    """
+    deadline = deadline or time.perf_counter() + TIME_BUDGET
+    stack = []
+    for kind, value in program:
+        if kind == "num":
+            stack.append(value)
+            continue
+        if time.perf_counter() > deadline:
+            raise CalculatorError("Calculation took too long")
+        try:
+            if kind == "unary":
+                stack.append(value(stack.pop()))
+            else:
+                b = stack.pop()
+                a = stack.pop()
+                _guard(value, a, b)
+                result = value(a, b)
+                if type(result) is complex:
+                    raise CalculatorError("Result is not a real number")
+                stack.append(result)
+        except ZeroDivisionError:
+            raise CalculatorError("Division by zero") from None
+        except OverflowError:
+            raise CalculatorError("Number too large") from None
+        _check_size(stack[-1])
+    return stack[0]
+
+
+# -----------------------------
+# 🧮 Public API
+# -----------------------------
+def evaluate(expression: str):
+    """
+    Value of an arithmetic expression: + - * / // % ** (or ^), unary
+    +/-, parentheses, int and float literals. Anything else, or anything
+    over the limits, raises CalculatorError instead of hanging the caller.
+    """
+    return run_program(compile_expression(expression))
+
+
+def evaluate_many(expressions) -> list:
+    """
+    Evaluate a batch of expressions; results come back in order.
+
+    Duplicates are evaluated once and compiled programs come from the
+    shared LRU, so large, repetitive batches (e.g. scoring model answers)
+    cost little more than their distinct expressions. A failing
+    expression yields its CalculatorError instead of stopping the batch.
+    """
+    results = {}
+    out = []
+    for expression in expressions:
+        result = results.get(expression)
+        if result is None:
+            try:
+                result = run_program(compile_expression(expression))
+            except CalculatorError as e:
+                result = e
+            results[expression] = result
+        out.append(result)
+    return out
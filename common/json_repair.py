@@ -0,0 +1,233 @@
+import json
+import re
+import threading
+
+from common.llm_client import get_client
+
+
+class PlanFormatError(ValueError):
+    """Raised when neither local repair nor the JSON retry produced a plan."""
+
+
+SMART_QUOTES = str.maketrans({
+    "“": '"', "”": '"', "„": '"', "″": '"',
+    "‘": "'", "’": "'",
+})
+
+
+# -----------------------------
+# 📊 Which path produced the plan
+# -----------------------------
+class RepairStats:
+    """
+    Counts how each plan was obtained.
+
+    direct   - json.loads worked on the raw output
+    repaired - local cleanup fixed it (one LLM round-trip saved)
+    retried  - the format="json" retry was needed
+    failed   - nothing worked
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"direct": 0, "repaired": 0, "retried": 0, "failed": 0}
+
+    def add(self, path: str):
+        with self._lock:
+            self.counts[path] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        counts["round_trips_saved"] = counts["repaired"]
+        return counts
+
+
+repair_stats = RepairStats()
+
+
+# -----------------------------
+# 🧹 Local cleanup helpers
+# -----------------------------
+def strip_code_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        first_newline = text.find("\n")
+        text = text[first_newline + 1:] if first_newline != -1 else ""
+        end = text.rfind("```")
+        if end != -1:
+            text = text[:end]
+    return text.strip()
+
+
+def first_balanced_object(text: str):
+    """
+    Return the first complete {...} in text, ignoring braces inside strings.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def remove_trailing_commas(text: str) -> str:
+    out = []
+    in_string = False
+    escape = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            j = i + 1
+            while j < len(text) and text[j].isspace():
+                j += 1
+            if j < len(text) and text[j] in "}]":
+                i += 1
+                continue
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def validate_plan(data, goal: str = None):
+    """
+    Check the goal/steps shape and return a normalized plan, or None.
+    """
+    if not isinstance(data, dict):
+        return None
+
+    steps = data.get("steps")
+    if not isinstance(steps, list) or not steps:
+        return None
+
+    clean_steps = []
+    for step in steps:
+        if isinstance(step, (str, int, float)):
+            clean_steps.append(str(step).strip())
+        elif isinstance(step, dict):
+            text = step.get("description") or step.get("step") or step.get("action")
+            if not isinstance(text, str):
+                return None
+            clean_steps.append(text.strip())
+        else:
+            return None
+
+    plan = dict(data)
+    plan["steps"] = [s for s in clean_steps if s]
+    if not isinstance(plan.get("goal"), str) and goal is not None:
+        plan["goal"] = goal
+    return plan if plan["steps"] else None
+
+
+def _loads(text):
+    try:
+        # strict=False: raw newlines and tabs inside strings are fine
+        return json.loads(text, strict=False)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+# A JSON escape (kept as is) or a lone backslash, like the one in C:\Users
+BACKSLASH = re.compile(r'\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})?')
+
+
+def escape_backslashes(text: str) -> str:
+    return BACKSLASH.sub(lambda m: m.group() if len(m.group()) > 1 else "\\\\", text)
+
+
+def repair_plan(raw: str, goal: str = None):
+    """
+    Try progressively more aggressive local fixes.
+
+    Returns (plan, path) where path is "direct", "repaired" or None.
+    """
+    plan = validate_plan(_loads(raw.strip()), goal)
+    if plan is not None:
+        return plan, "direct"
+
+    body = first_balanced_object(strip_code_fences(raw))
+    if body is None:
+        return None, None
+
+    # Smart quotes are only swapped last: inside a string they are valid
+    # text, and turning them into '"' would break otherwise good JSON.
+    for candidate in (body, remove_trailing_commas(body),
+                      remove_trailing_commas(escape_backslashes(body)),
+                      remove_trailing_commas(escape_backslashes(body.translate(SMART_QUOTES)))):
+        plan = validate_plan(_loads(candidate), goal)
+        if plan is not None:
+            return plan, "repaired"
+
+    return None, None
+
+
+# -----------------------------
+# 🔁 Repair first, retry once
+# -----------------------------
+def parse_plan(raw: str, goal: str = None, retry=None):
+    """
+    Turn model output into a plan dict, or None.
+
+    retry, if given, is called with no arguments and must return fresh raw
+    text; it is used at most once and only after local repair failed.
+    """
+    plan, path = repair_plan(raw, goal)
+    if plan is not None:
+        repair_stats.add(path)
+        return plan
+
+    if retry is not None:
+        plan, _ = repair_plan(retry(), goal)
+        if plan is not None:
+            repair_stats.add("retried")
+            return plan
+
+    repair_stats.add("failed")
+    return None
+
+
+def repair_or_retry(raw: str, goal: str, model: str, prompt: str, client=None, label: str = None):
+    """
+    parse_plan() with Ollama's constrained JSON mode as the single retry.
+    The retry's tokens are accounted under label, like the first call.
+    """
+    client = client or get_client()
+
+    def retry():
+        # format="json" makes Ollama constrain sampling to valid JSON;
+        # temperature 0 keeps the retry short and predictable.
+        result = client.generate(model, prompt, format="json", options={"temperature": 0},
+                                 label=label)
+        return result["response"]
+
+    return parse_plan(raw, goal, retry=retry)
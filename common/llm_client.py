@@ -0,0 +1,460 @@
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.cache import ResponseCache, cache_key
+from common.singleflight import SingleFlight
+from common.usage import TokenUsage
+
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+
+class LLMError(Exception):
+    """Raised when Ollama could not be reached or kept failing after retries."""
+
+    def __init__(self, message: str, status: int = None, unavailable: bool = False):
+        super().__init__(message)
+        self.status = status  # HTTP status for 4xx answers, else None
+        # True when the server could not be reached or kept answering 5xx;
+        # False for e.g. a read timeout, where the server is up but busy
+        self.unavailable = unavailable
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def keep_alive_seconds(value) -> float:
+    """
+    Ollama's keep_alive in seconds: 300, "300", "5m", "1h30m", or a
+    negative value for "keep the model loaded forever" (returns inf).
+    """
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    elif re.fullmatch(r"-?\d+(?:\.\d+)?", str(value).strip()):
+        seconds = float(value)
+    else:
+        text = str(value).strip()
+        parts = _DURATION.findall(text.lstrip("-"))
+        if not parts:
+            raise ValueError(f"Not a keep_alive duration: {value!r}")
+        seconds = sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+        if text.startswith("-"):
+            seconds = -seconds
+    return float("inf") if seconds < 0 else seconds
+
+
+def _base_model(name: str) -> str:
+    # Ollama reports "mistral:latest"; agents ask for "mistral"
+    return name[:-len(":latest")] if name.endswith(":latest") else name
+
+
+def _normalize_base_url(url: str) -> str:
+    # OLLAMA_HOST is often set without a scheme, e.g. "127.0.0.1:11434"
+    url = url.strip().rstrip("/")
+    if "://" not in url:
+        url = "http://" + url
+    return url
+
+
+# -----------------------------
+# 📊 Per-call latency tracking
+# -----------------------------
+class CallStats:
+    """
+    Thread-safe counters plus a bounded window of recent latencies.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency_s = 0.0
+
+    def record(self, latency_s: float, ok: bool = True):
+        with self._lock:
+            self.calls += 1
+            self.total_latency_s += latency_s
+            self._latencies.append(latency_s)
+            if not ok:
+                self.errors += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            window = sorted(self._latencies)
+            calls, errors, retries = self.calls, self.errors, self.retries
+            total = self.total_latency_s
+
+        def pct(p):
+            if not window:
+                return 0.0
+            index = min(len(window) - 1, int(round(p / 100 * (len(window) - 1))))
+            return round(window[index] * 1000, 2)
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "retries": retries,
+            "avg_ms": round(total / calls * 1000, 2) if calls else 0.0,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "max_ms": round(window[-1] * 1000, 2) if window else 0.0,
+        }
+
+
+_model_calls = contextvars.ContextVar("model_calls", default=None)
+
+
+class ModelCalls:
+    """
+    Counts the generations started inside a `with` block that reached a
+    backend. Answers from the cache or from a coalesced call don't count.
+
+    The count follows the context, so work handed to another thread adds
+    to it when run with contextvars.copy_context().run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._token = None
+        self.count = 0
+
+    def __enter__(self):
+        self._token = _model_calls.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _model_calls.reset(self._token)
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+
+def _count_model_call():
+    calls = _model_calls.get()
+    if calls is not None:
+        calls.add()
+
+
+# -----------------------------
+# 🔌 Pooled Ollama HTTP client
+# -----------------------------
+class LLMClient:
+    """
+    Keep-alive HTTP client for the Ollama API.
+
+    One requests.Session with a bounded connection pool is shared by every
+    call, so repeated goals reuse the same TCP connection instead of opening
+    a new one each time. Connection errors and 5xx responses are retried
+    with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 300.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 8.0,
+        cache: ResponseCache = None,
+        default_options: dict = None,
+        coalesce: bool = True,
+    ):
+        self.base_url = _normalize_base_url(base_url)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = CallStats()
+        self.first_token_stats = CallStats()
+        self.usage = TokenUsage()
+        # Identical generations already in flight are shared, not repeated
+        self.flight = SingleFlight() if coalesce else None
+        self.cache = cache
+        # Sent with every generation unless the call overrides them (e.g. keep_alive)
+        self.default_options = dict(default_options or {})
+
+        self.session = requests.Session()
+        # pool_block=True makes callers wait for a free connection instead of
+        # opening throwaway sockets that end up in TIME_WAIT.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=0,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spread retries out so parallel callers don't sync up
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _send(self, path: str, payload: dict, stream: bool = False, timeout=None):
+        """
+        POST with retries. Returns (response, start_time) once a 2xx arrives.
+
+        With stream=True only the headers have been read at that point;
+        a stream that fails midway is not retried. timeout overrides the
+        client's read timeout for this call only.
+        """
+        url = self.base_url + path
+        last_error = None
+        timeouts = self.timeout if timeout is None else (self.timeout[0], timeout)
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats.record_retry()
+                time.sleep(self._backoff(attempt - 1))
+
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    url, json=payload, timeout=timeouts, stream=stream
+                )
+            except requests.ConnectionError as e:
+                # Also covers ConnectTimeout; read timeouts are not retried
+                # because the model may still be busy with the request.
+                self.stats.record(time.perf_counter() - start, ok=False)
+                last_error = e
+                continue
+            except requests.RequestException as e:
+                self.stats.record(time.perf_counter() - start, ok=False)
+                raise LLMError(f"Request to {url} failed: {e}") from e
+
+            if response.status_code >= 500:
+                self.stats.record(time.perf_counter() - start, ok=False)
+                last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+                response.close()
+                continue
+
+            if response.status_code >= 400:
+                self.stats.record(time.perf_counter() - start, ok=False)
+                message = f"HTTP {response.status_code} from {url}: {response.text[:200]}"
+                response.close()
+                raise LLMError(message, status=response.status_code)
+
+            return response, start
+
+        raise LLMError(
+            f"Giving up on {url} after {self.max_retries + 1} attempts: {last_error}",
+            unavailable=True,
+        )
+
+    def post(self, path: str, payload: dict, timeout=None) -> dict:
+        """
+        POST a JSON payload and return the decoded JSON body.
+        """
+        response, start = self._send(path, payload, timeout=timeout)
+        latency = time.perf_counter() - start
+        self.stats.record(latency)
+        result = response.json()
+        result["client_latency_ms"] = round(latency * 1000, 2)
+        return result
+
+    def generate(self, model: str, prompt: str, timeout=None, bypass_cache: bool = False,
+                 label: str = None, **options) -> dict:
+        """
+        Call /api/generate and return Ollama's JSON response.
+
+        Extra keyword arguments (e.g. format, options, keep_alive) are passed
+        straight through in the request body. Token counts and durations
+        are added to self.usage under label (default: the model name).
+
+        If the client has a cache, identical (model, prompt, options) calls
+        are answered from it and marked with "cached": True. bypass_cache
+        skips the lookup but still stores the fresh answer.
+
+        Identical calls that arrive while one is still being generated wait
+        for it and get a copy of its answer, marked "coalesced": True
+        (see self.flight.snapshot()).
+        """
+        key = None
+        if self.cache is not None:
+            start = time.perf_counter()
+            key = cache_key(model, prompt, options)
+            cached = None if bypass_cache else self.cache.get(key)
+            if cached is not None:
+                result = dict(cached)
+                result["cached"] = True
+                result["client_latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                self.usage.record(label or model, result, cached=True)
+                return result
+
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        payload.update(self.default_options)
+        payload.update(options)
+        if self.flight is None:
+            result = self.post("/api/generate", payload, timeout=timeout)
+        else:
+            flight_key = cache_key(model, prompt, {k: v for k, v in payload.items()
+                                                   if k not in ("model", "prompt")})
+            result, shared = self.flight.do(
+                flight_key, lambda: self.post("/api/generate", payload, timeout=timeout))
+            if shared:
+                result = dict(result)
+                result["coalesced"] = True
+                self.usage.record(label or model, result, coalesced=True)
+                return result
+        _count_model_call()
+        self.usage.record(label or model, result)
+
+        # A router may have answered with a fallback model: don't serve that
+        # answer for the model that was asked for
+        if key is not None and _base_model(result.get("model") or model) == _base_model(model):
+            # "context" is the model's token state: big and not needed for replay
+            self.cache.set(key, {
+                k: v for k, v in result.items() if k not in ("context", "client_latency_ms")
+            })
+        return result
+
+    def generate_stream(self, model: str, prompt: str, timeout=None, label: str = None,
+                        **options):
+        """
+        Call /api/generate with streaming on and yield each NDJSON chunk.
+
+        Every chunk is a dict like {"response": "<text>", "done": False};
+        the last one has "done": True plus Ollama's timing fields, which
+        are added to self.usage under label.
+        """
+        payload = {"model": model, "prompt": prompt}
+        payload.update(self.default_options)
+        payload.update(options)
+        payload["stream"] = True
+
+        response, start = self._send("/api/generate", payload, stream=True, timeout=timeout)
+        _count_model_call()
+        first = True
+        ok = False
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise LLMError(f"Ollama error: {chunk['error']}")
+                if first:
+                    self.first_token_stats.record(time.perf_counter() - start)
+                    first = False
+                if chunk.get("done"):
+                    self.usage.record(label or model, chunk)
+                yield chunk
+            ok = True
+        except requests.RequestException as e:
+            raise LLMError(f"Stream from {self.base_url} broke: {e}") from e
+        finally:
+            self.stats.record(time.perf_counter() - start, ok=ok)
+            response.close()
+
+    def warm_up(self, model: str, prompt: str = "", keep_alive=None, timeout=None) -> dict:
+        """
+        Load the model (and, with a prompt, evaluate it once) before real work.
+
+        Uses one generated token and skips the cache. With the prompt prefix
+        the agents use, Ollama keeps those tokens in its KV cache, so later
+        calls with the same prefix only evaluate the new part.
+        Returns {"latency_ms", "load_ms", "prompt_eval_count"}.
+        """
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        payload.update(self.default_options)
+        payload["options"] = {"num_predict": 1}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        result = self.post("/api/generate", payload, timeout=timeout)
+        self.usage.record("warm_up", result)
+        return {
+            "latency_ms": result["client_latency_ms"],
+            # Ollama reports durations in nanoseconds
+            "load_ms": round(result.get("load_duration", 0) / 1e6, 2),
+            "prompt_eval_count": result.get("prompt_eval_count", 0),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+# -----------------------------
+# 🌐 Process-wide shared client
+# -----------------------------
+_client = None
+_client_lock = threading.Lock()
+
+
+def client_from_env(**overrides) -> LLMClient:
+    """
+    Build a new client from environment settings.
+
+    Environment variables:
+        OLLAMA_HOST             base URL (default http://localhost:11434)
+        OLLAMA_POOL_SIZE        max pooled connections (default 10)
+        OLLAMA_CONNECT_TIMEOUT  seconds (default 3.05)
+        OLLAMA_READ_TIMEOUT     seconds (default 300)
+        OLLAMA_MAX_RETRIES      retries after the first attempt (default 3)
+        OLLAMA_CACHE_SIZE       in-memory cached responses (default 1024, 0 = off)
+        OLLAMA_CACHE_TTL        seconds a cached response stays fresh (default 3600)
+        OLLAMA_CACHE_PATH       SQLite file for a persistent cache tier (default none)
+        OLLAMA_COALESCE         share identical in-flight generations (default 1, 0 = off)
+        OLLAMA_KEEP_ALIVE       keep_alive sent with every generation, e.g. "30m" (default:
+                                Ollama's own, 5 minutes)
+
+    With OLLAMA_HOSTS or OLLAMA_BACKENDS set, the client is a
+    BackendRouter over several Ollama processes (see common/backends.py).
+
+    Keyword arguments override the environment, e.g. pool_size=32.
+    """
+    cache = None
+    cache_size = int(os.environ.get("OLLAMA_CACHE_SIZE", 1024))
+    if cache_size > 0:
+        cache = ResponseCache(
+            max_entries=cache_size,
+            ttl=float(os.environ.get("OLLAMA_CACHE_TTL", 3600)),
+            path=os.environ.get("OLLAMA_CACHE_PATH") or None,
+        )
+
+    keep_alive = os.environ.get("OLLAMA_KEEP_ALIVE")
+    settings = {
+        "base_url": os.environ.get("OLLAMA_HOST", DEFAULT_BASE_URL),
+        "pool_size": int(os.environ.get("OLLAMA_POOL_SIZE", 10)),
+        "connect_timeout": float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", 3.05)),
+        "read_timeout": float(os.environ.get("OLLAMA_READ_TIMEOUT", 300)),
+        "max_retries": int(os.environ.get("OLLAMA_MAX_RETRIES", 3)),
+        "cache": cache,
+        "default_options": {"keep_alive": keep_alive} if keep_alive else None,
+        "coalesce": os.environ.get("OLLAMA_COALESCE", "1") != "0",
+    }
+    settings.update(overrides)
+    if os.environ.get("OLLAMA_HOSTS") or os.environ.get("OLLAMA_BACKENDS"):
+        from common.backends import router_from_env
+        return router_from_env(**settings)
+    return LLMClient(**settings)
+
+
+def get_client() -> LLMClient:
+    """
+    Return the shared client, creating it from environment settings once.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = client_from_env()
+    return _client
@@ -0,0 +1,230 @@
+"""
+A tiny stand-in for the Ollama HTTP API.
+
+Useful for trying the agents (and the shared client) without a model:
+
+    python -m common.ollama_stub --port 11434 --latency 0.2
+
+It answers POST /api/generate with a deterministic JSON plan built from
+the "User Goal:" line of the prompt, streams it as NDJSON when asked to,
+and can inject 5xx failures or sloppy (fenced, trailing-comma) JSON.
+With --load-time it also imitates model loading: the first request (and
+the first after keep_alive runs out) waits that long and reports it as
+load_duration. With --token-rate it generates that many tokens per second,
+so longer answers take longer, as they do with a real model.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common.llm_client import keep_alive_seconds
+
+
+def _extract_goal(prompt: str) -> str:
+    marker = "User Goal:"
+    if marker in prompt:
+        return prompt.rsplit(marker, 1)[1].strip()
+    return prompt.strip()
+
+
+def fake_plan(goal: str) -> dict:
+    return {
+        "goal": goal,
+        "steps": [
+            f"Clarify what '{goal}' requires",
+            "List the resources needed",
+            "Carry out the work in small steps",
+            "Review the result",
+        ],
+    }
+
+
+class StubConfig:
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, model: str = "mistral",
+                 token_delay: float = 0.0, token_size: int = 8, messy: bool = False,
+                 load_time: float = 0.0, models=None, token_rate: float = 0.0):
+        self.latency = latency
+        self.token_rate = token_rate  # generated tokens per second; 0 = instant
+        self.models = list(models) if models else None  # None: answer for any model
+        self.load_time = load_time
+        self.loaded_until = {}  # model -> monotonic time it gets unloaded
+        self.messy = messy
+        self.token_delay = token_delay
+        self.token_size = token_size
+        self.fail_first = fail_first
+        self.model = model
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _load(self, model: str, keep_alive) -> int:
+        # Model load, Ollama style: only when the model is not in memory
+        config = self.server.config
+        with config.lock:
+            loaded = config.loaded_until.get(model, 0) > time.monotonic()
+        load_ns = 0
+        if not loaded and config.load_time:
+            time.sleep(config.load_time)
+            load_ns = int(config.load_time * 1e9)
+        with config.lock:
+            config.loaded_until[model] = time.monotonic() + keep_alive_seconds(keep_alive)
+        return load_ns
+
+    def _send_stream(self, model: str, text: str, usage: dict):
+        # NDJSON over chunked transfer encoding, like Ollama with "stream": true
+        config = self.server.config
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write_chunk(body: dict):
+            line = (json.dumps(body) + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+
+        start = time.perf_counter()
+        size = max(1, config.token_size)
+        # Each chunk of size characters is about size / 4 tokens
+        delay = config.token_delay + (size / 4 / config.token_rate if config.token_rate else 0.0)
+        for i in range(0, len(text), size):
+            if delay:
+                time.sleep(delay)
+            write_chunk({"model": model, "response": text[i:i + size], "done": False})
+
+        final = {"model": model, "response": "", "done": True,
+                 "eval_duration": int((time.perf_counter() - start) * 1e9)}
+        final.update(usage)
+        write_chunk(final)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path != "/api/tags":
+            self._send_json(404, {"error": f"stub: unknown path {self.path}"})
+            return
+        names = self.server.config.models or [self.server.config.model]
+        self._send_json(200, {"models": [{"name": f"{name}:latest", "model": f"{name}:latest"}
+                                         for name in names]})
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        with config.lock:
+            config.requests += 1
+            count = config.requests
+
+        if count <= config.fail_first:
+            self._send_json(503, {"error": "stub: injected failure"})
+            return
+
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": f"stub: unknown path {self.path}"})
+            return
+
+        model = payload.get("model", config.model)
+        if config.models and model.split(":")[0] not in config.models:
+            self._send_json(404, {"error": f"model '{model}' not found"})
+            return
+        prompt = payload.get("prompt", "")
+        load_ns = self._load(model, payload.get("keep_alive", "5m"))
+
+        if config.latency:
+            time.sleep(config.latency)
+
+        text = json.dumps(fake_plan(_extract_goal(prompt)))
+        if config.messy and payload.get("format") != "json":
+            # What small models often do: chatty fence plus a trailing comma
+            text = "Sure! Here is the plan:\n```json\n" + text[:-2] + ',]}\n```'
+
+        # Ollama-style counters; ~4 characters per token, latency counts as prompt eval
+        usage = {
+            "load_duration": load_ns,
+            "prompt_eval_count": -(-len(prompt) // 4),
+            "prompt_eval_duration": int(config.latency * 1e9),
+            "eval_count": -(-len(text) // 4),
+        }
+        if payload.get("stream", True):
+            self._send_stream(model, text, usage)
+            return
+
+        eval_s = usage["eval_count"] / config.token_rate if config.token_rate else 0.0
+        if eval_s:
+            time.sleep(eval_s)
+        body = {"model": model, "response": text, "done": True, "eval_duration": int(eval_s * 1e9)}
+        body.update(usage)
+        self._send_json(200, body)
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections when many clients start
+    # at once, and each dropped SYN costs a 1 s retransmit
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients that time out and hang up are expected; stay quiet.
+        pass
+
+
+def start_stub(host: str = "127.0.0.1", port: int = 0, **config):
+    """
+    Start the stub in a background thread.
+
+    Returns (server, base_url). Use port=0 to pick a free port and call
+    server.shutdown() when done.
+    """
+    server = _StubServer((host, port), _Handler)
+    server.config = StubConfig(**config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per generation")
+    parser.add_argument("--fail-first", type=int, default=0, help="answer the first N requests with 503")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--messy", action="store_true", help="wrap plans in fences with a trailing comma")
+    parser.add_argument("--load-time", type=float, default=0.0,
+                        help="seconds to 'load' the model when it is not in memory")
+    parser.add_argument("--models", help="comma-separated models to serve (default: any)")
+    parser.add_argument("--token-rate", type=float, default=0.0,
+                        help="generated tokens per second (default: instant)")
+    args = parser.parse_args()
+
+    server, url = start_stub(
+        args.host, args.port,
+        latency=args.latency, fail_first=args.fail_first, token_delay=args.token_delay,
+        messy=args.messy, load_time=args.load_time,
+        models=args.models.split(",") if args.models else None, token_rate=args.token_rate,
+    )
+    print(f"🧪 Ollama stub listening on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,145 @@
+import os
+import threading
+
+# Rough size of a token for English text with the usual BPE vocabularies.
+# Good enough for budgeting; Ollama's prompt_eval_count is the real number.
+CHARS_PER_TOKEN = 4
+
+DEFAULT_MAX_GOAL_TOKENS = int(os.environ.get("PROMPT_MAX_GOAL_TOKENS", 256))
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)  # ceiling division
+
+
+# -----------------------------
+# 🧱 Compiled prompt template
+# -----------------------------
+class PromptTemplate:
+    """
+    A prompt with one {goal} slot, rendered once at registration.
+
+    The static text before and after the goal is kept as two plain
+    strings, so render() is a concatenation instead of str.format() over
+    the whole template. The prefix never changes, which also lets Ollama
+    reuse its KV cache for it across calls.
+
+    Goals longer than max_goal_tokens (estimated) are cut at a word
+    boundary; truncated counts how often that happened.
+    """
+
+    def __init__(self, name: str, template: str, max_goal_tokens: int = DEFAULT_MAX_GOAL_TOKENS):
+        self.name = name
+        self.max_goal_tokens = max_goal_tokens
+        marker = "\x00goal\x00"
+        rendered = template.format(goal=marker)
+        if rendered.count(marker) != 1:
+            raise ValueError(f"Prompt {name!r} must contain exactly one {{goal}}")
+        self.prefix, self.suffix = rendered.split(marker)
+        self.static_tokens = estimate_tokens(self.prefix + self.suffix)
+        self.truncated = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_tokens(self) -> int:
+        """
+        Estimated size of the largest prompt this template can produce.
+        """
+        return self.static_tokens + self.max_goal_tokens
+
+    def fit_goal(self, goal: str) -> str:
+        limit = self.max_goal_tokens * CHARS_PER_TOKEN
+        if len(goal) <= limit:
+            return goal
+        with self._lock:
+            self.truncated += 1
+        cut = goal[:limit]
+        space = cut.rfind(" ")
+        return cut[:space] if space > limit // 2 else cut
+
+    def render(self, goal: str) -> str:
+        return self.prefix + self.fit_goal(goal) + self.suffix
+
+
+# -----------------------------
+# 📚 Registry
+# -----------------------------
+_registry = {}
+
+
+def register_prompt(name: str, template: str, max_goal_tokens: int = DEFAULT_MAX_GOAL_TOKENS):
+    """
+    Compile a template and make it available as get_prompt(name).
+    """
+    prompt = PromptTemplate(name, template, max_goal_tokens)
+    _registry[name] = prompt
+    return prompt
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    return _registry[name]
+
+
+def prompt_stats() -> dict:
+    """
+    {name: {"static_tokens", "max_goal_tokens", "max_tokens", "truncated"}}
+    """
+    return {
+        name: {
+            "static_tokens": prompt.static_tokens,
+            "max_goal_tokens": prompt.max_goal_tokens,
+            "max_tokens": prompt.max_tokens,
+            "truncated": prompt.truncated,
+        }
+        for name, prompt in _registry.items()
+    }
+
+
+# -----------------------------
+# 📝 Planning prompts
+# -----------------------------
+# Part 1 asks for a plain numbered list.
+PLANNING_LIST_PROMPT = """
+You are a planning AI agent.
+
+Your job:
+1. Take a user goal.
+2. Break it into clear, ordered, actionable steps.
+3. Return the steps as a numbered list only.
+
+User Goal:
+{goal}
+"""
+
+# Shared by the JSON planning agents in parts 2–4 and the batch planner,
+# so every entry point asks the model exactly the same question.
+PLANNING_JSON_PROMPT = """
+You are a planning AI agent.
+
+Your job:
+1. Take a user goal.
+2. Break it into clear, ordered, actionable steps.
+3. ALWAYS return valid JSON.
+4. Do not return anything except JSON.
+
+The JSON format must be:
+
+{{
+  "goal": "<original goal>",
+  "steps": [
+    "Step 1",
+    "Step 2",
+    "Step 3"
+  ]
+}}
+
+User Goal:
+{goal}
+"""
+
+register_prompt("planning_list", PLANNING_LIST_PROMPT)
+register_prompt("planning_json", PLANNING_JSON_PROMPT)
+
+
+def build_planning_prompt(goal: str) -> str:
+    return get_prompt("planning_json").render(goal)
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls.
+
+    The first caller for a key (the leader) runs the work; callers that
+    arrive with the same key while it is running (followers) wait for
+    the leader's result instead of starting the same work again. Once
+    the leader finishes, the key is forgotten: this is not a cache.
+
+    Threads and asyncio tasks share one table of concurrent.futures
+    Futures, so a thread and a coroutine asking for the same key also
+    share one call. If the leader fails, every follower gets the same
+    exception. A shared Future is marked running as soon as it exists,
+    so one waiter giving up (a timeout, a cancelled task) can never
+    cancel it for the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future of the leader's call
+        self.leaders = 0
+        self.followers = 0
+
+    def _join(self, key) -> tuple:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = self._calls[key] = Future()
+            future.set_running_or_notify_cancel()
+            self.leaders += 1
+            return future, True
+
+    def _settle(self, key, future: Future, result=None, error: BaseException = None):
+        # Forget the key first: later callers start a fresh call
+        with self._lock:
+            self._calls.pop(key, None)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, timeout: float = None) -> tuple:
+        """
+        Run fn() once per key at a time. Returns (result, shared), where
+        shared is True for followers. timeout only limits how long a
+        follower waits (concurrent.futures.TimeoutError).
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(timeout), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result, False
+
+    async def do_async(self, key, fn, executor=None) -> tuple:
+        """
+        Async version of do(). fn may be a coroutine function (run as its
+        own task on this loop) or a blocking function (run in executor).
+
+        The leader awaits the shared result like every follower, so
+        cancelling any caller, the leader included, only stops that
+        caller's wait: the call itself finishes for the others.
+        """
+        future, leader = self._join(key)
+        if leader:
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    work = asyncio.ensure_future(fn())
+                else:
+                    work = asyncio.get_running_loop().run_in_executor(executor, fn)
+            except BaseException as e:
+                self._settle(key, future, error=e)
+                raise
+            work.add_done_callback(lambda done: self._settle_from(key, future, done))
+        return await asyncio.shield(asyncio.wrap_future(future)), not leader
+
+    def _settle_from(self, key, future: Future, work: asyncio.Future):
+        if work.cancelled():
+            self._settle(key, future, error=asyncio.CancelledError())
+        elif work.exception() is not None:
+            self._settle(key, future, error=work.exception())
+        else:
+            self._settle(key, future, work.result())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            leaders, followers, in_flight = self.leaders, self.followers, len(self._calls)
+        calls = leaders + followers
+        return {
+            "calls": calls,
+            "executed": leaders,
+            "coalesced": followers,  # work saved
+            "in_flight": in_flight,
+            "coalesced_rate": round(followers / calls, 4) if calls else 0.0,
+        }
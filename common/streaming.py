@@ -0,0 +1,151 @@
+import json
+import time
+
+from common.llm_client import CallStats, get_client
+
+
+# Time from request start until the first complete plan step was parsed
+first_step_stats = CallStats()
+
+
+# -----------------------------
+# 🧩 Incremental plan parser
+# -----------------------------
+class IncrementalPlanParser:
+    """
+    Reads a {"goal": ..., "steps": [...]} object one text fragment at a time.
+
+    feed() returns the steps whose closing quote arrived in that fragment,
+    so callers can show them while the model is still generating. Text
+    before the first "{" (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.goal = None
+        self._stack = []          # open containers: "{" or "["
+        self._in_string = False
+        self._escape = False
+        self._buffer = []         # characters of the string being read
+        self._key = None          # last key seen at the top-level object
+        self._expect_key = False  # next string in the current object is a key
+        self.skipped = 0          # steps that could not be decoded
+
+    def _in_steps(self) -> bool:
+        return self._stack == ["{", "["] and self._key == "steps"
+
+    def _close_string(self, steps: list):
+        raw = "".join(self._buffer)
+        self._buffer = []
+        try:
+            # strict=False: models put raw newlines and tabs inside strings
+            text = json.loads('"' + raw + '"', strict=False)
+        except json.JSONDecodeError:
+            text = None  # e.g. an invalid escape like C:\Users
+
+        if text is None and self._in_steps():
+            # Don't show a step we can't decode; repair_or_retry sees the full output
+            self.skipped += 1
+            return
+        if text is None:
+            text = raw
+
+        if self._stack and self._stack[-1] == "{" and self._expect_key:
+            if len(self._stack) == 1:
+                self._key = text
+            self._expect_key = False
+        elif self._in_steps():
+            steps.append(text)
+        elif self._stack == ["{"] and self._key == "goal":
+            self.goal = text
+
+    def feed(self, fragment: str) -> list:
+        steps = []
+
+        for char in fragment:
+            if self._in_string:
+                if self._escape:
+                    self._buffer.append(char)
+                    self._escape = False
+                elif char == "\\":
+                    self._buffer.append(char)
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(steps)
+                else:
+                    self._buffer.append(char)
+                continue
+
+            if not self._stack and char != "{":
+                continue  # preamble before the object starts
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._stack.append("{")
+                self._expect_key = True
+            elif char == "[":
+                self._stack.append("[")
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+            elif char == ",":
+                if self._stack and self._stack[-1] == "{":
+                    self._expect_key = True
+
+        return steps
+
+
+# -----------------------------
+# 🌊 Streaming plan generation
+# -----------------------------
+class PlanStream:
+    """
+    Iterate over plan steps as Ollama streams them.
+
+        stream = PlanStream("mistral", prompt)
+        for step in stream:
+            print(step)
+        stream.raw      # full generated text
+        stream.metrics  # time_to_first_token_ms, time_to_first_step_ms, ...
+    """
+
+    def __init__(self, model: str, prompt: str, client=None, **options):
+        self.model = model
+        self.prompt = prompt
+        self.client = client or get_client()
+        self.options = options
+        self.raw = ""
+        self.metrics = {}
+
+    def __iter__(self):
+        parser = IncrementalPlanParser()
+        pieces = []
+        start = time.perf_counter()
+        first_token = None
+        first_step = None
+        step_count = 0
+
+        for chunk in self.client.generate_stream(self.model, self.prompt, **self.options):
+            text = chunk.get("response", "")
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            pieces.append(text)
+
+            for step in parser.feed(text):
+                if first_step is None:
+                    first_step = time.perf_counter() - start
+                    first_step_stats.record(first_step)
+                step_count += 1
+                yield step
+
+        self.raw = "".join(pieces)
+        self.metrics = {
+            "time_to_first_token_ms": round(first_token * 1000, 2) if first_token is not None else None,
+            "time_to_first_step_ms": round(first_step * 1000, 2) if first_step is not None else None,
+            "total_ms": round((time.perf_counter() - start) * 1000, 2),
+            "steps": step_count,
+            "skipped_steps": parser.skipped,
+        }
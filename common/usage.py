@@ -0,0 +1,78 @@
+import os
+import threading
+
+# Prompts above this many tokens are counted as over budget
+DEFAULT_PROMPT_BUDGET = int(os.environ.get("OLLAMA_PROMPT_BUDGET", 1024))
+
+# Ollama's counters and durations (nanoseconds) on a finished generation
+USAGE_FIELDS = ("prompt_eval_count", "eval_count", "prompt_eval_duration",
+                "eval_duration", "load_duration", "total_duration")
+
+
+class TokenUsage:
+    """
+    Per-label token accounting from Ollama's responses.
+
+    Every finished generation carries prompt_eval_count (prompt tokens
+    actually evaluated; a reused KV-cache prefix is not counted),
+    eval_count (generated tokens) and the matching durations. They are
+    summed per label, e.g. one label per agent, to show tokens, time and
+    tokens per second, and to catch prompts that have outgrown their
+    budget.
+    """
+
+    def __init__(self, prompt_budget: int = DEFAULT_PROMPT_BUDGET):
+        self.prompt_budget = prompt_budget
+        self._lock = threading.Lock()
+        self._labels = {}
+
+    def record(self, label: str, result: dict, cached: bool = False, coalesced: bool = False):
+        with self._lock:
+            entry = self._labels.get(label)
+            if entry is None:
+                entry = self._labels[label] = dict.fromkeys(
+                    ("calls", "cached", "coalesced", "over_budget", "max_prompt_tokens")
+                    + USAGE_FIELDS, 0)
+            # Answered without spending tokens: from the cache, or shared
+            # with an identical generation that was already running
+            if cached or coalesced:
+                entry["cached" if cached else "coalesced"] += 1
+                return
+            entry["calls"] += 1
+            for field in USAGE_FIELDS:
+                entry[field] += result.get(field) or 0
+            prompt_tokens = result.get("prompt_eval_count") or 0
+            entry["max_prompt_tokens"] = max(entry["max_prompt_tokens"], prompt_tokens)
+            if prompt_tokens > self.prompt_budget:
+                entry["over_budget"] += 1
+
+    def snapshot(self) -> dict:
+        """
+        {label: {"calls", "prompt_tokens", "completion_tokens", ...}}
+        """
+        with self._lock:
+            labels = {label: dict(entry) for label, entry in self._labels.items()}
+
+        report = {}
+        for label, e in labels.items():
+            calls = e["calls"]
+            report[label] = {
+                "calls": calls,
+                "cached": e["cached"],
+                "coalesced": e["coalesced"],
+                "prompt_tokens": e["prompt_eval_count"],
+                "completion_tokens": e["eval_count"],
+                "avg_prompt_tokens": round(e["prompt_eval_count"] / calls, 1) if calls else 0.0,
+                "avg_completion_tokens": round(e["eval_count"] / calls, 1) if calls else 0.0,
+                "max_prompt_tokens": e["max_prompt_tokens"],
+                "over_budget": e["over_budget"],
+                "prompt_tokens_per_s": _rate(e["prompt_eval_count"], e["prompt_eval_duration"]),
+                "completion_tokens_per_s": _rate(e["eval_count"], e["eval_duration"]),
+                "load_ms": round(e["load_duration"] / 1e6, 2),
+                "total_ms": round(e["total_duration"] / 1e6, 2),
+            }
+        return report
+
+
+def _rate(tokens: int, duration_ns: int) -> float:
+    return round(tokens / (duration_ns / 1e9), 1) if duration_ns else 0.0
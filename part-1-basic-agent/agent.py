@@ -1,31 +1,20 @@
-import requests
 import json
+import sys
+from pathlib import Path
+
+# Shared helpers live in ../common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.llm_client import get_client  # noqa: E402
+from common.prompts import get_prompt  # noqa: E402
 
 MODEL = "mistral"
+USAGE_LABEL = "part-1"  # token accounting: get_client().usage.snapshot()
 
 def planning_agent(goal):
-    prompt = f"""
-You are a planning AI agent.
-
-Your job:
-1. Take a user goal.
-2. Break it into clear, ordered, actionable steps.
-3. Return the steps as a numbered list only.
-
-User Goal:
-{goal}
-"""
-
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={
-            "model": MODEL,
-            "prompt": prompt,
-            "stream": False
-        }
-    )
+    # Compiled once in common/prompts.py; only the goal is filled in here
+    prompt = get_prompt("planning_list").render(goal)
 
-    result = response.json()
+    result = get_client().generate(MODEL, prompt, label=USAGE_LABEL)
     return result["response"]
 
 if __name__ == "__main__":
@@ -1,52 +1,41 @@
-import requests
 import json
+import sys
+from pathlib import Path
 
-MODEL = "mistral"
+# Shared helpers live in ../common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.json_repair import repair_or_retry  # noqa: E402
+from common.llm_client import get_client  # noqa: E402
+from common.prompts import build_planning_prompt  # noqa: E402
+from common.streaming import PlanStream  # noqa: E402
 
-def planning_agent(goal):
-    prompt = f"""
-You are a planning AI agent.
-
-Your job:
-1. Take a user goal.
-2. Break it into clear, ordered, actionable steps.
-3. ALWAYS return valid JSON.
-4. Do not return anything except JSON.
-
-The JSON format must be:
-
-{{
-  "goal": "<original goal>",
-  "steps": [
-    "Step 1",
-    "Step 2",
-    "Step 3"
-  ]
-}}
-
-User Goal:
-{goal}
-"""
-
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={
-            "model": MODEL,
-            "prompt": prompt,
-            "stream": False
-        }
-    )
-
-    result = response.json()
-    raw_output = result["response"].strip()
-
-    try:
-        structured_output = json.loads(raw_output)
-        return structured_output
-    except json.JSONDecodeError:
+MODEL = "mistral"
+USAGE_LABEL = "part-2"  # token accounting: get_client().usage.snapshot()
+
+def planning_agent(goal, on_step=None):
+    """
+    Ask the LLM for a JSON plan.
+
+    If on_step is given, the plan is streamed and on_step(index, step)
+    is called as soon as each step has been generated.
+    """
+    prompt = build_planning_prompt(goal)
+
+    if on_step:
+        stream = PlanStream(MODEL, prompt, label=USAGE_LABEL)
+        for index, step in enumerate(stream, start=1):
+            on_step(index, step)
+        raw_output = stream.raw.strip()
+    else:
+        result = get_client().generate(MODEL, prompt, label=USAGE_LABEL)
+        raw_output = result["response"].strip()
+
+    # Fix fences / trailing commas locally; ask again (JSON mode) only if that fails
+    structured_output = repair_or_retry(raw_output, goal, MODEL, prompt, label=USAGE_LABEL)
+    if structured_output is None:
         print("⚠ Model did not return valid JSON. Raw output:\n")
         print(raw_output)
-        return None
+    return structured_output
 
 
 if __name__ == "__main__":
@@ -1,11 +1,50 @@
-import requests
+import contextvars
 import json
 import re
-import shutil
-import subprocess
-import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+
+# Shared helpers live in ../common
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.calculator import CalculatorError, evaluate  # noqa: E402
+from common.json_repair import repair_or_retry  # noqa: E402
+from common.llm_client import get_client  # noqa: E402
+from common.prompts import build_planning_prompt  # noqa: E402
+from common.streaming import PlanStream  # noqa: E402
+from intent_router import get_router, route_clauses  # noqa: E402
+from sampler import get_sampler, parse_query, start_sampler  # noqa: E402
+from system_probes import PROBES  # noqa: E402
 
 MODEL = "mistral"
+USAGE_LABEL = "part-4"  # token accounting: get_client().usage.snapshot()
+
+# Below this (e.g. a one-word tie) the goal is treated as a planning task
+MIN_CONFIDENCE = 0.3
+
+SYSTEM_MESSAGES = {
+    "disk_usage": "🔧 Checking disk usage...\n",
+    "memory_info": "🔧 Checking memory info...\n",
+    "os_info": "🔧 Getting OS info...\n",
+    "cpu_load": "🔧 Checking CPU load...\n",
+}
+
+HISTORY_INTENTS = {"metric_trend", "metric_percentiles"}
+
+# Compound goals: tool calls run side by side, each with its own timeout (seconds)
+TOOL_WORKERS = 8
+TOOL_TIMEOUTS = {
+    "system_tool": 10.0,
+    "history_tool": 5.0,
+    "calculator_tool": 5.0,
+    "planning_agent": 300.0,
+}
+
+_tool_pool = None
+_tool_pool_lock = threading.Lock()
 
 
 # -----------------------------
@@ -14,15 +53,13 @@ MODEL = "mistral"
 def calculator_tool(expression: str):
     """
     Safely evaluate basic math expressions.
+
+    Uses the shared AST calculator (no eval): only arithmetic is allowed,
+    and huge numbers or runaway expressions fail fast instead of hanging.
     """
     try:
-        # Allow only safe characters (digits, operators, parentheses, spaces)
-        if not re.match(r'^[0-9+\-*/().\s]+$', expression):
-            return "Invalid characters in expression."
-
-        result = eval(expression)
-        return result
-    except Exception as e:
+        return evaluate(expression)
+    except CalculatorError as e:
         return f"Error calculating expression: {str(e)}"
 
 
@@ -31,108 +68,133 @@ def calculator_tool(expression: str):
 # -----------------------------
 def system_tool(command_type: str):
     """
-    Execute safe system commands.
-    Supported: disk_usage, memory_info, os_info
+    Read system information.
+    Supported: disk_usage, memory_info, os_info, cpu_load
+
+    Probes read /proc directly (no subprocess on Linux); static OS info is
+    cached for the process and live metrics for about a second.
     """
+    # Outside the try, so a KeyError inside a probe is not an "unknown command"
+    read = PROBES.get(command_type)
+    if read is None:
+        return f"Unknown command: {command_type}"
     try:
-        if command_type == "disk_usage":
-            # Get disk usage statistics
-            total, used, free = shutil.disk_usage("/")
-            return {
-                "total_gb": round(total / (1024**3), 2),
-                "used_gb": round(used / (1024**3), 2),
-                "free_gb": round(free / (1024**3), 2),
-                "percent_used": round((used / total) * 100, 2)
-            }
-
-        elif command_type == "memory_info":
-            # Get memory info using platform-specific commands
-            system = platform.system()
-            if system == "Windows":
-                result = subprocess.run(
-                    ["wmic", "OS", "get", "TotalVisibleMemorySize,FreePhysicalMemory", "/Value"],
-                    capture_output=True, text=True, timeout=10
-                )
-                return {"memory_info": result.stdout.strip()}
-            else:
-                result = subprocess.run(
-                    ["free", "-h"],
-                    capture_output=True, text=True, timeout=10
-                )
-                return {"memory_info": result.stdout.strip()}
-
-        elif command_type == "os_info":
-            return {
-                "system": platform.system(),
-                "release": platform.release(),
-                "version": platform.version(),
-                "machine": platform.machine(),
-                "processor": platform.processor()
-            }
-
-        else:
-            return f"Unknown command: {command_type}"
-
+        return read()
     except Exception as e:
         return f"Error executing system command: {str(e)}"
 
 
+# -----------------------------
+# 📈 TOOL: Metric History
+# -----------------------------
+def history_tool(command_type: str, goal: str):
+    """
+    Answer trend / percentile questions from the background sampler.
+    Supported: trend, percentiles
+
+    Reads only the sampler's ring buffer; nothing is probed again.
+    """
+    sampler = get_sampler()
+    if sampler is None:
+        return "History is off. Start the agent with --sample to record metrics."
+
+    query = parse_query(goal)
+    if command_type == "trend":
+        results = [sampler.trend(metric, query["seconds"]) for metric in query["metrics"]]
+    elif command_type == "percentiles":
+        results = [sampler.percentiles(metric, query["seconds"], query["percentiles"])
+                   for metric in query["metrics"]]
+    else:
+        return f"Unknown command: {command_type}"
+    return {
+        "window_s": query["seconds"],
+        "interval_s": sampler.interval,
+        "metrics": results,
+    }
+
+
+# -----------------------------
+# 🧭 Tool Selection
+# -----------------------------
+def select_tool(intent) -> tuple:
+    """
+    (tool, command) for a routed intent; ("planning_agent", None) if no
+    tool is confident enough.
+    """
+    # Trend / percentile questions about a system metric
+    routes = get_router().routes
+    ranked = [name for name, _ in intent.ranked]
+    history = next((name for name in ranked if name in HISTORY_INTENTS), None)
+    if (history and intent.action in ("system_tool", "history_tool")
+            and any(routes[name].action == "system_tool" for name in ranked)):
+        return "history_tool", routes[history].command
+
+    if intent.confidence >= MIN_CONFIDENCE and intent.action in ("system_tool", "calculator_tool"):
+        return intent.action, intent.command
+    return "planning_agent", None
+
+
+def extract_expression(text: str) -> str:
+    # Keep every character the math route accepts (spaces too, so "2 ** 10"
+    # stays an operator and stray words can't glue numbers together)
+    return "".join(re.findall(r'[0-9+\-*/%^(). ]+', text)).strip()
+
+
 # -----------------------------
 # 🤖 AGENT: Decide Action
 # -----------------------------
-def system_agent(goal: str):
+def system_agent(goal: str, on_step=None):
     """
     Agent decides whether to:
     - Use calculator tool
     - Use system tool
+    - Answer trend / percentile questions from the sampler
     - Or generate planning steps
+
+    The goal is routed in one pass by intent_router (whole words only,
+    ranked with a confidence score). A compound goal ("check disk and
+    memory and compute 1024*8") runs all its tool calls at once; a single
+    tool call reuses its clause's routing instead of routing again.
+    on_step is passed to planning_agent to stream plan steps.
     """
-    goal_lower = goal.lower()
+    calls = plan_tool_calls(goal)
+    if len(calls) > 1:
+        return run_tool_calls(goal, calls, on_step=on_step)
+
+    tool, command, intent = "planning_agent", None, None
+    if calls:
+        tool, command, intent = calls[0]["tool"], calls[0]["command"], calls[0]["intent"]
+
+    if tool == "history_tool":
+        print("\n🧠 Agent detected a question about metric history.")
+        print(f"📈 Reading {command} from the sampler...\n")
+        return {
+            "goal": goal,
+            "action": "history_tool",
+            "command": command,
+            "confidence": intent.confidence,
+            "result": history_tool(command, goal)
+        }
 
     # Detect system-related queries
-    system_keywords = ["disk", "memory", "cpu", "system", "os", "platform", "storage", "space"]
-    if any(keyword in goal_lower for keyword in system_keywords):
+    if tool == "system_tool":
         print("\n🧠 Agent detected a system query.")
-
-        # Determine which system command to run
-        if "disk" in goal_lower or "storage" in goal_lower or "space" in goal_lower:
-            print("🔧 Checking disk usage...\n")
-            result = system_tool("disk_usage")
-            return {
-                "goal": goal,
-                "action": "system_tool",
-                "command": "disk_usage",
-                "result": result
-            }
-
-        elif "memory" in goal_lower or "ram" in goal_lower:
-            print("🔧 Checking memory info...\n")
-            result = system_tool("memory_info")
-            return {
-                "goal": goal,
-                "action": "system_tool",
-                "command": "memory_info",
-                "result": result
-            }
-
-        elif "os" in goal_lower or "platform" in goal_lower or "system info" in goal_lower:
-            print("🔧 Getting OS info...\n")
-            result = system_tool("os_info")
-            return {
-                "goal": goal,
-                "action": "system_tool",
-                "command": "os_info",
-                "result": result
-            }
+        print(SYSTEM_MESSAGES[command])
+        result = system_tool(command)
+        return {
+            "goal": goal,
+            "action": "system_tool",
+            "command": command,
+            "confidence": intent.confidence,
+            "result": result
+        }
 
     # Detect math problems
-    if re.search(r'[0-9]', goal) and re.search(r'[\+\-\*/]', goal):
+    if tool == "calculator_tool":
         print("\n🧠 Agent detected a math problem.")
         print("🔧 Extracting math expression...\n")
 
-        # Extract valid math characters only
-        expression = re.findall(r'[0-9+\-*/().]+', goal)
-        expression = "".join(expression)
+        expression = command
 
         print(f"📌 Clean Expression: {expression}")
         print("🔧 Calling calculator tool...\n")
@@ -143,6 +205,7 @@ def system_agent(goal: str):
             "goal": goal,
             "action": "calculator_tool",
             "expression": expression,
+            "confidence": intent.confidence,
             "result": result
         }
 
@@ -150,71 +213,173 @@ def system_agent(goal: str):
     print("\n🧠 Agent detected a planning task.")
     print("📝 Generating structured plan...\n")
 
-    return planning_agent(goal)
+    return planning_agent(goal, on_step=on_step)
 
 
 # -----------------------------
-# 🧠 PLANNING AGENT (Fallback)
+# 🧵 Compound Goals: tools in parallel
 # -----------------------------
-def planning_agent(goal):
-    prompt = f"""
-You are a planning AI agent.
-
-Your job:
-1. Take a user goal.
-2. Break it into clear, ordered, actionable steps.
-3. ALWAYS return valid JSON.
-4. Do not return anything except JSON.
-
-The JSON format must be:
-
-{{
-  "goal": "<original goal>",
-  "steps": [
-    "Step 1",
-    "Step 2",
-    "Step 3"
-  ]
-}}
-
-User Goal:
-{goal}
-"""
-
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={
-            "model": MODEL,
-            "prompt": prompt,
-            "stream": False
-        }
-    )
-
-    result = response.json()
-    raw_output = result["response"].strip()
+def plan_tool_calls(goal: str) -> list:
+    """
+    Split a goal into independent tool calls, one per distinct tool input.
 
+    Each clause ("check disk", "memory", "compute 1024*8") is routed on
+    its own. Clauses that need no tool are left to a single planning
+    call, added only if some clause is clearly a planning request.
+    Each call keeps the Intent it was routed with.
+    """
+    calls = []
+    seen = set()
+    leftover = []
+    wants_plan = False
+    for clause, intent in route_clauses(goal):
+        tool, command = select_tool(intent)
+        if tool == "planning_agent":
+            leftover.append(clause)
+            wants_plan = wants_plan or (intent.action == "planning_agent"
+                                        and intent.confidence >= MIN_CONFIDENCE)
+            continue
+        if tool == "calculator_tool":
+            command = extract_expression(clause)
+        key = (tool, command)
+        if key not in seen:
+            seen.add(key)
+            calls.append({"tool": tool, "command": command, "input": clause, "intent": intent})
+    if wants_plan:
+        calls.append({"tool": "planning_agent", "command": None, "input": " and ".join(leftover),
+                      "intent": None})
+    return calls
+
+
+def _run_call(call: dict, on_step=None):
+    tool = call["tool"]
+    if tool == "system_tool":
+        return system_tool(call["command"])
+    if tool == "history_tool":
+        return history_tool(call["command"], call["input"])
+    if tool == "calculator_tool":
+        return calculator_tool(call["command"])
+    return planning_agent(call["input"], on_step=on_step)
+
+
+def _timed(call: dict, on_step=None) -> tuple:
+    # (result, seconds, error): a failed call still reports its own time
+    start = time.perf_counter()
     try:
-        structured_output = json.loads(raw_output)
-        return structured_output
-    except json.JSONDecodeError:
+        result, error = _run_call(call, on_step), None
+    except Exception as e:
+        result, error = None, e
+    return result, time.perf_counter() - start, error
+
+
+def get_tool_pool() -> ThreadPoolExecutor:
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+        return _tool_pool
+
+
+def run_tool_calls(goal: str, calls: list, on_step=None) -> dict:
+    """
+    Run independent tool calls together and merge their results.
+
+    Local tools and the LLM planning call share one thread pool, so a
+    plan is generated while the probes and the calculator run. Each call
+    has its own timeout (TOOL_TIMEOUTS); a call that fails or times out
+    is reported as such without losing the others.
+    """
+    print(f"\n🧠 Agent detected a compound goal ({len(calls)} tool calls).")
+    for call in calls:
+        print(f"🔧 {call['tool']}: {call['command'] or call['input']}")
+    print()
+
+    pool = get_tool_pool()
+    start = time.perf_counter()
+    # Each call runs in a copy of this context, so it counts towards the
+    # caller's ModelCalls (see common/llm_client.py)
+    futures = [pool.submit(contextvars.copy_context().run, _timed, call, on_step)
+               for call in calls]
+
+    results = []
+    for call, future in zip(calls, futures):
+        timeout = TOOL_TIMEOUTS[call["tool"]]
+        entry = {"tool": call["tool"], "command": call["command"], "input": call["input"]}
+        try:
+            remaining = max(0.0, start + timeout - time.perf_counter())
+            result, elapsed, error = future.result(timeout=remaining)
+        except FutureTimeout:
+            entry["status"] = "timeout"
+            entry["result"] = f"No result within {timeout:g}s"
+            elapsed = timeout
+        else:
+            entry["status"] = "error" if error else "ok"
+            entry["result"] = str(error) if error else result
+        entry["elapsed_ms"] = round(elapsed * 1000, 2)
+        results.append(entry)
+
+    return {
+        "goal": goal,
+        "action": "multi_tool",
+        "calls": results,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+# -----------------------------
+# 🧠 PLANNING AGENT (Fallback)
+# -----------------------------
+def planning_agent(goal, on_step=None):
+    """
+    Ask the LLM for a JSON plan.
+
+    If on_step is given, the plan is streamed and on_step(index, step)
+    is called as soon as each step has been generated.
+    """
+    prompt = build_planning_prompt(goal)
+
+    if on_step:
+        stream = PlanStream(MODEL, prompt, label=USAGE_LABEL)
+        for index, step in enumerate(stream, start=1):
+            on_step(index, step)
+        raw_output = stream.raw.strip()
+    else:
+        result = get_client().generate(MODEL, prompt, label=USAGE_LABEL)
+        raw_output = result["response"].strip()
+
+    # Fix fences / trailing commas locally; ask again (JSON mode) only if that fails
+    structured_output = repair_or_retry(raw_output, goal, MODEL, prompt, label=USAGE_LABEL)
+    if structured_output is None:
         print("⚠ Model did not return valid JSON. Raw output:\n")
         print(raw_output)
-        return None
+    return structured_output
 
 
 # -----------------------------
 # 🚀 MAIN
 # -----------------------------
+def print_step(index, step):
+    print(f"  {index}. {step}", flush=True)
+
+
 if __name__ == "__main__":
     print("=" * 50)
     print("🤖 System Agent - Type 'exit' to quit")
     print("=" * 50)
     print("\nI can help you with:")
     print("  • Math calculations (e.g., 'What is 25 * 4?')")
-    print("  • System info (e.g., 'Check disk usage')")
+    print("  • System info (e.g., 'Check disk usage', 'Show CPU load')")
+    print("  • Metric history (e.g., 'How fast is my disk filling up?', 'p95 cpu') with --sample")
     print("  • Planning tasks (e.g., 'Plan a server setup')")
     print()
 
+    # --sample or --sample=SECONDS records metrics in the background
+    sample_arg = next((arg for arg in sys.argv[1:] if arg.startswith("--sample")), None)
+    if sample_arg:
+        sampler = start_sampler(float(sample_arg.partition("=")[2] or 5))
+        print(f"📈 Sampling metrics every {sampler.interval:g}s "
+              f"(keeping the last {sampler.buffer.capacity} samples)")
+
     while True:
         goal = input("\nEnter your goal: ")
 
@@ -225,7 +390,7 @@ if __name__ == "__main__":
         if not goal.strip():
             continue
 
-        response = system_agent(goal)
+        response = system_agent(goal, on_step=print_step)
 
         print("\n=== AGENT OUTPUT ===\n")
         print(json.dumps(response, indent=2))
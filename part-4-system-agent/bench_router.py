@@ -0,0 +1,159 @@
+import argparse
+import itertools
+import re
+import time
+
+from agent import plan_tool_calls
+
+
+# -----------------------------
+# 📚 Sample goals (labeled)
+# -----------------------------
+# Written the way people ask, not generated from the router's phrases, so
+# the router can (and does) get some wrong. A label is what system_agent
+# should run: a probe command, "math", "planning", or several joined by "+".
+GOALS = [
+    ("disk_usage", "Check disk usage"),
+    ("disk_usage", "How much storage is left on this machine?"),
+    ("disk_usage", "am I running out of room on my drive"),
+    ("disk_usage", "Is the SSD nearly full?"),
+    ("disk_usage", "show me free space"),
+    ("disk_usage", "how many GB are left on /"),
+    ("disk_usage", "whats eating my hard drive"),
+    ("disk_usage", "Disk space report please"),
+    ("memory_info", "How much memory is free?"),
+    ("memory_info", "Show RAM usage"),
+    ("memory_info", "is the box swapping"),
+    ("memory_info", "How much RAM do I have left"),
+    ("memory_info", "why is my computer out of memory"),
+    ("memory_info", "memory check"),
+    ("cpu_load", "Show CPU load"),
+    ("cpu_load", "what's the load average right now"),
+    ("cpu_load", "Is the processor busy?"),
+    ("cpu_load", "cpu usage"),
+    ("cpu_load", "how hard is the CPU working"),
+    ("cpu_load", "check system load"),
+    ("os_info", "What OS am I running?"),
+    ("os_info", "Which kernel version is this"),
+    ("os_info", "what platform is this server on"),
+    ("os_info", "Tell me about the operating system"),
+    ("os_info", "What CPU architecture does this machine use"),
+    ("os_info", "which linux distro is installed"),
+    ("math", "What is 25 * 4?"),
+    ("math", "Calculate (120 + 80) / 2"),
+    ("math", "1024*8"),
+    ("math", "how much is 17 - 5"),
+    ("math", "What is 2**10?"),
+    ("math", "compute 3.5 * 12"),
+    ("math", "what's 15% of 200"),
+    ("math", "100 / 7"),
+    ("math", "what is 10 % 3"),
+    ("math", "evaluate 2^8"),
+    ("math", "multiply 12 by 9"),
+    ("planning", "Plan a server setup"),
+    ("planning", "Plan a 3-day trip to Rome"),
+    ("planning", "How do I prepare for a job interview?"),
+    ("planning", "Write a roadmap for learning Python"),
+    ("planning", "Give me steps to host a dinner party"),
+    ("planning", "Reduce the cost of most cloud servers"),
+    ("planning", "Draft a strategy for cost savings across most teams"),
+    ("planning", "Organize a study schedule for my exams"),
+    ("planning", "Migrate 200 users to the new billing system"),
+    ("planning", "help me move house next month"),
+    ("planning", "set up a CI pipeline for a small team"),
+    ("planning", "what should I pack for a week of hiking"),
+    ("planning", "Checklist for launching a website"),
+    ("planning", "teach my kid to ride a bike"),
+    ("planning", "Prepare a 2-3 hour workshop on Git"),
+    ("planning", "Plan the rollout of the OS upgrade"),
+    ("planning", "Write a guide to disk encryption for the team"),
+    ("planning", "Organize a 5-10 person offsite"),
+    ("trend", "How fast is my disk filling up?"),
+    ("trend", "memory trend over the last hour"),
+    ("percentiles", "p95 cpu load"),
+    ("percentiles", "median memory usage today"),
+    ("disk_usage+memory_info", "Check disk usage and memory"),
+    ("cpu_load+math", "Show CPU load and compute 64 * 8"),
+    ("memory_info+planning", "Check memory, then plan a cleanup of 12 servers"),
+    ("disk_usage+memory_info+math", "check disk and memory and compute 1024*8"),
+    ("os_info+cpu_load", "What OS is this, and how busy is the CPU"),
+    ("disk_usage+planning", "check free space then plan a backup strategy"),
+    ("memory_info+cpu_load", "ram usage; cpu load"),
+    ("disk_usage+os_info", "disk space as well as kernel version"),
+]
+
+
+def routed_label(calls: list) -> str:
+    # What system_agent would run, in the corpus' label format
+    if not calls:
+        return "planning"
+    labels = []
+    for call in calls:
+        if call["tool"] == "calculator_tool":
+            labels.append("math")
+        elif call["tool"] == "planning_agent":
+            labels.append("planning")
+        else:
+            labels.append(call["command"])
+    return "+".join(labels)
+
+
+def system_agent_route(goal: str) -> str:
+    # system_agent's whole routing path: clauses, routes, tool selection
+    return routed_label(plan_tool_calls(goal))
+
+
+# -----------------------------
+# 🐢 The old keyword chain (for comparison)
+# -----------------------------
+def legacy_route(goal: str) -> str:
+    goal_lower = goal.lower()
+    system_keywords = ["disk", "memory", "cpu", "system", "os", "platform", "storage", "space"]
+    if any(keyword in goal_lower for keyword in system_keywords):
+        if "disk" in goal_lower or "storage" in goal_lower or "space" in goal_lower:
+            return "disk_usage"
+        elif "memory" in goal_lower or "ram" in goal_lower:
+            return "memory_info"
+        elif "os" in goal_lower or "platform" in goal_lower or "system info" in goal_lower:
+            return "os_info"
+    if re.search(r'[0-9]', goal) and re.search(r'[\+\-\*/]', goal):
+        return "math"
+    return "planning"
+
+
+# -----------------------------
+# ⏱️ Benchmark
+# -----------------------------
+def bench(name: str, route_fn, size: int, repeat: int):
+    goals = [goal for _, goal in itertools.islice(itertools.cycle(GOALS), size)]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for goal in goals:
+            route_fn(goal)
+        best = min(best, time.perf_counter() - start)
+
+    misses = [(label, goal, route_fn(goal)) for label, goal in GOALS if route_fn(goal) != label]
+    print(f"{name:<10} {len(goals) / best:>12,.0f} goals/s "
+          f"{best / len(goals) * 1e6:>8.2f} µs/goal   accuracy {1 - len(misses) / len(GOALS):.1%}")
+    return misses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Routing throughput on sample goals")
+    parser.add_argument("-n", "--goals", type=int, default=100000, help="goals routed per run")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args(argv)
+
+    print(f"📊 Routing {args.goals:,} goals from {len(GOALS)} samples (best of {args.repeat})\n")
+    bench("legacy", legacy_route, args.goals, args.repeat)
+    misses = bench("router", system_agent_route, args.goals, args.repeat)
+
+    if misses:
+        print("\nRouter misses:")
+    for label, goal, routed in misses:
+        print(f"  {goal!r}: {routed} (expected {label})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import re
+from collections import namedtuple
+
+
+# -----------------------------
+# 🗺️ Routing table
+# -----------------------------
+# Each route lists whole-word phrases (multi-word phrases are more specific
+# and count double) and/or a raw regex, tried where a word starts. Order
+# matters only for ties.
+Route = namedtuple("Route", "intent action command phrases pattern")
+
+ROUTES = [
+    # History questions ("how fast is disk filling", "p95 cpu") - the metric
+    # itself is read from the goal by sampler.parse_query
+    Route("metric_trend", "history_tool", "trend",
+          ["trend", "trends", "filling", "filling up", "how fast", "over time"], None),
+    Route("metric_percentiles", "history_tool", "percentiles",
+          ["percentile", "percentiles", "median", "p50", "p90", "p95", "p99"], None),
+    Route("disk_usage", "system_tool", "disk_usage",
+          ["disk", "disks", "disk usage", "disk space", "storage", "free space",
+           "space left", "drive space", "hard drive", "ssd"], None),
+    Route("memory_info", "system_tool", "memory_info",
+          ["memory", "ram", "swap", "memory usage", "free memory"], None),
+    Route("cpu_load", "system_tool", "cpu_load",
+          ["load", "load average", "cpu load", "cpu usage", "cpu utilization",
+           "cpu utilisation"], None),
+    Route("os_info", "system_tool", "os_info",
+          ["os", "operating system", "platform", "system info", "system information",
+           "kernel", "os version", "cpu", "processor", "architecture"], None),
+    # "25 * 4", "(3 + 5) / 2", "2 ** 10", "10 % 3", "10 - 4" - but not "2-3 day trip"
+    Route("math", "calculator_tool", None,
+          ["calculate", "compute", "evaluate"],
+          r"[\d.]*\d(?:\s*(?:\*\*|[+*/%^])\s*[\d(.]|\s+-\s+[\d(.]|-\d(?=\s*(?:[-+*/)=?]|$)))"),
+    Route("planning", "planning_agent", None,
+          ["plan", "steps", "how to", "how do i", "roadmap", "strategy", "schedule",
+           "checklist", "guide", "set up", "setup"], None),
+]
+
+DEFAULT_INTENT = "planning"
+PATTERN_WEIGHT = 2   # an arithmetic expression is strong evidence
+STRONG_SCORE = 2     # score at which a lone intent gets full confidence
+
+Intent = namedtuple("Intent", "intent action command confidence ranked")
+
+# Where a compound goal splits into clauses: "check disk, memory and compute 2*8"
+CLAUSE_SPLIT = re.compile(r",\s+|;\s*|\s+(?:and|then|also|as well as)\s+", re.IGNORECASE)
+# A goal without any of these has one clause and is not split at all
+CLAUSE_HINTS = (",", ";", "and", "then", "also", "as well as")
+
+
+# -----------------------------
+# ⚙️ Compiled router
+# -----------------------------
+class IntentRouter:
+    """
+    The routing table compiled into one regex.
+
+    All phrases form a character trie (shared prefixes are read once and
+    the longest phrase wins) in the group "phrase"; each route pattern is
+    a named group of its own. A hit starts at a non-word character (the
+    goal gets a leading space), so the regex engine jumps from word start
+    to word start, and "os" never matches inside "cost" or "most". One
+    finditer() over the lowercased goal scores every route: m.lastgroup
+    names the kind of hit, and a phrase hit is one dict lookup.
+    """
+
+    def __init__(self, routes=ROUTES, default: str = DEFAULT_INTENT):
+        self.routes = {route.intent: route for route in routes}
+        self.default = default
+
+        # phrase -> (intent, weight); multi-word phrases are more specific
+        self._phrases = {}
+        trie = {}
+        for route in routes:
+            for phrase in route.phrases:
+                phrase = " ".join(phrase.lower().split())
+                self._phrases[phrase] = (route.intent, 2 if " " in phrase else 1)
+                node = trie
+                for char in phrase:
+                    node = node.setdefault(char, {})
+                node[""] = {}
+
+        # pattern group name -> (intent, weight)
+        self._patterns = {}
+        alternatives = [rf"(?P<phrase>{_trie_regex(trie)})\b"]
+        for route in routes:
+            if route.pattern:
+                name = f"pattern{len(self._patterns)}"
+                self._patterns[name] = (route.intent, PATTERN_WEIGHT)
+                alternatives.append(f"(?P<{name}>{route.pattern})")
+        self._regex = re.compile(r"\W(?:" + "|".join(alternatives) + ")")
+
+    def route(self, goal: str) -> Intent:
+        """
+        Best intent for a goal, with a 0..1 confidence and the full ranking.
+        """
+        phrases = self._phrases
+        scores = {}
+        for match in self._regex.finditer(" " + goal.lower()):
+            kind = match.lastgroup
+            if kind == "phrase":
+                hit = match.group(kind)
+                # Unusual spacing ("disk   usage") is the only way to miss
+                found = phrases.get(hit) or phrases[" ".join(hit.split())]
+            else:
+                found = self._patterns[kind]
+            scores[found[0]] = scores.get(found[0], 0) + found[1]
+
+        if not scores:
+            route = self.routes[self.default]
+            return Intent(route.intent, route.action, route.command, 0.0, [])
+
+        if len(scores) == 1:
+            ranked = list(scores.items())
+        else:
+            # Ties keep the order in which intents were first seen in the goal
+            ranked = sorted(scores.items(), key=lambda item: -item[1])
+        best, best_score = ranked[0]
+        # Share of the evidence, damped when there is little of it
+        confidence = best_score / sum(scores.values()) * min(1.0, best_score / STRONG_SCORE)
+        route = self.routes[best]
+        return Intent(route.intent, route.action, route.command, round(confidence, 3), ranked)
+
+    def route_clauses(self, goal: str) -> list:
+        """
+        [(clause, Intent)] for each clause of a compound goal. Most goals
+        have one clause; those are routed once, without splitting.
+        """
+        lowered = goal.lower()
+        if not any(hint in lowered for hint in CLAUSE_HINTS):
+            goal = goal.strip()
+            return [(goal, self.route(goal))] if goal else []
+        clauses = [clause.strip() for clause in CLAUSE_SPLIT.split(goal)]
+        return [(clause, self.route(clause)) for clause in clauses if clause]
+
+
+def _trie_regex(node: dict) -> str:
+    # Longer continuations first; a phrase that can end here makes them optional
+    branches = [(r"\s+" if char == " " else re.escape(char)) + _trie_regex(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    if "" in node:
+        return "(?:" + "|".join(branches) + ")?"
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+
+_router = None
+
+
+def get_router() -> IntentRouter:
+    """
+    Shared router, compiled on first use.
+    """
+    global _router
+    if _router is None:
+        _router = IntentRouter()
+    return _router
+
+
+def route(goal: str) -> Intent:
+    return get_router().route(goal)
+
+
+def route_clauses(goal: str) -> list:
+    """
+    [(clause, Intent)] for each clause of a compound goal.
+    """
+    return get_router().route_clauses(goal)
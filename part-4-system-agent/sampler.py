@@ -0,0 +1,287 @@
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from array import array
+
+from system_probes import GB, HAS_PROC, mem_available, parse_meminfo, read_cpu_times, read_text
+
+METRICS = ("disk_used_gb", "disk_free_gb", "memory_used_pct", "cpu_percent", "load_1m")
+
+UNITS = {
+    "disk_used_gb": "GB",
+    "disk_free_gb": "GB",
+    "memory_used_pct": "%",
+    "cpu_percent": "%",
+    "load_1m": "",
+}
+
+DEFAULT_INTERVAL = 5.0    # seconds between samples
+DEFAULT_CAPACITY = 720    # samples kept (1 hour at 5 s)
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+
+# -----------------------------
+# 🔁 Ring buffer
+# -----------------------------
+class RingBuffer:
+    """
+    Fixed-size history of samples: one array('d') per metric plus one
+    for timestamps.
+
+    Memory is allocated once (capacity * 8 bytes per column); a write
+    overwrites the oldest slot in place, so the buffer never grows.
+    Missing readings are stored as NaN and skipped by queries.
+    """
+
+    def __init__(self, columns=METRICS, capacity: int = DEFAULT_CAPACITY):
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._data = {name: array("d", bytes(8 * capacity)) for name in self.columns}
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp: float, values: dict):
+        with self._lock:
+            i = self._next
+            self._times[i] = timestamp
+            for name, column in self._data.items():
+                column[i] = values.get(name, math.nan)
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def window(self, name: str, seconds: float = None, now: float = None) -> tuple:
+        """
+        (timestamps, values) for one metric, oldest first, optionally only
+        the last `seconds`.
+        """
+        column = self._data[name]
+        with self._lock:
+            count, start = self._count, (self._next - self._count) % self.capacity
+            order = [(start + k) % self.capacity for k in range(count)]
+            times = [self._times[i] for i in order]
+            values = [column[i] for i in order]
+
+        cutoff = None
+        if seconds is not None:
+            cutoff = (now if now is not None else time.time()) - seconds
+        pairs = [(t, v) for t, v in zip(times, values)
+                 if not math.isnan(v) and (cutoff is None or t >= cutoff)]
+        return [t for t, _ in pairs], [v for _, v in pairs]
+
+
+# -----------------------------
+# 📈 Queries
+# -----------------------------
+def percentile(sorted_values, p: float) -> float:
+    """
+    Linear-interpolated percentile of already sorted values.
+    """
+    if not sorted_values:
+        return math.nan
+    rank = (len(sorted_values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def slope_per_hour(times, values) -> float:
+    """
+    Least-squares slope of values over time, in units per hour.
+    """
+    n = len(times)
+    if n < 2:
+        return math.nan
+    t0 = times[0]
+    xs = [t - t0 for t in times]
+    mean_x = sum(xs) / n
+    mean_y = sum(values) / n
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if not var:
+        return math.nan
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, values))
+    return cov / var * 3600
+
+
+# -----------------------------
+# 🛰️ Background sampler
+# -----------------------------
+class MetricsSampler:
+    """
+    Daemon thread that records disk, memory, CPU and load every
+    `interval` seconds into a RingBuffer.
+
+    It reads /proc itself (not the TTL-cached probes), and keeps its own
+    /proc/stat reading so CPU utilisation covers exactly one interval.
+    Trend and percentile questions are answered from the buffer, without
+    touching the system again.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, capacity: int = DEFAULT_CAPACITY,
+                 path: str = "/"):
+        self.interval = interval
+        self.path = path
+        self.buffer = RingBuffer(METRICS, capacity)
+        self.samples = 0
+        self.errors = 0
+        self.failures = {}  # probe name -> count
+        self.last_error = None
+        self._last_cpu = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- sampling ----
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.sample_once()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def sample_once(self):
+        probes = [("disk", self._sample_disk)]
+        if hasattr(os, "getloadavg"):
+            probes.append(("load", self._sample_load))
+        if HAS_PROC:
+            probes += [("memory", self._sample_memory), ("cpu", self._sample_cpu)]
+
+        # A failing probe loses only its own metrics for this sample
+        values = {}
+        for name, sample in probes:
+            try:
+                sample(values)
+            except (OSError, KeyError, ValueError, ZeroDivisionError) as e:
+                self.errors += 1
+                self.failures[name] = self.failures.get(name, 0) + 1
+                self.last_error = f"{name}: {e!r}"
+        self.buffer.append(time.time(), values)
+        self.samples += 1
+
+    def _sample_disk(self, values: dict):
+        total, used, free = shutil.disk_usage(self.path)
+        values["disk_used_gb"] = used / GB
+        values["disk_free_gb"] = free / GB
+
+    def _sample_load(self, values: dict):
+        values["load_1m"] = os.getloadavg()[0]
+
+    def _sample_memory(self, values: dict):
+        m = parse_meminfo(read_text("/proc/meminfo"))
+        values["memory_used_pct"] = (m["MemTotal"] - mem_available(m)) / m["MemTotal"] * 100
+
+    def _sample_cpu(self, values: dict):
+        busy, total_jiffies = read_cpu_times()
+        if self._last_cpu is not None and total_jiffies > self._last_cpu[1]:
+            values["cpu_percent"] = ((busy - self._last_cpu[0])
+                                     / (total_jiffies - self._last_cpu[1]) * 100)
+        self._last_cpu = (busy, total_jiffies)
+
+    # ---- queries ----
+    def trend(self, metric: str, seconds: float = None) -> dict:
+        times, values = self.buffer.window(metric, seconds)
+        rate = slope_per_hour(times, values)
+        report = {
+            "metric": metric,
+            "samples": len(values),
+            "span_s": round(times[-1] - times[0], 1) if times else 0.0,
+            "first": _round(values[0]) if values else None,
+            "last": _round(values[-1]) if values else None,
+            "change_per_hour": _round(rate),
+            "unit": UNITS[metric],
+        }
+        if metric == "disk_used_gb" and values and rate > 0:
+            _, free = self.buffer.window("disk_free_gb", seconds)
+            if free:
+                report["hours_until_full"] = round(free[-1] / rate, 1)
+        return report
+
+    def percentiles(self, metric: str, seconds: float = None,
+                    ps=DEFAULT_PERCENTILES) -> dict:
+        _, values = self.buffer.window(metric, seconds)
+        values.sort()
+        report = {"metric": metric, "samples": len(values), "unit": UNITS[metric]}
+        for p in ps:
+            report[f"p{p:g}"] = _round(percentile(values, p))
+        report["max"] = _round(values[-1]) if values else None
+        return report
+
+
+def _round(value):
+    return None if value is None or math.isnan(value) else round(value, 3)
+
+
+_sampler = None
+
+
+def start_sampler(interval: float = DEFAULT_INTERVAL, capacity: int = DEFAULT_CAPACITY):
+    """
+    Start the shared sampler (once) and return it.
+    """
+    global _sampler
+    if _sampler is None:
+        _sampler = MetricsSampler(interval, capacity).start()
+    return _sampler
+
+
+def get_sampler():
+    """
+    The shared sampler, or None if history is off.
+    """
+    return _sampler
+
+
+# -----------------------------
+# 🗣️ Reading a history question
+# -----------------------------
+METRIC_WORDS = [
+    (re.compile(r"\b(?:disk|storage|space|drive)\b"), "disk_used_gb"),
+    (re.compile(r"\b(?:memory|ram)\b"), "memory_used_pct"),
+    (re.compile(r"\bcpu\b"), "cpu_percent"),
+    (re.compile(r"\bload\b"), "load_1m"),
+]
+WINDOW = re.compile(r"\b(?:last|past)\s+(\d+(?:\.\d+)?)?\s*(second|sec|minute|min|hour|hr|day)s?\b")
+WINDOW_UNITS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600, "hr": 3600, "day": 86400}
+PERCENTILE = re.compile(r"\bp(\d{1,2}(?:\.\d+)?)\b|\b(\d{1,2}(?:\.\d+)?)(?:st|nd|rd|th)?\s+percentile")
+
+
+def parse_query(goal: str) -> dict:
+    """
+    Metrics, time window and percentiles mentioned in a goal.
+
+    "p95 cpu over the last 10 minutes" ->
+    {"metrics": ["cpu_percent"], "seconds": 600, "percentiles": [95]}
+    """
+    text = goal.lower()
+    metrics = [metric for pattern, metric in METRIC_WORDS if pattern.search(text)]
+
+    seconds = None
+    match = WINDOW.search(text)
+    if match:
+        seconds = float(match.group(1) or 1) * WINDOW_UNITS[match.group(2)]
+
+    ps = [float(a or b) for a, b in PERCENTILE.findall(text)]
+    if re.search(r"\bmedian\b", text):
+        ps.append(50.0)
+    return {
+        "metrics": metrics or ["disk_used_gb", "memory_used_pct", "cpu_percent", "load_1m"],
+        "seconds": seconds,
+        "percentiles": sorted(set(ps)) or list(DEFAULT_PERCENTILES),
+    }
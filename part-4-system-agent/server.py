@@ -0,0 +1,264 @@
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import socketserver  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # noqa: E402
+
+import agent  # noqa: E402
+from common.llm_client import (CallStats, LLMError, ModelCalls, get_client,  # noqa: E402
+                               keep_alive_seconds)
+from common.prompts import build_planning_prompt, prompt_stats  # noqa: E402
+
+IMPORT_MS = round((time.perf_counter() - _STARTED) * 1000, 2)
+
+DEFAULT_KEEP_ALIVE = "30m"
+MAX_BODY = 64 * 1024  # bytes
+
+
+# -----------------------------
+# 🔥 Model clock: cold or warm?
+# -----------------------------
+class ModelClock:
+    """
+    Tracks whether the model should still be loaded in Ollama.
+
+    Every generation resets Ollama's keep_alive timer, so a request that
+    arrives within keep_alive of the last one finds the model warm.
+    """
+
+    def __init__(self, keep_alive):
+        self.keep_alive_s = keep_alive_seconds(keep_alive)
+        self._last_used = None
+        self._lock = threading.Lock()
+
+    def is_warm(self) -> bool:
+        with self._lock:
+            return (self._last_used is not None
+                    and time.monotonic() - self._last_used < self.keep_alive_s)
+
+    def touch(self):
+        with self._lock:
+            self._last_used = time.monotonic()
+
+
+class AgentSession:
+    """
+    Everything that outlives a request: imports, the pooled Ollama client,
+    the compiled router, the probe caches, and the loaded model.
+    """
+
+    def __init__(self, model: str = agent.MODEL, keep_alive=DEFAULT_KEEP_ALIVE):
+        self.model = model
+        self.keep_alive = keep_alive
+        self.clock = ModelClock(keep_alive)
+        self.startup = {"imports_ms": IMPORT_MS}
+        # Model requests are cold (model had to load) or warm; "local" never touched the model
+        self.stats = {"cold": CallStats(), "warm": CallStats(), "local": CallStats()}
+
+        client = get_client()
+        # Sent with every generation, so each call also extends the keep_alive
+        client.default_options["keep_alive"] = keep_alive
+        agent.MODEL = model
+
+    def warm_up(self):
+        """
+        Load the model and evaluate the planning prompt prefix once.
+
+        The planning prompt puts the goal last, so everything before it is
+        the same for every request and stays in Ollama's KV cache.
+        """
+        start = time.perf_counter()
+        prefix = build_planning_prompt("")
+        result = get_client().warm_up(self.model, prefix, keep_alive=self.keep_alive)
+        self.clock.touch()
+        self.startup.update({
+            "warmup_ms": round((time.perf_counter() - start) * 1000, 2),
+            "model_load_ms": result["load_ms"],
+            "prefix_tokens": result["prompt_eval_count"],
+        })
+        return result
+
+    def run(self, kind: str, goal: str) -> dict:
+        warm = self.clock.is_warm()
+        start = time.perf_counter()
+        # Only generations that reached Ollama count: a cached or coalesced
+        # plan neither needed the model nor kept it loaded
+        with ModelCalls() as model_calls:
+            if kind == "plan":
+                response = agent.planning_agent(goal)
+            else:
+                response = agent.system_agent(goal)
+        elapsed = time.perf_counter() - start
+
+        if model_calls.count:
+            self.clock.touch()
+            start_type = "warm" if warm else "cold"
+        else:
+            start_type = "local"
+        self.stats[start_type].record(elapsed)
+        return {
+            "goal": goal,
+            "response": response,
+            "start": start_type,
+            "latency_ms": round(elapsed * 1000, 2),
+        }
+
+    def snapshot(self) -> dict:
+        report = {"model": self.model, "keep_alive": self.keep_alive,
+                  "model_warm": self.clock.is_warm(), "startup": dict(self.startup)}
+        for name, stats in self.stats.items():
+            report[name] = stats.snapshot()
+        report["llm"] = get_client().stats.snapshot()
+        report["tokens"] = get_client().usage.snapshot()
+        if get_client().flight is not None:
+            report["coalescing"] = get_client().flight.snapshot()
+        report["prompts"] = prompt_stats()
+        if hasattr(get_client(), "backends"):
+            report["routing"] = get_client().snapshot()  # OLLAMA_HOSTS: one entry per backend
+        return report
+
+
+# -----------------------------
+# 🌐 HTTP API
+# -----------------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive between requests
+
+    def log_message(self, format, *args):
+        pass
+
+    def address_string(self):
+        # Unix-socket clients have no (host, port)
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        session = self.server.session
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "model_warm": session.clock.is_warm()})
+        elif self.path == "/stats":
+            self._send_json(200, session.snapshot())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        routes = {"/plan": "plan", "/agent": "agent"}
+        if self.path not in routes:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Invalid Content-Length"})
+            return
+        if length > MAX_BODY:
+            self._send_json(413, {"error": f"Body larger than {MAX_BODY} bytes"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            goal = payload.get("goal", "")
+        except (ValueError, AttributeError):
+            self._send_json(400, {"error": "Body must be JSON like {\"goal\": \"...\"}"})
+            return
+        if not isinstance(goal, str):
+            self._send_json(400, {"error": f"goal must be a string, not {type(goal).__name__}"})
+            return
+        goal = goal.strip()
+        if not goal:
+            self._send_json(400, {"error": "Missing goal"})
+            return
+
+        try:
+            self._send_json(200, self.server.session.run(routes[self.path], goal))
+        except LLMError as e:
+            self._send_json(502, {"error": str(e)})
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def make_server(session: AgentSession, host: str = "127.0.0.1", port: int = 8765,
+                unix_socket: str = None):
+    """
+    HTTP server for the session on host:port, or on a Unix socket path.
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = _UnixServer(unix_socket, _Handler)
+    else:
+        server = _TCPServer((host, port), _Handler)
+    server.session = session
+    return server
+
+
+# -----------------------------
+# 🚀 MAIN
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve planning_agent and system_agent over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--model", default=agent.MODEL)
+    parser.add_argument("--keep-alive", default=DEFAULT_KEEP_ALIVE,
+                        help='how long Ollama keeps the model loaded ("30m", "-1" = forever)')
+    parser.add_argument("--no-warmup", action="store_true", help="skip loading the model at startup")
+    parser.add_argument("--sample", type=float, metavar="SECONDS",
+                        help="record metric history for trend questions")
+    parser.add_argument("--quiet", action="store_true", help="hide the agents' progress output")
+    args = parser.parse_args(argv)
+
+    session = AgentSession(args.model, args.keep_alive)
+    if args.sample:
+        agent.start_sampler(args.sample)
+
+    if not args.no_warmup:
+        print(f"🔥 Warming up {args.model} (keep_alive={args.keep_alive})...")
+        try:
+            session.warm_up()
+        except LLMError as e:
+            print(f"⚠ Warm-up failed, first request will be cold: {e}")
+    session.startup["ready_ms"] = round((time.perf_counter() - _STARTED) * 1000, 2)
+    print(f"📊 Startup: {json.dumps(session.startup)}")
+
+    server = make_server(session, args.host, args.port, args.unix)
+    where = args.unix or f"http://{args.host}:{server.server_address[1]}"
+    print(f"🤖 Agent server listening on {where} (Ctrl+C to stop)")
+
+    if args.quiet:
+        sys.stdout = open(os.devnull, "w")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+if __name__ == "__main__":
+    main()
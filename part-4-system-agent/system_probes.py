@@ -0,0 +1,278 @@
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+GB = 1024 ** 3
+FAST_TTL = 1.0   # seconds: memory, load and CPU change quickly
+DISK_TTL = 5.0   # seconds: disk usage changes slowly
+
+HAS_PROC = sys.platform.startswith("linux") and os.path.exists("/proc/meminfo")
+
+
+# -----------------------------
+# ⏱️ Short-TTL cache
+# -----------------------------
+def ttl_cache(seconds: float):
+    """
+    Cache a no-argument probe for a few seconds.
+
+    Callers within the TTL share one reading; a caller never waits for
+    another thread's probe to finish (at worst two threads read /proc at
+    the same time). Each caller gets its own copy of the result dict.
+    """
+    def decorator(func):
+        lock = threading.Lock()
+        cached = [0.0, None]  # expires_at, value
+
+        def wrapper():
+            now = time.monotonic()
+            with lock:
+                expires_at, value = cached
+            if value is None or now >= expires_at:
+                value = func()
+                with lock:
+                    cached[0], cached[1] = now + seconds, value
+            return dict(value)
+
+        def clear():
+            with lock:
+                cached[0], cached[1] = 0.0, None
+
+        wrapper.clear = clear
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    return decorator
+
+
+def read_text(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+# -----------------------------
+# 🖥️ Static info (cached for the process)
+# -----------------------------
+@lru_cache(maxsize=None)
+def _os_info() -> dict:
+    uname = platform.uname()
+    return {
+        "system": uname.system,
+        "release": uname.release,
+        "version": uname.version,
+        "machine": uname.machine,
+        "processor": _cpu_model() or uname.machine,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _cpu_model() -> str:
+    # platform.processor() may run `uname -p`; /proc/cpuinfo is just a read
+    if HAS_PROC:
+        try:
+            for line in read_text("/proc/cpuinfo").splitlines():
+                if line.startswith(("model name", "Hardware", "Processor")):
+                    return line.split(":", 1)[1].strip()
+        except OSError:
+            pass
+        return ""
+    return platform.processor()
+
+
+def os_info() -> dict:
+    """
+    OS and machine details. They never change, so they are read once.
+    """
+    return dict(_os_info())
+
+
+# -----------------------------
+# 🧠 Memory: /proc/meminfo
+# -----------------------------
+def parse_meminfo(text: str) -> dict:
+    # "MemTotal:       16318412 kB" -> {"MemTotal": 16318412 * 1024}
+    values = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        fields = rest.split()
+        if fields:
+            values[name] = int(fields[0]) * (1024 if len(fields) > 1 else 1)
+    return values
+
+
+def mem_available(m: dict) -> int:
+    # MemAvailable exists since Linux 3.14; estimate it on older kernels
+    return m.get("MemAvailable", m.get("MemFree", 0) + m.get("Buffers", 0) + m.get("Cached", 0))
+
+
+@ttl_cache(FAST_TTL)
+def memory_info() -> dict:
+    """
+    RAM and swap in GB, parsed from /proc/meminfo.
+    """
+    if not HAS_PROC:
+        return _memory_info_command()
+
+    m = parse_meminfo(read_text("/proc/meminfo"))
+    total = m["MemTotal"]
+    available = mem_available(m)
+    swap_total = m.get("SwapTotal", 0)
+    swap_used = swap_total - m.get("SwapFree", 0)
+    return {
+        "total_gb": round(total / GB, 2),
+        "available_gb": round(available / GB, 2),
+        "used_gb": round((total - available) / GB, 2),
+        "percent_used": round((total - available) / total * 100, 2) if total else 0.0,
+        "swap_total_gb": round(swap_total / GB, 2),
+        "swap_used_gb": round(swap_used / GB, 2),
+    }
+
+
+def _memory_info_command() -> dict:
+    # No /proc (Windows, macOS): fall back to the system's own tool
+    if platform.system() == "Windows":
+        command = ["wmic", "OS", "get", "TotalVisibleMemorySize,FreePhysicalMemory", "/Value"]
+    elif platform.system() == "Darwin":
+        command = ["vm_stat"]
+    else:
+        command = ["free", "-h"]
+    result = subprocess.run(command, capture_output=True, text=True, timeout=10)
+    return {"memory_info": result.stdout.strip()}
+
+
+# -----------------------------
+# ⚙️ CPU: /proc/loadavg + /proc/stat
+# -----------------------------
+_cpu_lock = threading.Lock()
+_last_cpu = None  # (monotonic time, busy jiffies, total jiffies)
+
+
+def read_cpu_times() -> tuple:
+    # First line: "cpu  user nice system idle iowait irq softirq steal guest guest_nice"
+    with open("/proc/stat") as f:
+        fields = [int(x) for x in f.readline().split()[1:]]
+    # guest time is already counted in user / nice
+    total = sum(fields[:8])
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    return total - idle, total
+
+
+@ttl_cache(FAST_TTL)
+def cpu_load() -> dict:
+    """
+    Load averages and CPU utilisation, without sleeping.
+
+    Utilisation is measured between this reading of /proc/stat and the
+    previous one (the first call reports the average since boot), so the
+    probe returns immediately instead of sampling for a second.
+    """
+    global _last_cpu
+    load_1, load_5, load_15 = os.getloadavg() if hasattr(os, "getloadavg") else (0.0, 0.0, 0.0)
+    result = {
+        "load_1m": round(load_1, 2),
+        "load_5m": round(load_5, 2),
+        "load_15m": round(load_15, 2),
+        "cpu_count": os.cpu_count(),
+    }
+    if not HAS_PROC:
+        return result
+
+    # /proc/loadavg also has the run queue: "0.52 0.58 0.59 2/1193 12345"
+    running, _, procs = read_text("/proc/loadavg").split()[3].partition("/")
+    busy, total = read_cpu_times()
+    now = time.monotonic()
+    with _cpu_lock:
+        last, _last_cpu = _last_cpu, (now, busy, total)
+    if last is None or total <= last[2]:
+        since, busy_delta, total_delta = "boot", busy, total
+    else:
+        since = round(now - last[0], 2)
+        busy_delta, total_delta = busy - last[1], total - last[2]
+
+    result.update({
+        "running": int(running),
+        "processes": int(procs),
+        "cpu_percent": round(busy_delta / total_delta * 100, 1) if total_delta else 0.0,
+        "window_s": since,
+    })
+    return result
+
+
+# -----------------------------
+# 💽 Disk
+# -----------------------------
+@ttl_cache(DISK_TTL)
+def disk_usage() -> dict:
+    """
+    Usage of the root filesystem (one statvfs call).
+    """
+    total, used, free = shutil.disk_usage("/")
+    return {
+        "total_gb": round(total / GB, 2),
+        "used_gb": round(used / GB, 2),
+        "free_gb": round(free / GB, 2),
+        "percent_used": round((used / total) * 100, 2)
+    }
+
+
+# -----------------------------
+# 🔀 Probe registry
+# -----------------------------
+PROBES = {
+    "disk_usage": disk_usage,
+    "memory_info": memory_info,
+    "os_info": os_info,
+    "cpu_load": cpu_load,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=len(PROBES), thread_name_prefix="probe")
+        return _pool
+
+
+def probe(name: str) -> dict:
+    """
+    Run one probe by name. Raises KeyError for unknown names.
+    """
+    return PROBES[name]()
+
+
+def probe_many(names) -> dict:
+    """
+    Run several probes at once on a shared thread pool: {name: result}.
+
+    A failing probe reports {"error": ...} instead of failing the rest.
+    """
+    names = list(dict.fromkeys(names))
+    futures = {name: _get_pool().submit(probe, name) for name in names}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = {"error": str(e)}
+    return results
+
+
+def clear_caches():
+    """
+    Forget all cached readings (static info included).
+    """
+    _os_info.cache_clear()
+    for func in PROBES.values():
+        if hasattr(func, "clear"):
+            func.clear()
@@ -1,28 +1,160 @@
 import os
-import shutil
+import sys
 import json
 from pathlib import Path
 
+from organizer.categories import get_category_index
+from organizer.dedup import DEDUP_ACTIONS, DEFAULT_HASH_CACHE, find_duplicates, link_duplicates
+from organizer.journal import MoveJournal, latest_journal, recover, undo_run
+from organizer.pipeline import Progress, organize_folder
+from organizer.scanner import scan_files, walk_files
+from organizer.sniff import SNIFF_MODES, sniff_categories
+from organizer.snapshot import DirSnapshot, scan_signature
+from organizer.transfer import VERIFY_MODES, Mover
+from organizer.watcher import FileRef
+
+
+# -----------------------------
+# 🔎 Which files to look at
+# -----------------------------
+def find_files(target_folder: Path, category_names, recursive: bool = False,
+               max_depth: int = None, include=None, exclude=None,
+               follow_symlinks: bool = False, workers: int = 8, snapshot=None):
+    """
+    Top-level files by default; the whole tree when recursive=True.
+
+    Category folders the organizer creates are never walked into, so a
+    recursive run does not re-organize files it already placed. With a
+    snapshot only files that are new since the last run are returned.
+    """
+    if not recursive:
+        return scan_files(target_folder, include=include, exclude=exclude, snapshot=snapshot)
+
+    return walk_files(
+        target_folder,
+        max_depth=max_depth,
+        include=include,
+        exclude=exclude,
+        skip_dirs=[target_folder / name for name in category_names],
+        follow_symlinks=follow_symlinks,
+        workers=workers,
+        snapshot=snapshot,
+    )
+
+
+def open_snapshot(target_folder: Path, categories, full: bool, **scan_options) -> DirSnapshot:
+    """
+    Snapshot of the last run with the same scan options (ignored if full=True).
+    """
+    signature = scan_signature(categories=categories.names, **scan_options)
+    return DirSnapshot(target_folder, signature, full=full)
+
+
+# -----------------------------
+# 👯 Optional dedup stage
+# -----------------------------
+def dedup_stage(files, target_folder: Path, action: str, workers: int = 8,
+                hash_cache: str = DEFAULT_HASH_CACHE, snapshot=None):
+    """
+    Find byte-identical files before organizing.
+
+    action:
+        report   - organize everything, list the duplicates
+        skip     - leave duplicates where they are, organize the originals
+        hardlink - turn duplicates into hard links of the original, then organize
+
+    With a snapshot, only the new files are compared with each other, and
+    skipped duplicates are remembered so later runs leave them alone.
+
+    Returns (files_to_organize, summary).
+    """
+    files = list(files)
+    found = find_duplicates(files, workers=workers, cache_path=hash_cache)
+    groups = found["groups"]
+
+    if action == "skip":
+        duplicates = {path for group in groups for path in group[1:]}
+        if snapshot is not None:
+            for entry in files:
+                if entry.path in duplicates:
+                    snapshot.keep(entry)
+        files = [entry for entry in files if entry.path not in duplicates]
+    elif action == "hardlink":
+        linked = set(link_duplicates(groups))
+        found["stats"]["linked"] = len(linked)
+        # A linked file is a new inode: its DirEntry still has the old stat
+        files = [FileRef(entry.path) if entry.path in linked else entry for entry in files]
+
+    prefix_len = len(str(target_folder).rstrip(os.sep)) + 1
+    summary = {
+        "action": action,
+        "stats": found["stats"],
+        # A sample is enough to act on; the stats have the totals
+        "groups": [[path[prefix_len:] for path in group] for group in groups[:20]],
+    }
+    return files, summary
+
 
 # -----------------------------
 # 📁 TOOL: File Organizer
 # -----------------------------
-def file_organizer_tool(folder_path: str):
+def file_organizer_tool(folder_path: str, workers: int = 8, on_progress=None,
+                        collect_names: bool = True, recursive: bool = False,
+                        max_depth: int = None, include=None, exclude=None,
+                        follow_symlinks: bool = False, category_config: str = None,
+                        dedup: str = None, hash_cache: str = DEFAULT_HASH_CACHE,
+                        journal: bool = True, resume: bool = True, full: bool = False,
+                        sniff: str = None, verify: str = "size"):
     """
     Organizes files in a folder by their type.
     Creates subfolders and moves files into appropriate categories.
+
+    Args:
+        folder_path: Path to the folder to organize
+        workers: Number of threads moving files in parallel
+        on_progress: Optional callback, called about once a second with
+            scanned / moved / failed counts and files_per_s
+        collect_names: If False, report counts per category instead of
+            file names (keeps memory flat on huge folders)
+        recursive: Also organize files in subfolders (moved into the
+            top-level category folders)
+        max_depth: With recursive, how many folder levels to descend
+        include / exclude: Glob patterns, e.g. ["*.pdf"] or ["node_modules", "*.tmp"]
+        follow_symlinks: With recursive, enter symlinked folders
+        category_config: JSON file with category overrides (see
+            organizer/categories.py); defaults to $FILE_ORGANIZER_CONFIG
+        dedup: None, "report", "skip" or "hardlink" (see dedup_stage)
+        hash_cache: SQLite file that remembers file hashes between runs
+            ("" to disable)
+        journal: Record every move so the run can be resumed or undone
+            (see undo_organize_tool)
+        resume: If the last journaled run on this folder was interrupted,
+            settle its half-done moves and continue it
+        full: Rescan everything instead of only what changed since the
+            last run (see organizer/snapshot.py)
+        sniff: None, "unknown" or "all" - also look at file contents
+            (see organizer/sniff.py); results share hash_cache
+        verify: How a copy across devices is checked before the source is
+            deleted: "size" or "hash" (see organizer/transfer.py)
     """
-    # Define file categories and their extensions
-    file_categories = {
-        "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".svg", ".webp", ".ico"],
-        "Documents": [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".tex"],
-        "Data": [".csv", ".xls", ".xlsx", ".json", ".xml", ".yaml", ".yml", ".db", ".sql"],
-        "Videos": [".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm"],
-        "Audio": [".mp3", ".wav", ".flac", ".aac", ".ogg", ".wma", ".m4a"],
-        "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2"],
-        "Code": [".py", ".js", ".html", ".css", ".java", ".cpp", ".c", ".h", ".php", ".rb", ".go", ".rs", ".swift"],
-        "Executables": [".exe", ".msi", ".dmg", ".pkg", ".deb", ".rpm"]
-    }
+    if dedup is not None and dedup not in DEDUP_ACTIONS:
+        return {
+            "status": "error",
+            "message": f"Unknown dedup action: {dedup} (use one of {', '.join(DEDUP_ACTIONS)})"
+        }
+    if sniff is not None and sniff not in SNIFF_MODES:
+        return {
+            "status": "error",
+            "message": f"Unknown sniff mode: {sniff} (use one of {', '.join(SNIFF_MODES)})"
+        }
+    if verify not in VERIFY_MODES:
+        return {
+            "status": "error",
+            "message": f"Unknown verify mode: {verify} (use one of {', '.join(VERIFY_MODES)})"
+        }
+
+    # Shared extension -> category index (built once, same as preview)
+    categories = get_category_index(category_config)
 
     # Convert to Path object
     target_folder = Path(folder_path).expanduser().resolve()
@@ -40,151 +172,255 @@ def file_organizer_tool(folder_path: str):
             "message": f"Path is not a directory: {folder_path}"
         }
 
-    # Track organized files
-    organized = {category: [] for category in file_categories.keys()}
-    organized["Others"] = []
-
-    # Get all files (not directories)
-    files = [f for f in target_folder.iterdir() if f.is_file()]
-
-    if not files:
+    snapshot = open_snapshot(
+        target_folder, categories, full,
+        recursive=recursive, max_depth=max_depth, include=include,
+        exclude=exclude, follow_symlinks=follow_symlinks, dedup=dedup, sniff=sniff,
+    )
+
+    files = find_files(
+        target_folder, categories.names,
+        recursive=recursive, max_depth=max_depth, include=include,
+        exclude=exclude, follow_symlinks=follow_symlinks, workers=workers,
+        snapshot=snapshot,
+    )
+
+    duplicates = None
+    if dedup:
+        files, duplicates = dedup_stage(files, target_folder, dedup, workers, hash_cache, snapshot)
+
+    # Optional content sniffing for files the name doesn't explain
+    overrides, sniffed = None, None
+    if sniff:
+        files = list(files)
+        overrides, sniffed = sniff_categories(files, categories, sniff, workers, hash_cache)
+
+    move_journal = None
+    recovered = None
+    if journal:
+        previous = latest_journal(str(target_folder), unfinished_only=True) if resume else None
+        if previous:
+            move_journal = MoveJournal.reopen(previous)
+            recovered = recover(previous, move_journal)
+        else:
+            move_journal = MoveJournal.create(str(target_folder))
+
+    # Stream files out of the folder and move them on a thread pool
+    try:
+        result = organize_folder(
+            target_folder,
+            categories.classify,
+            workers=workers,
+            progress=Progress(on_progress) if on_progress else None,
+            collect_names=collect_names,
+            files=files,
+            journal=move_journal,
+            category_overrides=overrides,
+            mover=Mover(verify=verify),
+        )
+        if move_journal:
+            move_journal.finish()
+    finally:
+        if move_journal:
+            move_journal.close()
+
+    # Only a completed run becomes the baseline for the next one
+    snapshot.save()
+
+    if not result["total"]:
         return {
             "status": "success",
             "message": "No files to organize",
             "folder": str(target_folder),
-            "organized": {}
+            "organized": {},
+            "scan": snapshot.stats
         }
 
-    # Process each file
-    for file_path in files:
-        file_ext = file_path.suffix.lower()
-        file_name = file_path.name
-
-        # Find the category for this file
-        category_found = False
-        for category, extensions in file_categories.items():
-            if file_ext in extensions:
-                # Create category folder if it doesn't exist
-                category_folder = target_folder / category
-                category_folder.mkdir(exist_ok=True)
-
-                # Move file to category folder
-                destination = category_folder / file_name
-
-                # Handle duplicate filenames
-                counter = 1
-                while destination.exists():
-                    stem = file_path.stem
-                    destination = category_folder / f"{stem}_{counter}{file_ext}"
-                    counter += 1
-
-                shutil.move(str(file_path), str(destination))
-                organized[category].append(file_name)
-                category_found = True
-                break
-
-        # If no category matched, put in Others
-        if not category_found:
-            others_folder = target_folder / "Others"
-            others_folder.mkdir(exist_ok=True)
-            destination = others_folder / file_name
-
-            # Handle duplicate filenames
-            counter = 1
-            while destination.exists():
-                stem = file_path.stem
-                destination = others_folder / f"{stem}_{counter}{file_ext}"
-                counter += 1
-
-            shutil.move(str(file_path), str(destination))
-            organized["Others"].append(file_name)
-
-    # Remove summary (only include categories that have files)
-    organized = {k: v for k, v in organized.items() if v}
-
-    return {
+    message = f"Organized {result['stats']['moved']} files"
+    copied = result["stats"]["transfer"].get("copy")
+    if copied:
+        # Not a cheap rename: say so
+        message += f" ({copied['files']} copied across devices, {copied['mb_per_s']} MB/s)"
+
+    response = {
+        "status": "success",
+        "message": message,
+        "folder": str(target_folder),
+        "organized": result["organized"],
+        "stats": result["stats"],
+        "scan": snapshot.stats
+    }
+    if move_journal and move_journal.path:
+        response["journal"] = move_journal.path
+    if recovered:
+        response["resumed"] = recovered
+    if duplicates:
+        response["duplicates"] = duplicates
+    if sniffed:
+        response["sniff"] = sniffed
+    if result["errors"]:
+        response["errors"] = result["errors"]
+    return response
+
+
+# -----------------------------
+# ⏪ TOOL: Undo Last Run
+# -----------------------------
+def undo_organize_tool(folder_path: str, workers: int = 8):
+    """
+    Put every file moved by the last organize run back where it was.
+
+    Replays that run's journal in reverse (in parallel). Safe to run again
+    if it was interrupted.
+    """
+    target_folder = Path(folder_path).expanduser().resolve()
+
+    state = latest_journal(str(target_folder))
+    if state is None:
+        return {"status": "error", "message": f"No organize run to undo for: {folder_path}"}
+
+    result = undo_run(state, workers=workers)
+
+    response = {
         "status": "success",
-        "message": f"Organized {len(files)} files",
+        "message": f"Restored {result['restored']} files",
         "folder": str(target_folder),
-        "organized": organized
+        "journal": state.path
     }
+    if result["errors"]:
+        response["errors"] = result["errors"]
+    return response
 
 
 # -----------------------------
 # 📊 TOOL: Preview Files (Dry Run)
 # -----------------------------
-def preview_files_tool(folder_path: str):
+def preview_files_tool(folder_path: str, recursive: bool = False, max_depth: int = None,
+                       include=None, exclude=None, follow_symlinks: bool = False,
+                       category_config: str = None, dedup: str = None,
+                       hash_cache: str = DEFAULT_HASH_CACHE, full: bool = False,
+                       sniff: str = None):
     """
     Shows what would happen without actually moving files.
+
+    Takes the same scan options as file_organizer_tool. With any dedup
+    value, duplicates are reported (never linked or skipped). Like the
+    organizer it only looks at what changed since the last organize run
+    unless full=True; a preview never updates the snapshot.
     """
-    file_categories = {
-        "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".svg", ".webp", ".ico"],
-        "Documents": [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".tex"],
-        "Data": [".csv", ".xls", ".xlsx", ".json", ".xml", ".yaml", ".yml", ".db", ".sql"],
-        "Videos": [".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm"],
-        "Audio": [".mp3", ".wav", ".flac", ".aac", ".ogg", ".wma", ".m4a"],
-        "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2"],
-        "Code": [".py", ".js", ".html", ".css", ".java", ".cpp", ".c", ".h", ".php", ".rb", ".go", ".rs", ".swift"],
-        "Executables": [".exe", ".msi", ".dmg", ".pkg", ".deb", ".rpm"]
-    }
+    categories = get_category_index(category_config)
 
     target_folder = Path(folder_path).expanduser().resolve()
 
     if not target_folder.exists():
         return {"status": "error", "message": f"Folder not found: {folder_path}"}
+    if dedup is not None and dedup not in DEDUP_ACTIONS:
+        return {
+            "status": "error",
+            "message": f"Unknown dedup action: {dedup} (use one of {', '.join(DEDUP_ACTIONS)})"
+        }
+    if sniff is not None and sniff not in SNIFF_MODES:
+        return {
+            "status": "error",
+            "message": f"Unknown sniff mode: {sniff} (use one of {', '.join(SNIFF_MODES)})"
+        }
+
+    preview = {category: [] for category in categories.names}
+    file_count = 0
 
-    files = [f for f in target_folder.iterdir() if f.is_file()]
+    snapshot = open_snapshot(
+        target_folder, categories, full,
+        recursive=recursive, max_depth=max_depth, include=include,
+        exclude=exclude, follow_symlinks=follow_symlinks, dedup=dedup, sniff=sniff,
+    )
 
-    if not files:
-        return {"status": "success", "message": "No files to organize", "preview": {}}
+    files = find_files(
+        target_folder, categories.names,
+        recursive=recursive, max_depth=max_depth, include=include,
+        exclude=exclude, follow_symlinks=follow_symlinks, snapshot=snapshot,
+    )
 
-    preview = {category: [] for category in file_categories.keys()}
-    preview["Others"] = []
+    duplicates = None
+    if dedup:
+        files, duplicates = dedup_stage(files, target_folder, "report", hash_cache=hash_cache)
 
-    for file_path in files:
-        file_ext = file_path.suffix.lower()
-        file_name = file_path.name
+    overrides, sniffed = {}, None
+    if sniff:
+        files = list(files)
+        overrides, sniffed = sniff_categories(files, categories, sniff, cache_path=hash_cache)
 
-        categorized = False
-        for category, extensions in file_categories.items():
-            if file_ext in extensions:
-                preview[category].append(file_name)
-                categorized = True
-                break
+    prefix_len = len(str(target_folder).rstrip(os.sep)) + 1
 
-        if not categorized:
-            preview["Others"].append(file_name)
+    for entry in files:
+        file_count += 1
+        category = overrides.get(entry.path) or categories.classify(entry.name)
+        preview.setdefault(category, []).append(entry.path[prefix_len:])
+
+    if not file_count:
+        return {"status": "success", "message": "No files to organize", "preview": {},
+                "scan": snapshot.stats}
 
     # Remove empty categories
     preview = {k: v for k, v in preview.items() if v}
 
-    return {
+    response = {
         "status": "success",
-        "message": f"Preview: {len(files)} files would be organized",
+        "message": f"Preview: {file_count} files would be organized",
         "folder": str(target_folder),
-        "preview": preview
+        "preview": preview,
+        "scan": snapshot.stats
     }
+    if duplicates:
+        response["duplicates"] = duplicates
+    if sniffed:
+        response["sniff"] = sniffed
+    return response
 
 
 # -----------------------------
 # 🤖 AGENT: File Organizer Agent
 # -----------------------------
-def file_organizer_agent(folder_path: str, dry_run: bool = False):
+def file_organizer_agent(folder_path: str, dry_run: bool = False, workers: int = 8,
+                         recursive: bool = False, max_depth: int = None,
+                         include=None, exclude=None, full: bool = False):
     """
     Main agent function that organizes files.
 
     Args:
         folder_path: Path to the folder to organize
         dry_run: If True, only preview without moving files
+        workers: Number of threads moving files in parallel
+        recursive: Also organize files in subfolders
+        max_depth: With recursive, how many folder levels to descend
+        include / exclude: Glob patterns to select or skip files/folders
+        full: Rescan everything, not just what changed since the last run
     """
     print(f"\n📁 Target Folder: {folder_path}")
 
     if dry_run:
         print("🔍 DRY RUN MODE - No files will be moved\n")
-        return preview_files_tool(folder_path)
+        return preview_files_tool(
+            folder_path, recursive=recursive, max_depth=max_depth,
+            include=include, exclude=exclude, full=full,
+        )
     else:
         print("🚀 Organizing files...\n")
-        return file_organizer_tool(folder_path)
+        result = file_organizer_tool(
+            folder_path, workers=workers, on_progress=print_progress,
+            recursive=recursive, max_depth=max_depth, include=include, exclude=exclude,
+            full=full,
+        )
+        print()
+        return result
+
+
+def print_progress(stats):
+    print(
+        f"\r   📦 {stats['moved']:,} moved, {stats['failed']:,} failed "
+        f"({stats['files_per_s']:,.0f} files/s)",
+        end="",
+        flush=True,
+    )
 
 
 # -----------------------------
@@ -195,17 +431,26 @@ if __name__ == "__main__":
     print("📂 File Organizer Agent")
     print("=" * 50)
     print("\nI will organize files in a folder by their type.")
-    print("Supported categories: Images, Documents, Data, Videos,")
-    print("                     Audio, Archives, Code, Executables, Others")
+    print("Supported categories:", ", ".join(get_category_index().names))
     print()
 
+    # `python agent.py --full` ignores the snapshot of the last run
+    full = "--full" in sys.argv[1:]
+
     # Get folder path from user
-    folder_path = input("Enter folder path to organize (or 'test' for demo): ").strip()
+    folder_path = input("Enter folder path to organize (or 'test' for demo, 'undo <path>' to revert): ").strip()
 
     if folder_path.lower() in ['exit', 'quit', 'bye']:
         print("\n👋 Goodbye!")
         exit()
 
+    # Revert the last organize run on a folder
+    if folder_path.lower().startswith('undo '):
+        result = undo_organize_tool(folder_path[5:].strip())
+        print("\n=== UNDO ===\n")
+        print(json.dumps(result, indent=2))
+        exit()
+
     # Create test folder if user types 'test'
     if folder_path.lower() == 'test':
         test_folder = Path.home() / "Downloads" / "test_organize"
@@ -224,24 +469,28 @@ if __name__ == "__main__":
         print("   Sample files created:", ", ".join(sample_files))
         folder_path = str(test_folder)
 
+    # Ask whether to walk subfolders too
+    recursive_input = input("\nInclude subfolders? (y/n): ").strip().lower()
+    recursive = recursive_input in ['y', 'yes']
+
     # Ask for dry run
     dry_run_input = input("\nPreview first? (y/n): ").strip().lower()
     dry_run = dry_run_input in ['y', 'yes']
 
     if dry_run:
-        result = file_organizer_agent(folder_path, dry_run=True)
+        result = file_organizer_agent(folder_path, dry_run=True, recursive=recursive, full=full)
         print("\n=== PREVIEW ===\n")
         print(json.dumps(result, indent=2))
 
         confirm = input("\nProceed with organization? (y/n): ").strip().lower()
         if confirm in ['y', 'yes']:
-            result = file_organizer_agent(folder_path, dry_run=False)
+            result = file_organizer_agent(folder_path, dry_run=False, recursive=recursive, full=full)
             print("\n=== RESULT ===\n")
             print(json.dumps(result, indent=2))
         else:
             print("\n❌ Cancelled. No files were moved.")
     else:
-        result = file_organizer_agent(folder_path, dry_run=False)
+        result = file_organizer_agent(folder_path, dry_run=False, recursive=recursive, full=full)
         print("\n=== RESULT ===\n")
         print(json.dumps(result, indent=2))
 
@@ -0,0 +1,6 @@
+"""
+Building blocks for the file organizer agent.
+
+agent.py stays the entry point; the heavy lifting for large folders
+(scanning, parallel moves, progress) lives here.
+"""
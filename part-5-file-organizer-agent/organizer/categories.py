@@ -0,0 +1,114 @@
+import json
+import os
+from functools import lru_cache
+
+
+OTHERS = "Others"
+
+# Define file categories and their extensions (in display order)
+DEFAULT_CATEGORIES = {
+    "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".svg", ".webp", ".ico"],
+    "Documents": [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".tex"],
+    "Data": [".csv", ".xls", ".xlsx", ".json", ".xml", ".yaml", ".yml", ".db", ".sql"],
+    "Videos": [".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm"],
+    "Audio": [".mp3", ".wav", ".flac", ".aac", ".ogg", ".wma", ".m4a"],
+    "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".tar.gz", ".tar.bz2"],
+    "Code": [".py", ".js", ".html", ".css", ".java", ".cpp", ".c", ".h", ".php", ".rb", ".go", ".rs", ".swift"],
+    "Executables": [".exe", ".msi", ".dmg", ".pkg", ".deb", ".rpm"]
+}
+
+
+def _normalize_ext(ext: str) -> str:
+    ext = ext.strip().casefold()
+    return ext if ext.startswith(".") else "." + ext
+
+
+# -----------------------------
+# 🗂️ Extension → category index
+# -----------------------------
+class CategoryIndex:
+    """
+    The category table compiled into one hash map.
+
+    classify() does at most one dict lookup per dot in the longest known
+    suffix (2 for ".tar.gz"), instead of scanning every category's list.
+    The longest matching suffix wins, so "backup.tar.gz" can map
+    differently from "data.gz".
+    """
+
+    def __init__(self, categories: dict = None, extension_overrides: dict = None):
+        categories = DEFAULT_CATEGORIES if categories is None else categories
+        self.names = [name for name in categories if name != OTHERS] + [OTHERS]
+
+        self._index = {}
+        for category, extensions in categories.items():
+            for ext in extensions:
+                self._index[_normalize_ext(ext)] = category
+
+        # Single extensions moved to another (possibly new) category
+        for ext, category in (extension_overrides or {}).items():
+            self._index[_normalize_ext(ext)] = category
+            if category not in self.names:
+                self.names.insert(len(self.names) - 1, category)
+
+        self._max_parts = max((ext.count(".") for ext in self._index), default=1)
+
+    def classify(self, file_name: str) -> str:
+        name = file_name.casefold()
+        category = None
+        end = len(name)
+        for _ in range(self._max_parts):
+            dot = name.rfind(".", 0, end)
+            if dot <= 0:
+                # No dot, or a leading dot (".bashrc") which is not an extension
+                break
+            match = self._index.get(name[dot:])
+            if match is not None:
+                category = match
+            end = dot
+        return category or OTHERS
+
+    def extensions(self) -> dict:
+        """
+        Category -> sorted extensions, e.g. for printing the table.
+        """
+        table = {name: [] for name in self.names if name != OTHERS}
+        for ext, category in self._index.items():
+            table.setdefault(category, []).append(ext)
+        return {name: sorted(exts) for name, exts in table.items()}
+
+
+# -----------------------------
+# ⚙️ User overrides
+# -----------------------------
+def load_category_config(path: str) -> CategoryIndex:
+    """
+    Build an index from the defaults plus a JSON override file:
+
+        {
+          "categories": {"Ebooks": [".epub", ".mobi"]},
+          "extensions": {".log": "Documents"}
+        }
+
+    "categories" adds new categories or replaces a category's whole list;
+    "extensions" moves individual extensions.
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    categories = dict(DEFAULT_CATEGORIES)
+    categories.update(config.get("categories", {}))
+    return CategoryIndex(categories, config.get("extensions"))
+
+
+@lru_cache(maxsize=None)
+def get_category_index(config_path: str = None) -> CategoryIndex:
+    """
+    Compiled index, built once per config file.
+
+    Uses FILE_ORGANIZER_CONFIG when no path is given, else the defaults.
+    """
+    config_path = config_path or os.environ.get("FILE_ORGANIZER_CONFIG")
+    if config_path:
+        return load_category_config(os.path.expanduser(config_path))
+    return CategoryIndex()
@@ -0,0 +1,226 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_HASH_CACHE = os.path.join("~", ".cache", "file_organizer", "hashes.sqlite")
+
+PARTIAL_BYTES = 16 * 1024   # read from the start and from the end of a file
+CHUNK_BYTES = 1024 * 1024   # full-hash read size
+
+DEDUP_ACTIONS = ("report", "skip", "hardlink")
+
+
+# -----------------------------
+# 💾 Persistent hash cache
+# -----------------------------
+class HashCache:
+    """
+    SQLite table of hashes keyed on (device, inode, size, mtime).
+
+    A file that hasn't changed since the last run keeps the same key, so
+    its hashes are reused instead of re-reading the file. Writes are
+    committed in batches.
+    """
+
+    def __init__(self, path: str, commit_every: int = 1000):
+        path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.commit_every = commit_every
+        self.hits = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_hashes ("
+            " dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,"
+            " kind TEXT, digest TEXT,"
+            " PRIMARY KEY (dev, ino, size, mtime_ns, kind))"
+        )
+
+    def get(self, key: tuple, kind: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM file_hashes"
+                " WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND kind = ?",
+                key + (kind,),
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+        return None
+
+    def put(self, key: tuple, kind: str, digest: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?, ?)",
+                key + (kind, digest),
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+# -----------------------------
+# #️⃣ Hashing
+# -----------------------------
+def _hash_file(path: str, size: int, partial: bool) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        if partial and size > 2 * PARTIAL_BYTES:
+            digest.update(f.read(PARTIAL_BYTES))
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+            digest.update(f.read(PARTIAL_BYTES))
+        else:
+            # Reuse one buffer; hashlib releases the GIL on big updates,
+            # so several worker threads really hash in parallel.
+            buffer = bytearray(CHUNK_BYTES)
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def _is_small(size: int) -> bool:
+    # Small files are read completely by the partial hash already
+    return size <= 2 * PARTIAL_BYTES
+
+
+# -----------------------------
+# 👯 Duplicate finder
+# -----------------------------
+def find_duplicates(entries, workers: int = 8, cache_path: str = DEFAULT_HASH_CACHE,
+                    min_size: int = 1) -> dict:
+    """
+    Group byte-identical files.
+
+    1. Bucket by size (free: comes from stat)
+    2. Same size -> hash the first and last 16 KiB
+    3. Same partial hash -> hash the whole file
+
+    Only real candidates reach step 3. Hashing runs on a thread pool.
+    Empty files are ignored by default (min_size=1), and symlinks are
+    never treated as copies.
+
+    Returns {"groups": [[original, duplicate, ...], ...], "stats": {...}};
+    in each group the first path (sorted order) is the one kept.
+    """
+    stats = {"files": 0, "size_candidates": 0, "partial_hashed": 0,
+             "full_hashed": 0, "cache_hits": 0, "groups": 0,
+             "duplicate_files": 0, "duplicate_bytes": 0}
+
+    by_size = {}
+    for entry in entries:
+        stats["files"] += 1
+        try:
+            if entry.is_symlink():
+                continue
+            st = entry.stat()
+        except OSError:
+            continue
+        if st.st_size < min_size:
+            continue
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        by_size.setdefault(st.st_size, []).append((entry.path, key))
+
+    candidates = [files for files in by_size.values() if len(files) > 1]
+    stats["size_candidates"] = sum(len(files) for files in candidates)
+
+    cache = HashCache(cache_path) if cache_path else None
+    counts_lock = threading.Lock()
+
+    def hashed(item, partial: bool) -> str:
+        path, key = item
+        size = key[2]
+        kind = "partial" if partial and not _is_small(size) else "full"
+        if cache is not None:
+            digest = cache.get(key, kind)
+            if digest is not None:
+                return digest
+        digest = _hash_file(path, size, partial)
+        with counts_lock:
+            stats["partial_hashed" if partial else "full_hashed"] += 1
+        if cache is not None:
+            cache.put(key, kind, digest)
+        return digest
+
+    def group(items, partial: bool):
+        digests = pool.map(lambda item: _safe(hashed, item, partial), items)
+        buckets = {}
+        for item, digest in zip(items, digests):
+            if digest is not None:
+                buckets.setdefault((item[1][2], digest), []).append(item)
+        return [bucket for bucket in buckets.values() if len(bucket) > 1]
+
+    groups = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            flat = [item for files in candidates for item in files]
+            for bucket in group(flat, partial=True):
+                if _is_small(bucket[0][1][2]):
+                    groups.append(bucket)  # partial hash already covered the whole file
+                else:
+                    groups.extend(group(bucket, partial=False))
+    finally:
+        if cache is not None:
+            stats["cache_hits"] = cache.hits
+            cache.close()
+
+    result = []
+    for bucket in groups:
+        paths = sorted(path for path, _ in bucket)
+        size = bucket[0][1][2]
+        inodes = {key[:2] for _, key in bucket}
+        result.append(paths)
+        stats["duplicate_files"] += len(paths) - 1
+        # Files that are already hard links of each other take no extra space
+        stats["duplicate_bytes"] += size * (len(inodes) - 1)
+    stats["groups"] = len(result)
+
+    return {"groups": result, "stats": stats}
+
+
+def _safe(func, *args):
+    try:
+        return func(*args)
+    except OSError:
+        return None  # unreadable or vanished: never call it a duplicate
+
+
+# -----------------------------
+# 🔗 Acting on duplicates
+# -----------------------------
+def link_duplicates(groups) -> list:
+    """
+    Replace every duplicate with a hard link to its group's original.
+
+    Each swap is atomic (link to a temp name, then os.replace). Returns
+    the paths that were linked.
+    """
+    linked = []
+    for original, *duplicates in groups:
+        original_stat = os.stat(original)
+        for duplicate in duplicates:
+            try:
+                st = os.stat(duplicate)
+                if (st.st_dev, st.st_ino) == (original_stat.st_dev, original_stat.st_ino):
+                    continue
+                temp = duplicate + ".organizer-link"
+                os.link(original, temp)
+                os.replace(temp, duplicate)
+                linked.append(duplicate)
+            except OSError:
+                continue  # other filesystem or no hard-link support: leave as is
+    return linked
@@ -0,0 +1,409 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from organizer.transfer import Mover
+
+
+JOURNAL_DIR = os.path.join("~", ".cache", "file_organizer", "journals")
+
+# Record types, one compact JSON array per line:
+#   ["H", version, run_id, root, started]   header
+#   ["M", id, src, dst, size, ino]          move planned (paths relative to root,
+#                                           source size and inode if known)
+#   ["D", id]                               move done
+#   ["U", id]                               move undone
+#   ["E", finished]                         run finished
+#   ["R", finished]                         whole run reverted
+VERSION = 1
+
+# Finished or reverted journals kept per folder (newest first), and their max age
+JOURNAL_KEEP = 20
+JOURNAL_MAX_AGE = 30 * 24 * 3600  # seconds
+
+# Coarse filesystem timestamps: a file created just after the run started
+# may show a ctime up to this much earlier
+CTIME_SLACK = 2.0
+
+
+_run_id_lock = threading.Lock()
+_last_run_ns = 0
+
+
+def _new_run_id() -> str:
+    """
+    "<date>-<time>-<nanoseconds>": sorts by start time, even for runs that
+    start in the same second, and never repeats within a process.
+    """
+    global _last_run_ns
+    with _run_id_lock:
+        _last_run_ns = max(time.time_ns(), _last_run_ns + 1)
+        ns = _last_run_ns
+    seconds, fraction = divmod(ns, 10**9)
+    return time.strftime("%Y%m%d-%H%M%S-", time.localtime(seconds)) + f"{fraction:09d}"
+
+
+def journal_folder(root: str) -> str:
+    # One folder per organized directory, outside of it
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(JOURNAL_DIR), digest)
+
+
+# -----------------------------
+# 📝 Append-only move journal
+# -----------------------------
+class MoveJournal:
+    """
+    Write-ahead log of the moves in one organize run.
+
+    Planned moves are written in batches with one fsync per batch, before
+    any move of that batch starts. "Done" records are only fsynced every
+    `sync_every` records or `sync_interval` seconds: if one is lost in a
+    crash, recover() can tell from the filesystem that the move happened.
+    """
+
+    def __init__(self, path: str, root: str, run_id: str = None,
+                 sync_every: int = 512, sync_interval: float = 1.0, next_id: int = 0):
+        self.path = path
+        self.root = os.path.abspath(root)
+        self.run_id = run_id
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._prefix_len = len(self.root.rstrip(os.sep)) + 1
+        self._lock = threading.Lock()
+        self._next_id = next_id
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, "a", encoding="utf-8")
+
+    @classmethod
+    def create(cls, root: str, **kwargs):
+        folder = journal_folder(root)
+        os.makedirs(folder, exist_ok=True)
+        prune_journals(root)
+        run_id = _new_run_id()
+        journal = cls(os.path.join(folder, run_id + ".jsonl"), root, run_id, **kwargs)
+        journal._write(["H", VERSION, run_id, journal.root, time.time()], sync=True)
+        return journal
+
+    @classmethod
+    def reopen(cls, state, **kwargs):
+        """
+        Keep appending to an interrupted run's journal.
+        """
+        next_id = max(state.moves, default=-1) + 1
+        return cls(state.path, state.root, state.run_id, next_id=next_id, **kwargs)
+
+    def _rel(self, path: str) -> str:
+        return path[self._prefix_len:]
+
+    def _write(self, record, sync: bool = False):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._unsynced += 1
+            now = time.monotonic()
+            if (sync or self._unsynced >= self.sync_every
+                    or now - self._last_sync >= self.sync_interval):
+                self._sync_locked(now)
+
+    def _sync_locked(self, now: float = None):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = now or time.monotonic()
+
+    def plan_batch(self, moves) -> list:
+        """
+        Record [(src, dst), ...] or [(src, dst, size, inode), ...] as
+        planned, fsync once, return their ids. With the source's size and
+        inode, recover() can tell our own half-done destinations from
+        unrelated files.
+        """
+        lines = []
+        with self._lock:
+            ids = list(range(self._next_id, self._next_id + len(moves)))
+            self._next_id += len(moves)
+            for move_id, move in zip(ids, moves):
+                src, dst = move[0], move[1]
+                record = ["M", move_id, self._rel(src), self._rel(dst)]
+                if len(move) > 2 and move[2] is not None:
+                    record += [move[2], move[3]]
+                lines.append(json.dumps(record, separators=(",", ":")))
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+                self._sync_locked()
+        return ids
+
+    def replan(self, move_id: int, src: str, dst: str):
+        """
+        Same move, new destination (the planned name was taken). Durable at once.
+        """
+        self._write(["M", move_id, self._rel(src), self._rel(dst)], sync=True)
+
+    def done(self, move_id: int):
+        self._write(["D", move_id])
+
+    def undone(self, move_id: int):
+        self._write(["U", move_id])
+
+    def finish(self, reverted: bool = False):
+        if not self._next_id:
+            # Nothing was moved (e.g. a watcher pass with no new files): a
+            # journal here would only shadow the last real run for undo
+            self.discard()
+            return
+        self._write(["R" if reverted else "E", time.time()], sync=True)
+
+    def discard(self):
+        """
+        Close and delete the journal file.
+        """
+        self.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.path = None
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync_locked()
+                self._file.close()
+
+
+# -----------------------------
+# 📖 Reading a journal back
+# -----------------------------
+class JournalState:
+    def __init__(self, path: str):
+        self.path = path
+        self.run_id = None
+        self.root = None
+        self.started = None
+        self.moves = {}       # id -> (src, dst), absolute paths
+        self.sources = {}     # id -> (size, inode) of the source when planned
+        self.done = set()
+        self.undone = set()
+        self.finished = False
+        self.reverted = False
+
+
+def read_journal(path: str) -> JournalState:
+    """
+    Stream a journal file into a JournalState.
+
+    A torn last line (crash mid-write) is ignored.
+    """
+    state = JournalState(path)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            kind = record[0]
+            if kind == "M":
+                state.moves[record[1]] = (os.path.join(state.root, record[2]),
+                                          os.path.join(state.root, record[3]))
+                if len(record) > 4:
+                    state.sources[record[1]] = (record[4], record[5])
+            elif kind == "D":
+                state.done.add(record[1])
+            elif kind == "U":
+                state.undone.add(record[1])
+            elif kind == "H":
+                _, _, state.run_id, state.root, state.started = record
+            elif kind == "E":
+                state.finished = True
+            elif kind == "R":
+                state.reverted = True
+    return state
+
+
+def latest_journal(root: str, unfinished_only: bool = False):
+    """
+    Newest journal for this folder (optionally only an interrupted one).
+    """
+    folder = journal_folder(root)
+    if not os.path.isdir(folder):
+        return None
+    for name in sorted(os.listdir(folder), reverse=True):
+        if not name.endswith(".jsonl"):
+            continue
+        state = read_journal(os.path.join(folder, name))
+        if state.reverted or not state.moves:
+            continue  # nothing left to undo or resume
+        if unfinished_only and state.finished:
+            return None
+        return state
+    return None
+
+
+def _settled(path: str) -> bool:
+    # Finished or reverted: the last record is "E" or "R"
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 64))
+            last = f.read().rstrip().rsplit(b"\n", 1)[-1]
+    except OSError:
+        return False
+    return last.startswith((b'["E"', b'["R"'))
+
+
+def prune_journals(root: str, keep: int = JOURNAL_KEEP, max_age: float = JOURNAL_MAX_AGE) -> int:
+    """
+    Delete settled journals of this folder beyond the newest keep, or
+    older than max_age seconds. Interrupted runs are never pruned: they
+    are needed to resume. Returns how many were deleted.
+    """
+    folder = journal_folder(root)
+    try:
+        names = sorted((n for n in os.listdir(folder) if n.endswith(".jsonl")), reverse=True)
+    except OSError:
+        return 0
+    now = time.time()
+    kept = removed = 0
+    for name in names:
+        path = os.path.join(folder, name)
+        if not _settled(path):
+            continue
+        try:
+            if kept < keep and now - os.path.getmtime(path) <= max_age:
+                kept += 1
+                continue
+            os.unlink(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+# -----------------------------
+# 🩹 Crash recovery
+# -----------------------------
+def recover(state: JournalState, journal: MoveJournal) -> dict:
+    """
+    Settle moves that were planned but not confirmed before a crash.
+
+    Looks at the filesystem, checking files against the source's size and
+    inode recorded when the move was planned:
+    - the file sits at its destination (same inode, or a full-size copy)
+      and the source is gone: the move is marked done;
+    - source and destination are hard links of each other: the source is
+      unlinked to finish the move;
+    - the destination is an empty placeholder or a partial copy this run
+      created: it is removed and the file gets moved again.
+    Anything else at the destination is not ours and is left alone.
+    """
+    counts = {"confirmed": 0, "completed": 0, "not_moved": 0, "missing": 0}
+
+    for move_id, (src, dst) in state.moves.items():
+        if move_id in state.done or move_id in state.undone:
+            continue
+
+        size, inode = state.sources.get(move_id, (None, None))
+        src_exists = os.path.lexists(src)
+        dst_exists = os.path.lexists(dst)
+
+        if dst_exists and not src_exists:
+            dst_stat = os.lstat(dst)
+            # A rename keeps the inode; a cross-device copy only deletes the
+            # source once the copy is complete
+            if size is None or dst_stat.st_ino == inode or dst_stat.st_size == size:
+                journal.done(move_id)
+                counts["confirmed"] += 1
+            else:
+                counts["missing"] += 1
+        elif src_exists and dst_exists:
+            src_stat, dst_stat = os.lstat(src), os.lstat(dst)
+            if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+                os.unlink(src)  # link was made, unlink of the source wasn't
+                journal.done(move_id)
+                counts["completed"] += 1
+            else:
+                if _partial_destination(src_stat, dst_stat, size, inode, state.started):
+                    os.unlink(dst)
+                counts["not_moved"] += 1
+        elif src_exists:
+            counts["not_moved"] += 1
+        else:
+            counts["missing"] += 1
+
+    return counts
+
+
+def _partial_destination(src_stat, dst_stat, size, inode, started) -> bool:
+    """
+    Is dst a placeholder or an interrupted copy of src made by this run?
+    """
+    if size is not None and (src_stat.st_size, src_stat.st_ino) != (size, inode):
+        return False  # the source changed since the run: don't guess
+    limit = src_stat.st_size if size is None else size
+    if size is None and dst_stat.st_size:
+        return False  # journal without sizes: only trust empty placeholders
+    # Created after the run started (ctime can't be set back, unlike mtime)
+    # and no bigger than the source
+    return (dst_stat.st_size <= limit
+            and started is not None and dst_stat.st_ctime >= started - CTIME_SLACK)
+
+
+# -----------------------------
+# ⏪ Undo
+# -----------------------------
+def undo_run(state: JournalState, workers: int = 8) -> dict:
+    """
+    Move every completed move of a run back to where it came from.
+
+    Moves in one run never share a source or destination, so they are
+    reverted in parallel (newest first). Each undo is journaled, so an
+    interrupted undo can simply be run again.
+    """
+    journal = MoveJournal.reopen(state)
+    mover = Mover()
+    recover(state, journal)
+    state = read_journal(state.path)
+
+    todo = [move_id for move_id in sorted(state.moves, reverse=True)
+            if move_id in state.done and move_id not in state.undone]
+    errors = []
+    errors_lock = threading.Lock()
+    emptied = set()
+
+    def revert(move_id: int):
+        src, dst = state.moves[move_id]
+        try:
+            os.makedirs(os.path.dirname(src), exist_ok=True)
+            mover.move(dst, src)
+            journal.undone(move_id)
+            return os.path.dirname(dst)
+        except OSError as e:
+            with errors_lock:
+                if len(errors) < 100:
+                    errors.append({"file": os.path.relpath(src, state.root), "error": str(e)})
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for folder in pool.map(revert, todo):
+                if folder:
+                    emptied.add(folder)
+
+        # Remove category folders the run created and that are now empty
+        for folder in emptied:
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+
+        if not errors:
+            journal.finish(reverted=True)
+    finally:
+        journal.close()
+
+    return {"restored": len(todo) - len(errors), "errors": errors}
@@ -0,0 +1,112 @@
+import os
+import shutil
+import threading
+
+
+# -----------------------------
+# 🏷️ In-memory name allocation
+# -----------------------------
+class NameAllocator:
+    """
+    Hands out free file names in one destination folder.
+
+    The folder is listed once; after that every name is picked from an
+    in-memory set, and the next "_N" suffix to try is remembered per
+    stem, so N files called report.pdf cost O(N) total instead of O(N²)
+    exists() checks. Thread-safe.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._taken = set()
+        self._next_suffix = {}
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                self._taken.add(os.path.normcase(entry.name))
+
+    def reserve(self, file_name: str) -> str:
+        """
+        Claim a free name (file_name, else stem_1.ext, stem_2.ext, ...)
+        and return its full path.
+        """
+        with self._lock:
+            if os.path.normcase(file_name) not in self._taken:
+                self._taken.add(os.path.normcase(file_name))
+                return os.path.join(self.folder, file_name)
+
+            # Same naming rule as before: stem_N plus the lowercased extension
+            stem, ext = os.path.splitext(file_name)
+            key = (stem, ext.lower())
+            counter = self._next_suffix.get(key, 1)
+            while True:
+                candidate = f"{stem}_{counter}{ext.lower()}"
+                counter += 1
+                if os.path.normcase(candidate) not in self._taken:
+                    break
+            self._next_suffix[key] = counter
+            self._taken.add(os.path.normcase(candidate))
+            return os.path.join(self.folder, candidate)
+
+    def release(self, path: str):
+        """
+        Give back a reserved name whose move did not happen.
+        """
+        with self._lock:
+            self._taken.discard(os.path.normcase(os.path.basename(path)))
+
+
+# -----------------------------
+# 🔒 Move without overwriting
+# -----------------------------
+def move_no_clobber(source: str, destination: str):
+    """
+    Move source to destination, failing with FileExistsError instead of
+    overwriting if something else created destination in the meantime.
+
+    On the same filesystem a hard link claims the name atomically and the
+    source is then unlinked. Where links don't work (other device, FAT,
+    some network shares) an O_EXCL placeholder claims the name first and
+    shutil.move replaces it.
+    """
+    try:
+        os.link(source, destination, follow_symlinks=False)
+    except (FileExistsError, FileNotFoundError):
+        raise
+    except (OSError, NotImplementedError):
+        fd = os.open(destination, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+        try:
+            shutil.move(source, destination)
+        except BaseException:
+            os.unlink(destination)
+            raise
+        return
+
+    os.unlink(source)
+
+
+def move_to_free_name(source: str, file_name: str, allocator: NameAllocator,
+                      destination: str = None, on_rename=None, max_attempts: int = 100,
+                      move=move_no_clobber) -> str:
+    """
+    Move source into the allocator's folder under a free name.
+
+    destination may be a name reserved earlier. If another process grabbed
+    it first, that name stays marked as taken, the next one is tried, and
+    on_rename(new_destination) is called before retrying. move(source,
+    destination) must raise FileExistsError instead of overwriting.
+    """
+    destination = destination or allocator.reserve(file_name)
+    for _ in range(max_attempts):
+        try:
+            move(source, destination)
+            return destination
+        except FileExistsError:
+            destination = allocator.reserve(file_name)
+            if on_rename:
+                on_rename(destination)
+        except BaseException:
+            allocator.release(destination)
+            raise
+    raise FileExistsError(f"No free name for {file_name} after {max_attempts} attempts")
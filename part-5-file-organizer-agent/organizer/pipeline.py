@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from organizer.naming import NameAllocator, move_to_free_name
+from organizer.scanner import scan_files
+from organizer.transfer import Mover
+
+
+# -----------------------------
+# 📈 Progress + throughput
+# -----------------------------
+class Progress:
+    """
+    Thread-safe counters for a run.
+
+    If a callback is given it is called with snapshot() at most once per
+    `interval` seconds while files are being moved.
+    """
+
+    def __init__(self, callback=None, interval: float = 1.0):
+        self.callback = callback
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._last_report = self._start
+        self.scanned = 0
+        self.moved = 0
+        self.failed = 0
+
+    def add(self, scanned: int = 0, moved: int = 0, failed: int = 0):
+        report = False
+        with self._lock:
+            self.scanned += scanned
+            self.moved += moved
+            self.failed += failed
+            now = time.perf_counter()
+            if self.callback and now - self._last_report >= self.interval:
+                self._last_report = now
+                report = True
+        if report:
+            self.callback(self.snapshot())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self._start
+            return {
+                "scanned": self.scanned,
+                "moved": self.moved,
+                "failed": self.failed,
+                "elapsed_s": round(elapsed, 2),
+                "files_per_s": round(self.moved / elapsed, 1) if elapsed else 0.0,
+            }
+
+
+# -----------------------------
+# 🚚 Parallel move pipeline
+# -----------------------------
+def _source_key(entry) -> tuple:
+    # (size, inode) for the journal, so recovery can recognise its own files.
+    # By path, so anything with a .path works, not only a DirEntry
+    try:
+        st = os.lstat(entry.path)
+    except OSError:
+        return None, None
+    return st.st_size, st.st_ino
+
+
+def organize_folder(target_folder, categorize, workers: int = 8, progress: Progress = None,
+                    collect_names: bool = True, files=None, journal=None,
+                    batch_size: int = 256, category_overrides: dict = None,
+                    mover: Mover = None) -> dict:
+    """
+    Stream files out of target_folder into category subfolders.
+
+    Args:
+        target_folder: folder to organize
+        categorize: function(file_name) -> category folder name
+        workers: number of threads doing moves
+        progress: optional Progress for live reporting
+        collect_names: keep moved file names per category; turn off for
+            huge folders so memory stays flat (counts are kept instead)
+        files: DirEntry iterable to organize (default: scan_files of the
+            top level); names are reported relative to target_folder
+        journal: optional MoveJournal; each batch of planned moves is
+            made durable before any of them starts
+        batch_size: files planned (named + journaled) per batch
+        category_overrides: {path: category} that win over categorize()
+            (e.g. from content sniffing)
+        mover: Mover picking rename vs cross-device copy (default: Mover());
+            its per-path throughput is reported under stats["transfer"]
+
+    Returns a dict with "organized", "total", "errors" and "stats".
+    """
+    progress = progress or Progress()
+    mover = mover or Mover()
+    target_folder = str(target_folder)
+
+    organized = {}
+    errors = []
+    results_lock = threading.Lock()
+
+    # One name index per category folder: free names are picked in memory
+    allocators = {}
+    # Cap queued moves so a huge folder doesn't turn into a huge task queue
+    in_flight = threading.BoundedSemaphore(workers * 4)
+
+    def on_done(category: str, display_name: str, future):
+        in_flight.release()
+        error = future.exception()
+        with results_lock:
+            if error is None:
+                if collect_names:
+                    organized.setdefault(category, []).append(display_name)
+                else:
+                    organized[category] = organized.get(category, 0) + 1
+            elif len(errors) < 100:
+                errors.append({"file": display_name, "error": str(error)})
+        progress.add(moved=error is None, failed=error is not None)
+
+    def move_one(source: str, file_name: str, allocator, destination: str, move_id):
+        on_rename = None
+        if journal is not None:
+            on_rename = lambda new: journal.replan(move_id, source, new)  # noqa: E731
+        move_to_free_name(source, file_name, allocator, destination, on_rename, move=mover.move)
+        if journal is not None:
+            journal.done(move_id)
+
+    if files is None:
+        files = scan_files(target_folder)
+    prefix_len = len(target_folder.rstrip(os.sep)) + 1
+
+    def submit_batch(pool, batch):
+        move_ids = [None] * len(batch)
+        if journal is not None:
+            move_ids = journal.plan_batch([(entry.path, dst) + _source_key(entry)
+                                           for entry, _, _, dst in batch])
+        for (entry, category, allocator, destination), move_id in zip(batch, move_ids):
+            in_flight.acquire()
+            future = pool.submit(move_one, entry.path, entry.name, allocator, destination, move_id)
+            future.add_done_callback(
+                lambda f, c=category, n=entry.path[prefix_len:]: on_done(c, n, f)
+            )
+
+    total = 0
+    batch = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for entry in files:
+            total += 1
+            progress.add(scanned=1)
+            category = categorize(entry.name)
+            if category_overrides:
+                category = category_overrides.get(entry.path, category)
+
+            # Create each category folder once, not once per file
+            allocator = allocators.get(category)
+            if allocator is None:
+                folder = os.path.join(target_folder, category)
+                os.makedirs(folder, exist_ok=True)
+                allocator = allocators[category] = NameAllocator(folder)
+
+            # Names are picked up front so a whole batch can be journaled at once
+            batch.append((entry, category, allocator, allocator.reserve(entry.name)))
+            if len(batch) >= batch_size:
+                submit_batch(pool, batch)
+                batch = []
+
+        submit_batch(pool, batch)
+
+    return {
+        "organized": organized,
+        "total": total,
+        "errors": errors,
+        "stats": dict(progress.snapshot(), workers=workers, transfer=mover.stats.snapshot()),
+    }
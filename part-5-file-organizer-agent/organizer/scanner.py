@@ -0,0 +1,194 @@
+import fnmatch
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+# -----------------------------
+# 🔎 Streaming directory scan
+# -----------------------------
+def scan_files(folder, include=None, exclude=None, snapshot=None):
+    """
+    Yield an os.DirEntry for every file directly inside folder.
+
+    os.scandir streams entries instead of building a full list, and
+    DirEntry.is_file() uses the type info returned by the directory read,
+    so no extra stat() is needed per file on most filesystems.
+    include / exclude are optional glob patterns on the file name.
+    With a DirSnapshot only new or changed files are yielded.
+    """
+    include_match = compile_globs(include)
+    exclude_match = compile_globs(exclude)
+
+    if snapshot is not None:
+        yield from _scan_changed(os.path.abspath(str(folder)), include_match,
+                                 exclude_match, snapshot)
+        return
+
+    for entry in _iter_files(folder):
+        if include_match and not include_match(entry.name, entry.name):
+            continue
+        if exclude_match and exclude_match(entry.name, entry.name):
+            continue
+        yield entry
+
+
+def _iter_files(folder):
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                # Vanished or unreadable entry: skip it, keep scanning
+                continue
+            yield entry
+
+
+def _scan_changed(folder: str, include_match, exclude_match, snapshot):
+    # Non-recursive scan against a snapshot: skip the folder if unchanged.
+    # Entries go through the snapshot as they are read, so this streams
+    # just like the plain scan.
+    st = os.stat(folder)
+    if snapshot.unchanged(folder, st) is not None:
+        return
+    seen = {}
+    handed_out = False
+    for entry in snapshot.iter_new(folder, _iter_files(folder), seen):
+        if ((include_match and not include_match(entry.name, entry.name))
+                or (exclude_match and exclude_match(entry.name, entry.name))):
+            seen[entry.name] = entry.inode()
+            continue
+        handed_out = True
+        yield entry
+    snapshot.record(folder, st, [], seen, handed_out)
+
+
+# -----------------------------
+# 🌳 Recursive tree walk
+# -----------------------------
+def compile_globs(patterns):
+    """
+    Turn glob patterns into one matcher: match(rel_path, name) -> bool.
+
+    A pattern matches if it fits either the bare name ("*.tmp") or the
+    path relative to the root ("cache/**" style, "build/*").
+    """
+    if not patterns:
+        return None
+    regex = re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns))
+    return lambda rel_path, name: bool(regex.match(name) or regex.match(rel_path))
+
+
+def _scan_dir(path: str, depth: int, follow_symlinks: bool, snapshot=None):
+    # One directory per task; runs on a worker thread.
+    # Returns (files, [(dir_path, dir_name)], depth, path, stat-if-listed-for-snapshot)
+    st = None
+    if snapshot is not None:
+        try:
+            st = os.stat(path)  # before listing, so a change during the listing shows next time
+        except OSError:
+            return [], [], depth, path, None
+        cached = snapshot.unchanged(path, st)
+        if cached is not None:
+            return [], [(os.path.join(path, name), name) for name in cached], depth, path, None
+
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        dirs.append((entry.path, entry.name))
+                    elif entry.is_file():
+                        files.append(entry)
+                except OSError:
+                    continue
+    except OSError:
+        st = None  # unreadable directory: skip it, keep walking, don't remember it
+    return files, dirs, depth, path, st
+
+
+def walk_files(root, max_depth: int = None, include=None, exclude=None, skip_dirs=(),
+               follow_symlinks: bool = False, workers: int = 4, snapshot=None):
+    """
+    Yield an os.DirEntry for every file under root.
+
+    The walk is iterative (an explicit work list, no recursion) and each
+    directory is scanned as a separate task on a thread pool, so wide and
+    deep trees are read in parallel. Files are yielded as soon as their
+    directory has been read.
+
+    Args:
+        root: top folder
+        max_depth: 0 = only root, 1 = root + its subfolders, None = no limit
+        include: glob patterns a file must match (default: all files)
+        exclude: glob patterns for files or folders to skip
+        skip_dirs: absolute folder paths never to enter
+        follow_symlinks: enter symlinked folders (loops are detected);
+            by default they are skipped
+        workers: threads scanning directories
+        snapshot: optional DirSnapshot; unchanged folders are not listed
+            and only new or changed files are yielded
+    """
+    root = os.path.abspath(str(root))
+    prefix_len = len(root) + 1
+    include_match = compile_globs(include)
+    exclude_match = compile_globs(exclude)
+    skip_dirs = {os.path.abspath(str(d)) for d in skip_dirs}
+
+    # (st_dev, st_ino) of every folder entered, to break symlink loops
+    visited = set()
+    if follow_symlinks:
+        st = os.stat(root)
+        visited.add((st.st_dev, st.st_ino))
+
+    todo = [(root, 0)]
+    running = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while todo or running:
+            # Depth-first pop keeps the work list small on wide trees
+            while todo and len(running) < workers * 2:
+                path, depth = todo.pop()
+                running.add(pool.submit(_scan_dir, path, depth, follow_symlinks, snapshot))
+
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, dirs, depth, path, dir_stat = future.result()
+
+                seen = None
+                if dir_stat is not None:
+                    files, seen = snapshot.split(path, files)
+
+                if max_depth is None or depth < max_depth:
+                    for dir_path, dir_name in dirs:
+                        if dir_path in skip_dirs:
+                            continue
+                        rel_path = dir_path[prefix_len:].replace(os.sep, "/")
+                        if exclude_match and exclude_match(rel_path, dir_name):
+                            continue
+                        if follow_symlinks:
+                            try:
+                                st = os.stat(dir_path)
+                            except OSError:
+                                continue
+                            key = (st.st_dev, st.st_ino)
+                            if key in visited:
+                                continue
+                            visited.add(key)
+                        todo.append((dir_path, depth + 1))
+
+                handed_out = False
+                for entry in files:
+                    rel_path = entry.path[prefix_len:].replace(os.sep, "/")
+                    if ((include_match and not include_match(rel_path, entry.name))
+                            or (exclude_match and exclude_match(rel_path, entry.name))):
+                        if seen is not None:
+                            seen[entry.name] = entry.inode()
+                        continue
+                    handed_out = True
+                    yield entry
+
+                if dir_stat is not None:
+                    snapshot.record(path, dir_stat, [name for _, name in dirs], seen, handed_out)
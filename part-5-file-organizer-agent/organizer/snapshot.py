@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+SNAPSHOT_DIR = os.path.join("~", ".cache", "file_organizer", "snapshots")
+
+# A directory modified this recently may still change within the same
+# mtime tick, so its mtime is not trusted on the next run
+RACY_NS = 2 * 10**9
+
+
+def snapshot_path(root: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(SNAPSHOT_DIR), digest + ".json")
+
+
+# -----------------------------
+# 📸 Directory snapshot
+# -----------------------------
+class DirSnapshot:
+    """
+    What the last run saw, per directory: its mtime, its subfolders and a
+    fingerprint (name -> inode) of the files it deliberately left alone.
+
+    Adding, removing or renaming an entry changes a directory's mtime, so
+    a directory whose mtime is unchanged is not listed again: only its
+    subfolders are stat()ed to keep walking. Changed directories are
+    listed, and files already in the fingerprint are skipped. A repeat
+    run costs O(folders + changes) instead of O(files).
+
+    Files handed out to be organized are not fingerprinted (they are
+    either moved away or, if the move failed, retried next time), and
+    their directory is always listed again on the next run.
+    """
+
+    def __init__(self, root: str, signature: str = "", full: bool = False, path: str = None):
+        self.root = os.path.abspath(str(root))
+        self.path = path or snapshot_path(self.root)
+        self.signature = signature
+        self.full = full
+        self._prefix_len = len(self.root.rstrip(os.sep)) + 1
+        self._lock = threading.Lock()
+        self._started_ns = time.time_ns()
+        self._old = {} if full else self._load()
+        self._new = {}
+        self.stats = {"mode": "full" if full or not self._old else "incremental",
+                      "dirs_listed": 0, "dirs_unchanged": 0, "files_unchanged": 0}
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Different filters or categories would have seen different files
+        if data.get("root") != self.root or data.get("signature") != self.signature:
+            return {}
+        return data.get("dirs", {})
+
+    def _rel(self, path: str) -> str:
+        return "" if path == self.root else path[self._prefix_len:]
+
+    def unchanged(self, path: str, st) -> list:
+        """
+        Subfolder names of path if it hasn't changed since last run, else None.
+        """
+        rel = self._rel(path)
+        old = self._old.get(rel)
+        if old is None or old[0] is None or old[0] != st.st_mtime_ns:
+            return None
+        with self._lock:
+            self._new[rel] = old
+            self.stats["dirs_unchanged"] += 1
+        return old[1]
+
+    def iter_new(self, path: str, files, seen: dict):
+        """
+        Yield a listed directory's new or changed files as they come;
+        the others are added to seen (name -> inode).
+        """
+        old = self._old.get(self._rel(path))
+        known = old[2] if old else {}
+        unchanged = 0
+        for entry in files:
+            inode = entry.inode()
+            if known.get(entry.name) == inode:
+                seen[entry.name] = inode
+                unchanged += 1
+            else:
+                yield entry
+        if unchanged:
+            with self._lock:
+                self.stats["files_unchanged"] += unchanged
+
+    def split(self, path: str, files) -> tuple:
+        """
+        Split a listed directory's files into (new_or_changed, seen).
+        """
+        seen = {}
+        new = list(self.iter_new(path, files, seen))
+        return new, seen
+
+    def record(self, path: str, st, subdirs, seen: dict, handed_out: bool):
+        """
+        Remember a listed directory. st must be from before the listing.
+        """
+        mtime = st.st_mtime_ns
+        if handed_out or mtime > self._started_ns - RACY_NS:
+            mtime = None  # list it again next time
+        with self._lock:
+            self._new[self._rel(path)] = [mtime, list(subdirs), seen]
+            self.stats["dirs_listed"] += 1
+
+    def keep(self, entry):
+        """
+        Mark a handed-out file as deliberately left in place.
+        """
+        rel = self._rel(os.path.dirname(entry.path))
+        with self._lock:
+            record = self._new.get(rel)
+            if record is not None:
+                record[2][entry.name] = entry.inode()
+
+    def save(self):
+        """
+        Write the snapshot atomically (temp file + os.replace).
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {"root": self.root, "signature": self.signature,
+                "created": time.time(), "dirs": self._new}
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+
+def scan_signature(**options) -> str:
+    """
+    Short hash of the scan options a snapshot is only valid for.
+    """
+    text = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,211 @@
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from organizer.categories import OTHERS
+from organizer.dedup import DEFAULT_HASH_CACHE, HashCache
+
+
+SNIFF_BYTES = 512  # one bounded read per file
+
+SNIFF_MODES = ("unknown", "all")
+
+# magic at offset -> extension. refine: (offset or None = anywhere in the
+# header, needle, extension) checked in order to tell containers apart.
+# Weak signatures are short or shared by several formats: they name files
+# that have no known extension, but never overrule one that has.
+Signature = namedtuple("Signature", "offset magic ext strong refine")
+
+SIGNATURES = [
+    # Images
+    Signature(0, b"\x89PNG\r\n\x1a\n", ".png", True, ()),
+    Signature(0, b"\xff\xd8\xff", ".jpg", True, ()),
+    Signature(0, b"GIF87a", ".gif", True, ()),
+    Signature(0, b"GIF89a", ".gif", True, ()),
+    Signature(0, b"BM", ".bmp", False, ()),
+    Signature(0, b"\x00\x00\x01\x00", ".ico", False, ()),
+    Signature(0, b"<svg", ".svg", False, ()),
+    # Documents
+    Signature(0, b"%PDF-", ".pdf", True, ()),
+    Signature(0, b"{\\rtf", ".rtf", True, ()),
+    Signature(0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", None, False, (
+        (None, b"W\x00o\x00r\x00d\x00D\x00o\x00c", ".doc"),
+        (None, b"W\x00o\x00r\x00k\x00b\x00o\x00o\x00k", ".xls"),
+    )),
+    # Office / OpenDocument files are zip archives with a telltale first entry
+    Signature(0, b"PK\x03\x04", ".zip", False, (
+        (30, b"mimetypeapplication/vnd.oasis.opendocument.text", ".odt"),
+        (None, b"word/", ".docx"),
+        (None, b"xl/", ".xlsx"),
+    )),
+    # Data
+    Signature(0, b"SQLite format 3\x00", ".db", True, ()),
+    Signature(0, b"<?xml", ".xml", False, ()),
+    # Audio / video
+    Signature(0, b"ID3", ".mp3", True, ()),
+    Signature(0, b"\xff\xfb", ".mp3", False, ()),
+    Signature(0, b"fLaC", ".flac", True, ()),
+    Signature(0, b"OggS", ".ogg", True, ()),
+    Signature(0, b"FLV\x01", ".flv", True, ()),
+    Signature(0, b"0&\xb2u\x8ef\xcf\x11", ".wmv", False, ()),
+    Signature(0, b"RIFF", None, True, (
+        (8, b"WAVE", ".wav"),
+        (8, b"AVI ", ".avi"),
+        (8, b"WEBP", ".webp"),
+    )),
+    Signature(4, b"ftyp", ".mp4", True, (
+        (8, b"qt  ", ".mov"),
+        (8, b"M4A ", ".m4a"),
+    )),
+    Signature(0, b"\x1a\x45\xdf\xa3", ".mkv", True, (
+        (None, b"webm", ".webm"),
+    )),
+    # Archives
+    Signature(0, b"Rar!\x1a\x07", ".rar", True, ()),
+    Signature(0, b"7z\xbc\xaf\x27\x1c", ".7z", True, ()),
+    Signature(0, b"\x1f\x8b", ".gz", True, ()),
+    Signature(0, b"BZh", ".bz2", False, ()),
+    Signature(257, b"ustar", ".tar", True, ()),
+    # Executables / code
+    Signature(0, b"MZ", ".exe", False, ()),
+    Signature(0, b"#!", None, False, (
+        (None, b"python", ".py"),
+        (None, b"node", ".js"),
+        (None, b"ruby", ".rb"),
+        (None, b"php", ".php"),
+    )),
+    Signature(0, b"<!DOCTYPE html", ".html", False, ()),
+    Signature(0, b"<!doctype html", ".html", False, ()),
+    Signature(0, b"<html", ".html", False, ()),
+]
+
+
+# -----------------------------
+# 🧬 Signature table
+# -----------------------------
+class SignatureTable:
+    """
+    Signatures compiled into one prefix dict per (offset, magic length).
+
+    Matching a header is a handful of dict lookups (one per distinct
+    magic length, longest first) instead of testing every signature.
+    """
+
+    def __init__(self, signatures=SIGNATURES):
+        groups = {}
+        for sig in signatures:
+            groups.setdefault((sig.offset, len(sig.magic)), {})[sig.magic] = sig
+        # Offset 0 first, longer magics before shorter ones
+        self._groups = sorted(groups.items(), key=lambda item: (item[0][0], -item[0][1]))
+
+    def match(self, head: bytes):
+        """
+        (extension, strong) for a file header, or None if nothing matches.
+        """
+        for (offset, length), magics in self._groups:
+            sig = magics.get(head[offset:offset + length])
+            if sig is None:
+                continue
+            for at, needle, ext in sig.refine:
+                if (head.find(needle) >= 0) if at is None else head.startswith(needle, at):
+                    return ext, sig.strong
+            if sig.ext:
+                return sig.ext, sig.strong
+        return None
+
+
+_TABLE = SignatureTable()
+
+
+def sniff_file(path: str, table: SignatureTable = _TABLE):
+    with open(path, "rb") as f:
+        return table.match(f.read(SNIFF_BYTES))
+
+
+# -----------------------------
+# 🔬 Sniffing stage
+# -----------------------------
+def sniff_categories(entries, index, mode: str = "unknown", workers: int = 8,
+                     cache_path: str = DEFAULT_HASH_CACHE) -> tuple:
+    """
+    Classify files by their first bytes where the name isn't enough.
+
+    mode:
+        unknown - only files whose extension maps to Others (no or unknown extension)
+        all     - also files whose extension contradicts a strong signature
+                  (e.g. a JPEG saved as "scan.pdf")
+
+    Headers are read on a thread pool; results are cached by
+    (device, inode, size, mtime) in the hash cache, so unchanged files
+    are not opened again on the next run.
+
+    Returns ({path: category} for files that change category, stats).
+    """
+    stats = {"mode": mode, "checked": 0, "read": 0, "cache_hits": 0,
+             "reclassified": 0, "mislabeled": 0}
+
+    candidates = []
+    for entry in entries:
+        current = index.classify(entry.name)
+        if mode == "unknown" and current != OTHERS:
+            continue
+        candidates.append((entry, current))
+    stats["checked"] = len(candidates)
+
+    cache = HashCache(cache_path) if cache_path else None
+    counts_lock = threading.Lock()
+
+    def sniffed(entry):
+        try:
+            st = entry.stat()
+            if not st.st_size:
+                return None
+            key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+            if cache is not None:
+                value = cache.get(key, "sniff")
+                if value is not None:
+                    return _decode(value)
+            result = sniff_file(entry.path)
+            with counts_lock:
+                stats["read"] += 1
+            if cache is not None:
+                cache.put(key, "sniff", _encode(result))
+            return result
+        except OSError:
+            return None  # unreadable or vanished: keep the name-based category
+
+    overrides = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(sniffed, [entry for entry, _ in candidates])
+            for (entry, current), result in zip(candidates, results):
+                if result is None:
+                    continue
+                ext, strong = result
+                category = index.classify("file" + ext)
+                if category == current or category == OTHERS:
+                    continue
+                if current == OTHERS:
+                    stats["reclassified"] += 1
+                elif strong:
+                    stats["mislabeled"] += 1
+                else:
+                    continue
+                overrides[entry.path] = category
+    finally:
+        if cache is not None:
+            stats["cache_hits"] = cache.hits
+            cache.close()
+
+    return overrides, stats
+
+
+def _encode(result) -> str:
+    return f"{result[0]}:{int(result[1])}" if result else ""
+
+
+def _decode(value: str):
+    if not value:
+        return None
+    ext, strong = value.rsplit(":", 1)
+    return ext, strong == "1"
@@ -0,0 +1,247 @@
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import os
+import shutil
+import stat
+import sys
+import threading
+import time
+
+from organizer.naming import move_no_clobber
+
+
+COPY_CHUNK = 8 * 1024 * 1024  # bytes per copy_file_range / sendfile call
+VERIFY_MODES = ("size", "hash")
+
+
+# -----------------------------
+# ⚡ Same filesystem: one atomic rename
+# -----------------------------
+_AT_FDCWD = -100
+_RENAME_NOREPLACE = 1
+
+
+def _load_renameat2():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        return libc.renameat2  # glibc >= 2.28
+    except (OSError, AttributeError):
+        return None
+
+
+_renameat2 = _load_renameat2()
+
+
+def rename_no_replace(source: str, destination: str) -> str:
+    """
+    Rename without ever replacing an existing destination.
+
+    Plain os.rename silently overwrites on POSIX, so on Linux this is
+    renameat2(RENAME_NOREPLACE): still one syscall, and atomic. Windows'
+    os.rename already refuses to overwrite. Elsewhere (or on filesystems
+    without RENAME_NOREPLACE) it falls back to link + unlink.
+
+    Returns the path type used: "rename" or "link".
+    """
+    if sys.platform == "win32":
+        os.rename(source, destination)
+        return "rename"
+
+    if _renameat2 is not None:
+        if _renameat2(_AT_FDCWD, os.fsencode(source), _AT_FDCWD,
+                      os.fsencode(destination), _RENAME_NOREPLACE) == 0:
+            return "rename"
+        err = ctypes.get_errno()
+        if err not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(err, os.strerror(err), source, None, destination)
+
+    move_no_clobber(source, destination)
+    return "link"
+
+
+# -----------------------------
+# 🚛 Across devices: verified copy, then delete
+# -----------------------------
+def _copy_fd(src_fd: int, dst_fd: int, size: int) -> str:
+    """
+    Copy size bytes inside the kernel where possible. Returns the method.
+    """
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < size:
+                n = os.copy_file_range(src_fd, dst_fd, min(COPY_CHUNK, size - copied))
+                if n == 0:
+                    break
+                copied += n
+            if copied >= size:
+                return "copy_file_range"
+        except OSError as e:
+            # Older kernels refuse cross-filesystem copy_file_range
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        try:
+            while copied < size:
+                n = os.sendfile(dst_fd, src_fd, copied, min(COPY_CHUNK, size - copied))
+                if n == 0:
+                    break
+                copied += n
+            if copied >= size:
+                return "sendfile"
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.ENOSYS):
+                raise
+
+    # Portable fallback
+    os.lseek(src_fd, copied, os.SEEK_SET)
+    os.lseek(dst_fd, copied, os.SEEK_SET)
+    while True:
+        chunk = os.read(src_fd, 1024 * 1024)
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dst_fd, view):]
+    return "read_write"
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def copy_verified(source: str, destination: str, verify: str = "size") -> str:
+    """
+    Copy source to a new destination file, check it, then delete source.
+
+    The destination is created with O_EXCL (no clobber) and fsynced
+    before the check; on any failure it is removed and source is kept.
+    verify="hash" also compares BLAKE2 hashes of both files.
+    Returns the copy method used.
+    """
+    st = os.lstat(source)
+    if stat.S_ISLNK(st.st_mode):
+        os.symlink(os.readlink(source), destination)  # FileExistsError if taken
+        os.unlink(source)
+        return "symlink"
+
+    dst_fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL, stat.S_IMODE(st.st_mode))
+    try:
+        try:
+            src_fd = os.open(source, os.O_RDONLY)
+            try:
+                method = _copy_fd(src_fd, dst_fd, st.st_size)
+            finally:
+                os.close(src_fd)
+            os.fsync(dst_fd)
+            copied_size = os.fstat(dst_fd).st_size
+        finally:
+            os.close(dst_fd)
+
+        if copied_size != st.st_size:
+            raise OSError(errno.EIO, f"Size mismatch after copy ({copied_size} != {st.st_size})",
+                          destination)
+        if verify == "hash" and _file_hash(source) != _file_hash(destination):
+            raise OSError(errno.EIO, "Content mismatch after copy", destination)
+        shutil.copystat(source, destination)
+    except BaseException:
+        os.unlink(destination)
+        raise
+
+    os.unlink(source)
+    return method
+
+
+# -----------------------------
+# 📏 Per-path throughput
+# -----------------------------
+class TransferStats:
+    """
+    Files, bytes and busy time per path type ("rename", "link", "copy").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths = {}
+        self.copy_methods = {}
+
+    def add(self, path_type: str, size: int, seconds: float, method: str = None):
+        with self._lock:
+            entry = self._paths.setdefault(path_type, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += size
+            entry[2] += seconds
+            if method:
+                self.copy_methods[method] = self.copy_methods.get(method, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            report = {}
+            for path_type, (files, size, seconds) in self._paths.items():
+                report[path_type] = {
+                    "files": files,
+                    "bytes": size,
+                    "seconds": round(seconds, 3),
+                    # busy time per move, so concurrent moves don't inflate it
+                    "mb_per_s": round(size / seconds / 1e6, 1) if seconds else 0.0,
+                }
+            if self.copy_methods:
+                report["copy"]["methods"] = dict(self.copy_methods)
+            return report
+
+
+# -----------------------------
+# 🚚 Mover: picks the path per file
+# -----------------------------
+class Mover:
+    """
+    Moves files by the cheapest safe path and measures each path.
+
+    The device of every source and destination folder is looked up once
+    per run. Same device -> rename_no_replace. Different devices ->
+    copy_verified, with at most `copy_workers` copies at a time so big
+    cross-device copies don't take every move thread (renames keep
+    flowing meanwhile).
+    """
+
+    def __init__(self, copy_workers: int = 2, verify: str = "size"):
+        self.verify = verify
+        self.stats = TransferStats()
+        self._devices = {}
+        self._copy_slots = threading.BoundedSemaphore(copy_workers)
+
+    def device(self, folder: str) -> int:
+        dev = self._devices.get(folder)
+        if dev is None:
+            dev = self._devices[folder] = os.stat(folder).st_dev
+        return dev
+
+    def move(self, source: str, destination: str):
+        """
+        Same contract as move_no_clobber: FileExistsError if destination is taken.
+        """
+        size = os.lstat(source).st_size
+        start = time.perf_counter()
+        if self.device(os.path.dirname(source)) == self.device(os.path.dirname(destination)):
+            try:
+                path_type = rename_no_replace(source, destination)
+                self.stats.add(path_type, size, time.perf_counter() - start)
+                return
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # A mount point inside the folder: copy after all
+
+        with self._copy_slots:
+            start = time.perf_counter()
+            method = copy_verified(source, destination, self.verify)
+        self.stats.add("copy", size, time.perf_counter() - start, method)
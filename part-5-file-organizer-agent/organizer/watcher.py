@@ -0,0 +1,496 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import queue
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+from organizer.pipeline import organize_folder
+from organizer.scanner import compile_globs, scan_files
+
+
+# Partial downloads are renamed to their real name when complete
+DEFAULT_EXCLUDE = ("*.part", "*.crdownload", "*.download", "*.tmp", "*.swp", "~*")
+
+WatchEvent = namedtuple("WatchEvent", "folder name kind time")
+# kind: "write" (created / modified), "closed" (written and closed, or moved in),
+#       "gone" (deleted / moved away), "rescan" (events were lost: list the folder)
+
+
+class FileRef:
+    """
+    A file the watcher found by name, usable wherever an os.DirEntry is
+    (name, path, inode(), is_file(), is_dir(), is_symlink(), stat()).
+    Like a DirEntry, stat results are cached after the first call.
+    """
+
+    __slots__ = ("path", "name", "_stat", "_lstat")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._stat = None
+        self._lstat = None
+
+    def __fspath__(self):
+        return self.path
+
+    def __repr__(self):
+        return f"<FileRef {self.name!r}>"
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        if not follow_symlinks:
+            if self._lstat is None:
+                self._lstat = os.lstat(self.path)
+            return self._lstat
+        if self._stat is None:
+            if self.is_symlink():
+                self._stat = os.stat(self.path)
+            else:
+                self._stat = self.stat(follow_symlinks=False)
+        return self._stat
+
+    def inode(self) -> int:
+        return self.stat(follow_symlinks=False).st_ino
+
+    def _test_mode(self, test, follow_symlinks: bool) -> bool:
+        try:
+            return test(self.stat(follow_symlinks=follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return self._test_mode(stat.S_ISREG, follow_symlinks)
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._test_mode(stat.S_ISDIR, follow_symlinks)
+
+    def is_symlink(self) -> bool:
+        return self._test_mode(stat.S_ISLNK, False)
+
+
+# -----------------------------
+# 👂 inotify event source (Linux)
+# -----------------------------
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+
+def inotify_available() -> bool:
+    return sys.platform.startswith("linux") and _libc() is not None
+
+
+def _libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # noqa: B018 (raises AttributeError if missing)
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class InotifySource(threading.Thread):
+    """
+    Reads inotify events for the top level of each folder and turns them
+    into WatchEvents. The kernel does the watching: no per-file cost while
+    nothing happens.
+    """
+
+    def __init__(self, folders, emit, stop: threading.Event):
+        super().__init__(name="inotify-source", daemon=True)
+        self.emit = emit
+        self.stop = stop
+        libc = _libc()
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._folders = {}
+        for folder in folders:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(errno, f"Cannot watch {folder}: {os.strerror(errno)}")
+            self._folders[wd] = folder
+
+    def run(self):
+        try:
+            while not self.stop.is_set() and self._folders:
+                readable, _, _ = select.select([self._fd], [], [], 0.5)
+                if not readable:
+                    continue
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._parse(data, time.monotonic())
+        finally:
+            os.close(self._fd)
+
+    def _parse(self, data: bytes, now: float):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Kernel queue overflowed: every folder may have missed files
+                for folder in self._folders.values():
+                    self.emit(WatchEvent(folder, "", "rescan", now))
+                continue
+            folder = self._folders.get(wd)
+            if folder is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                print(f"⚠️  Stopped watching {folder} (removed or moved)")
+                del self._folders[wd]
+                continue
+            if mask & IN_ISDIR or not name:
+                continue  # category folders and other subfolders
+
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                kind = "closed"
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                kind = "gone"
+            else:
+                kind = "write"
+            self.emit(WatchEvent(folder, name, kind, now))
+
+
+# -----------------------------
+# 🔁 Polling event source (fallback)
+# -----------------------------
+class PollingSource(threading.Thread):
+    """
+    Lists each folder every `interval` seconds and reports files that are
+    new or whose size/mtime changed. Works everywhere (and in tests), at
+    the cost of one scandir per folder per interval.
+    """
+
+    def __init__(self, folders, emit, stop: threading.Event, interval: float = 1.0):
+        super().__init__(name="polling-source", daemon=True)
+        self.folders = list(folders)
+        self.emit = emit
+        self.stop = stop
+        self.interval = interval
+        self._seen = {folder: {} for folder in self.folders}
+
+    def run(self):
+        while not self.stop.is_set():
+            for folder in self.folders:
+                self._poll(folder)
+            self.stop.wait(self.interval)
+
+    def _poll(self, folder: str):
+        now = time.monotonic()
+        previous = self._seen[folder]
+        current = {}
+        try:
+            for entry in scan_files(folder):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                current[entry.name] = (st.st_size, st.st_mtime_ns)
+                if previous.get(entry.name) != current[entry.name]:
+                    self.emit(WatchEvent(folder, entry.name, "write", now))
+        except OSError:
+            return
+        for name in previous.keys() - current.keys():
+            self.emit(WatchEvent(folder, name, "gone", now))
+        self._seen[folder] = current
+
+
+# -----------------------------
+# 📊 Metrics
+# -----------------------------
+class WatchMetrics:
+    """
+    Rolling counters: events/s over the last `window` seconds and
+    arrival -> placed latency over the last `samples` files.
+    """
+
+    def __init__(self, window: int = 10, samples: int = 1000):
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._buckets = deque(maxlen=window)  # [second, count]
+        self._latencies = deque(maxlen=samples)
+        self.window = window
+        self.events = 0
+        self.dropped = 0
+        self.rescans = 0
+        self.batches = 0
+        self.placed = 0
+        self.failed = 0
+
+    def event(self, now: float):
+        second = int(now)
+        with self._lock:
+            self.events += 1
+            if self._buckets and self._buckets[-1][0] == second:
+                self._buckets[-1][1] += 1
+            else:
+                self._buckets.append([second, 1])
+
+    def drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def placed_batch(self, latencies, failed: int):
+        with self._lock:
+            self.batches += 1
+            self.placed += len(latencies)
+            self.failed += failed
+            self._latencies.extend(latencies)
+
+    def latencies(self) -> list:
+        # Arrival -> placed seconds of the last `samples` files
+        with self._lock:
+            return list(self._latencies)
+
+    def snapshot(self, **extra) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            oldest = max(self._start, now - self.window)
+            recent = sum(count for second, count in self._buckets if second >= oldest - 1)
+            latencies = sorted(self._latencies)
+            stats = {
+                "events": self.events,
+                "events_per_s": round(recent / max(now - oldest, 1e-9), 1),
+                "dropped": self.dropped,
+                "rescans": self.rescans,
+                "batches": self.batches,
+                "placed": self.placed,
+                "failed": self.failed,
+            }
+        if latencies:
+            stats["latency_ms"] = {
+                "p50": round(latencies[len(latencies) // 2] * 1000, 1),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1),
+            }
+        stats.update(extra)
+        return stats
+
+
+# -----------------------------
+# 👀 Watch daemon
+# -----------------------------
+class OrganizerDaemon:
+    """
+    Watches folders and organizes files as they arrive.
+
+    Event sources push into a bounded queue; if it is full, events are
+    dropped and the folder is re-listed instead, so memory stays flat no
+    matter how fast files arrive. A file is placed once it has been quiet
+    for `settle` seconds (or `batch_window` seconds after it was closed /
+    moved in), so files still being written are left alone. Ready files
+    are moved in batches through organize_folder.
+    """
+
+    def __init__(self, folders, categorize, settle: float = 2.0, batch_window: float = 0.25,
+                 max_batch: int = 512, queue_size: int = 10000, max_pending: int = 50000,
+                 workers: int = 4, exclude=DEFAULT_EXCLUDE, backend: str = "auto",
+                 poll_interval: float = 1.0, journal_factory=None, on_batch=None):
+        self.folders = [os.path.abspath(os.path.expanduser(str(f))) for f in folders]
+        self.categorize = categorize
+        self.settle = settle
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.journal_factory = journal_factory
+        self.on_batch = on_batch
+        self.metrics = WatchMetrics()
+        self.stop_event = threading.Event()
+
+        if backend == "auto":
+            backend = "inotify" if inotify_available() else "poll"
+        self.backend = backend
+
+        self._exclude = compile_globs(exclude)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._needs_rescan = set(self.folders)  # first pass picks up existing files
+        self._rescan_lock = threading.Lock()
+        # path -> (first_seen, last_event); oldest event first in each
+        self._writing = OrderedDict()
+        self._closed = OrderedDict()
+        self._journals = {}
+
+    # ---- event intake (source threads) ----
+    def _emit(self, event: WatchEvent):
+        self.metrics.event(event.time)
+        if event.kind == "rescan":
+            with self._rescan_lock:
+                self._needs_rescan.add(event.folder)
+            return
+        if self._exclude and self._exclude(event.name, event.name):
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Drop the event, list the folder later instead
+            self.metrics.drop()
+            with self._rescan_lock:
+                self._needs_rescan.add(event.folder)
+
+    def _source(self):
+        if self.backend == "inotify":
+            return InotifySource(self.folders, self._emit, self.stop_event)
+        return PollingSource(self.folders, self._emit, self.stop_event, self.poll_interval)
+
+    # ---- debouncing (daemon thread) ----
+    def _track(self, path: str, kind: str, now: float):
+        first_seen = now
+        for table in (self._writing, self._closed):
+            if path in table:
+                first_seen = table.pop(path)[0]
+        if kind == "gone":
+            return
+        if len(self._writing) + len(self._closed) >= self.max_pending:
+            with self._rescan_lock:
+                self._needs_rescan.add(os.path.dirname(path))
+            return
+        table = self._closed if kind == "closed" else self._writing
+        table[path] = (first_seen, now)
+
+    def _rescan(self, now: float):
+        with self._rescan_lock:
+            folders, self._needs_rescan = self._needs_rescan, set()
+        for folder in folders:
+            self.metrics.rescans += 1
+            try:
+                for entry in scan_files(folder):
+                    if self._exclude and self._exclude(entry.name, entry.name):
+                        continue
+                    if entry.path not in self._writing and entry.path not in self._closed:
+                        self._track(entry.path, "write", now)
+            except OSError:
+                continue
+
+    def _ready(self, now: float) -> list:
+        ready = []
+        for table, delay in ((self._closed, self.batch_window), (self._writing, self.settle)):
+            while table and len(ready) < self.max_batch:
+                path, (first_seen, last_event) = next(iter(table.items()))
+                if now - last_event < delay:
+                    break
+                del table[path]
+                ready.append((path, first_seen))
+        return ready
+
+    def _next_wakeup(self, now: float) -> float:
+        wakeup = 0.5
+        for table, delay in ((self._closed, self.batch_window), (self._writing, self.settle)):
+            if table:
+                _, last_event = next(iter(table.values()))
+                wakeup = min(wakeup, max(0.0, last_event + delay - now))
+        return wakeup
+
+    # ---- placing files ----
+    def _place(self, ready):
+        by_folder = {}
+        for path, first_seen in ready:
+            by_folder.setdefault(os.path.dirname(path), []).append((path, first_seen))
+
+        for folder, items in by_folder.items():
+            files = [ref for ref in (FileRef(path) for path, _ in items) if ref.is_file()]
+            if not files:
+                continue
+            journal = self._journal(folder)
+            result = organize_folder(folder, self.categorize, workers=self.workers,
+                                     collect_names=False, files=files, journal=journal)
+            placed_at = time.monotonic()
+            failed = {folder + os.sep + error["file"] for error in result["errors"]}
+            first_seen = dict(items)
+            latencies = [placed_at - first_seen[ref.path] for ref in files
+                         if ref.path not in failed]
+            self.metrics.placed_batch(latencies, result["stats"]["failed"])
+            if self.on_batch:
+                self.on_batch(folder, result)
+
+    def _journal(self, folder: str):
+        if self.journal_factory is None:
+            return None
+        if folder not in self._journals:
+            self._journals[folder] = self.journal_factory(folder)
+        return self._journals[folder]
+
+    # ---- main loop ----
+    def run(self, report_interval: float = 0, on_report=None):
+        """
+        Watch until stop() is called (or Ctrl+C). Calls on_report(metrics)
+        every report_interval seconds when both are given.
+        """
+        source = self._source()
+        source.start()
+        next_report = time.monotonic() + report_interval
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                try:
+                    event = self._queue.get(timeout=self._next_wakeup(now))
+                    while True:
+                        self._track(os.path.join(event.folder, event.name), event.kind, event.time)
+                        event = self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+                now = time.monotonic()
+                if self._needs_rescan:
+                    self._rescan(now)
+                ready = self._ready(now)
+                if ready:
+                    self._place(ready)
+
+                if on_report and report_interval and now >= next_report:
+                    next_report = now + report_interval
+                    on_report(self.stats())
+        finally:
+            self.stop_event.set()
+            source.join(timeout=2)
+            for journal in self._journals.values():
+                journal.finish()
+                journal.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self) -> dict:
+        return self.metrics.snapshot(
+            backend=self.backend,
+            queue_depth=self._queue.qsize(),
+            pending=len(self._writing) + len(self._closed),
+        )
+
+
+def write_metrics(path: str, stats: dict):
+    # Atomic replace so a scraper never reads half a file
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(dict(stats, time=time.time()), f)
+    os.replace(temp, path)
@@ -0,0 +1,85 @@
+import argparse
+import os
+
+from organizer.categories import get_category_index
+from organizer.journal import MoveJournal
+from organizer.watcher import DEFAULT_EXCLUDE, OrganizerDaemon, write_metrics
+
+
+# -----------------------------
+# 👀 Watch mode: organize files as they arrive
+# -----------------------------
+def print_stats(stats):
+    latency = stats.get("latency_ms", {})
+    print(
+        f"📊 {stats['events_per_s']:,.1f} events/s | {stats['placed']:,} placed, "
+        f"{stats['failed']:,} failed | latency p50 {latency.get('p50', 0)} ms, "
+        f"p95 {latency.get('p95', 0)} ms | queue {stats['queue_depth']}, pending {stats['pending']}",
+        flush=True,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep folders organized while files arrive")
+    parser.add_argument("folders", nargs="+", help="folders to watch (top level only)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds a file must be quiet before it is moved")
+    parser.add_argument("--batch-window", type=float, default=0.25,
+                        help="seconds to wait after a file is closed, to batch bursts")
+    parser.add_argument("--poll", action="store_true",
+                        help="poll instead of inotify (other OSes, network shares)")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--queue-size", type=int, default=10000,
+                        help="max queued events; beyond that the folder is re-listed")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--exclude", nargs="*", default=list(DEFAULT_EXCLUDE),
+                        help="glob patterns never moved (default: partial downloads)")
+    parser.add_argument("--config", help="category config JSON (see organizer/categories.py)")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="don't journal moves (agent.py 'undo' reverts a journaled session)")
+    parser.add_argument("--metrics-file", help="write metrics JSON here every report")
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between reports")
+    args = parser.parse_args(argv)
+
+    for folder in args.folders:
+        if not os.path.isdir(os.path.expanduser(folder)):
+            parser.error(f"Folder not found: {folder}")
+
+    exclude = list(args.exclude)
+    if args.metrics_file:
+        exclude.append(os.path.basename(args.metrics_file))  # don't organize our own output
+
+    daemon = OrganizerDaemon(
+        args.folders,
+        get_category_index(args.config).classify,
+        settle=args.settle,
+        batch_window=args.batch_window,
+        queue_size=args.queue_size,
+        workers=args.workers,
+        exclude=exclude,
+        backend="poll" if args.poll else "auto",
+        poll_interval=args.poll_interval,
+        journal_factory=None if args.no_journal else MoveJournal.create,
+    )
+
+    def report(stats):
+        print_stats(stats)
+        if args.metrics_file:
+            write_metrics(args.metrics_file, stats)
+
+    print("=" * 50)
+    print("👀 File Organizer — watch mode")
+    print("=" * 50)
+    print(f"Watching ({daemon.backend}):", ", ".join(daemon.folders))
+    print("Press Ctrl+C to stop.\n")
+
+    try:
+        daemon.run(report_interval=args.report_every, on_report=report)
+    except KeyboardInterrupt:
+        pass
+    report(daemon.stats())
+    print("\n👋 Stopped.")
+
+
+if __name__ == "__main__":
+    main()